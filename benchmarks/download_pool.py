@@ -0,0 +1,113 @@
+"""
+Parallel download pool against a local stand-in for Fintables.
+
+Serves a minimal company page with an "Excel'e Aktar" button for every
+ticker; clicking it downloads a fixture workbook (sample_data) as
+`<TICKER> (TRY).xlsx` after `--latency` seconds.  The pool is run with
+1 and `--workers` browsers and the wall time of both is reported.
+Needs selenium and a local Chrome.
+
+    python benchmarks/download_pool.py
+    python benchmarks/download_pool.py --tickers 40 --workers 6 --latency 1.5 --fail 0.2
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from modules.downloader import DownloadConfig, DownloadPool   # noqa: E402
+
+FIXTURE = ROOT / "sample_data" / "ASELS (TRY).xlsx"
+
+PAGE = """<!doctype html><html><body>
+<h1>{ticker}</h1>
+<div id="export" onclick="location.href='/files/{ticker}'">Excel'e Aktar</div>
+</body></html>"""
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """`/sirketler/<T>/...` → sayfa, `/files/<T>` → xlsx (ek olarak)."""
+
+    def __init__(self, *args, latency: float, fail: float, **kwargs):
+        self.latency, self.fail = latency, fail
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        parts = [unquote(p) for p in self.path.strip("/").split("/")]
+        if len(parts) >= 2 and parts[0] == "sirketler":
+            # Geçici hata: butonsuz sayfa → havuz tekrar dener
+            body = (PAGE.format(ticker=parts[1]) if random.random() >= self.fail
+                    else "<html><body>503</body></html>").encode()
+            self._send(body, "text/html; charset=utf-8")
+        elif len(parts) == 2 and parts[0] == "files":
+            time.sleep(self.latency)
+            self._send(FIXTURE.read_bytes(),
+                       "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                       f'attachment; filename="{parts[1]} (TRY).xlsx"')
+        else:
+            self.send_error(404)
+
+    def _send(self, body: bytes, content_type: str, disposition: str = None):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if disposition:
+            self.send_header("Content-Disposition", disposition)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=1.0, help="dosya başına sunucu gecikmesi (sn)")
+    parser.add_argument("--fail", type=float, default=0.1, help="butonsuz sayfa olasılığı")
+    parser.add_argument("--show", action="store_true", help="tarayıcıları görünür aç")
+    args = parser.parse_args()
+
+    handler = partial(StandIn, latency=args.latency, fail=args.fail)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    tickers = [f"T{i:03d}" for i in range(args.tickers)]
+
+    for workers in dict.fromkeys((1, args.workers)):
+        with tempfile.TemporaryDirectory() as tmp:
+            config = DownloadConfig(
+                workers=workers,
+                headless=not args.show,
+                url_template=base + "/sirketler/{ticker}/finansal-tablolar/bilanco",
+                profile_dir=None,
+                work_dir=Path(tmp) / "work",
+                dest_dir=Path(tmp) / "companies",
+                backoff=0.5,
+            )
+            t0 = time.perf_counter()
+            results = DownloadPool(config).run(tickers)
+            elapsed = time.perf_counter() - t0
+
+            ok = sum(r.ok for r in results.values())
+            retries = sum(max(r.attempts - 1, 0) for r in results.values())
+            on_disk = len(list(config.dest_dir.glob("*.xlsx")))
+            print(f"{workers:>2} işçi: {elapsed:6.1f} sn · {ok}/{len(tickers)} başarılı · "
+                  f"{retries} tekrar · {on_disk} dosya")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Error vs. scenario count of the Monte Carlo DCF variance-reduction options.
+
+Values sample_data/ASELS with every sampler (random, antithetic, Sobol,
+Halton), with and without the Gordon control variate, and reports the
+relative RMSE of the median (and P5 / P95) against a high-precision
+reference, plus the scenario count each strategy needs for a target
+precision.
+
+    python benchmarks/mc_variance_reduction.py
+    python benchmarks/mc_variance_reduction.py --reps 200 --target 0.25
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from modules.data_loader import load_financial_data          # noqa: E402
+from modules.utils import period_order                       # noqa: E402
+from modules.valuation import MC_SAMPLERS, monte_carlo_dcf_batch  # noqa: E402
+
+SAMPLE_DIR = ROOT / "sample_data"
+QUANTILES  = (0.05, 0.5, 0.95)
+SIZES      = (256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+def ttm_fcf(symbol: str) -> float:
+    """Son 4 çeyreğin FCF toplamı (faaliyet nakit akışı − CAPEX), değerleme sekmesindeki gibi."""
+    cashflow = load_financial_data(symbol, base_dir=SAMPLE_DIR, use_cache=False).cashflow
+    capex_kalem = ("Maddi ve Maddi Olmayan Duran Varlık Alımları"
+                   if "Maddi ve Maddi Olmayan Duran Varlık Alımları" in cashflow
+                   else "Yatırım Faaliyetlerinden Kaynaklanan Nakit Akışları")
+    fcf = (cashflow.series("İşletme Faaliyetlerinden Nakit Akışları")
+           - cashflow.series(capex_kalem)).dropna()
+    fcf = fcf.loc[sorted(fcf.index, key=period_order)]
+    return float(fcf.iloc[-4:].sum())
+
+
+def reference(fcf: float) -> np.ndarray:
+    """Sobol, 4 × 2²² senaryo – benchmark hatalarından birkaç kat daha hassas."""
+    runs = [monte_carlo_dcf_batch([fcf], n_sims=2 ** 22, seed=10_000 + s,
+                                  sampler="sobol", quantiles=QUANTILES)[0] for s in range(4)]
+    return np.mean(runs, axis=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbol", default="ASELS")
+    parser.add_argument("--reps", type=int, default=100, help="tekrar sayısı (farklı seed)")
+    parser.add_argument("--target", type=float, default=0.5, help="hedef medyan RMSE (%%)")
+    args = parser.parse_args()
+
+    fcf = ttm_fcf(args.symbol)
+    ref = reference(fcf)
+    print(f"{args.symbol}: TTM FCF = {fcf:,.0f} TL · referans medyan = {ref[1]:,.0f} TL\n")
+
+    strategies = [(s, cv) for s in MC_SAMPLERS for cv in (False, True)]
+    header = f"{'strateji':<18}" + "".join(f"{n:>9,}" for n in SIZES) + "   süre/çağrı"
+    print("Medyan göreli RMSE (%)")
+    print(header)
+    print("-" * len(header))
+
+    needed = {}
+    for sampler, cv in strategies:
+        name = sampler + (" + CV" if cv else "")
+        rmse, t0 = [], time.perf_counter()
+        for n in SIZES:
+            est = np.array([
+                monte_carlo_dcf_batch([fcf], n_sims=n, seed=s, sampler=sampler,
+                                      control_variate=cv, quantiles=QUANTILES)[0]
+                for s in range(args.reps)
+            ])
+            rmse.append(np.sqrt(np.mean((est / ref - 1) ** 2, axis=0)) * 100)
+        elapsed = (time.perf_counter() - t0) / (args.reps * len(SIZES))
+        rmse = np.array(rmse)                                   # (len(SIZES), 3)
+        print(f"{name:<18}" + "".join(f"{r:>9.3f}" for r in rmse[:, 1]) + f"   {elapsed * 1e3:7.2f} ms")
+
+        # Hedefe ulaşılan senaryo sayısı: log-log doğrusu (RMSE ∝ n^eğim) üzerinden
+        slope, intercept = np.polyfit(np.log(SIZES), np.log(rmse[:, 1]), 1)
+        needed[name] = (float(np.exp((np.log(args.target) - intercept) / slope)), rmse[SIZES.index(4096)])
+
+    base = needed["random"][0]
+    print(f"\nMedyan RMSE ≤ %{args.target} için gereken senaryo (log-log kestirim, random'a göre kazanç)"
+          f" ve 4,096 senaryoda P5 / P95 RMSE:")
+    for sampler, cv in strategies:
+        name = sampler + (" + CV" if cv else "")
+        n, (p5, _, p95) = needed[name]
+        print(f"  {name:<18}{max(n, 1):>12,.0f}   x{base / max(n, 1):>9,.1f}   "
+              f"P5 %{p5:.3f} · P95 %{p95:.3f}")
+    print("\nNot: DCF değeri (WACC, g) içinde monoton olduğundan antitetik çiftler medyanı"
+          " neredeyse tam verir; kuyruklarda (P5 / P95) kazanç küçüktür.")
+
+
+if __name__ == "__main__":
+    main()
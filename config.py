@@ -8,16 +8,29 @@ DATA_DIR = BASE_DIR / "data"
 COMPANIES_DIR = DATA_DIR / "companies"
 DOWNLOADS_DIR = BASE_DIR / "downloads"
 
+# Fintables'a giriş yapılmış Chrome profili (indirici işçileri bunun kopyasıyla açılır)
+CHROME_PROFILE_DIR = Path(r"C:\selenium_data")
+
+# Excel dosyalarının ikili (npz) önbelleği
+CACHE_DIR = DATA_DIR / "cache"
+
+# Artımlı taramalar için skor veritabanı
+SCORES_DB = DATA_DIR / "scores.sqlite"
+
+# Şirket Excel'lerinin son dönem / parmak izi listesi (indirici güncellik kontrolü)
+WORKBOOK_MANIFEST = DATA_DIR / "workbook_manifest.json"
+
 # Örnek veri dosyası yolu
 SON_BILANCOLAR_JSON = DATA_DIR / "son_bilancolar.json"
 
 RADAR_XLSX = DATA_DIR / "fintables_radar.xlsx"
 
-PERIODS = [
-    "2023/12",
-    "2023/09",
-    "2023/06",
-    "2023/03",
-    "2022/12",
-    "2022/09",
-]
+# KAP finansal rapor son tarihleri: çeyrek sonundan sonraki gün sayısı
+# (konsolide tablolar; 6 aylık sınırlı denetimli, yıllık bağımsız denetimli)
+KAP_DEADLINE_DAYS = {3: 40, 6: 60, 9: 40, 12: 70}
+
+# Tüm şirketlerin tablolarını tek yerde tutan sütunlu panel (memmap .npy)
+PANEL_DIR = DATA_DIR / "panel"
+
+# İsteğe bağlı ticker → sektör eşlemesi (radar'da "Sektör" kolonu yoksa kullanılır)
+SECTORS_JSON = DATA_DIR / "sektorler.json"
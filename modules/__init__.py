@@ -1,3 +1,4 @@
 from .utils import safe_divide, get_value
+from .financial_statement import FinancialStatement
 from . import scores
 from . import financial_snapshot
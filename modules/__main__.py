@@ -0,0 +1,69 @@
+"""
+Komut satırı araçları:
+
+    python -m modules cache warm|stats|clear
+    python -m modules panel build|stats
+"""
+
+import argparse
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+
+def _cache(args):
+    from modules.data_loader import warm_up_cache
+    from modules.workbook_cache import workbook_cache
+
+    if args.action == "warm":
+        kwargs = {"base_dir": args.base_dir} if args.base_dir else {}
+        stats = warm_up_cache(log=print, **kwargs)
+        print(json.dumps(asdict(stats), ensure_ascii=False))
+    elif args.action == "stats":
+        n, size = workbook_cache.disk_usage()
+        print(f"{workbook_cache.cache_dir}: {n} girdi, {size / 1e6:.1f} MB")
+    else:
+        print(f"{workbook_cache.clear()} önbellek girdisi silindi.")
+
+
+def _panel(args):
+    from modules.panel_store import PanelStore, PanelStoreError, build_panel
+
+    if args.action == "build":
+        kwargs = {"base_dir": args.base_dir} if args.base_dir else {}
+        store = build_panel(incremental=not args.full, log=print, **kwargs)
+        print(store)
+    else:
+        try:
+            store = PanelStore.open()
+        except PanelStoreError as e:
+            print(e)
+            return
+        print(f"{store.path}: {store}, {len(store.kalem_names)} kalem, "
+              f"{store.disk_usage() / 1e6:.1f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m modules")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    cache = sub.add_parser("cache", help="Şirket Excel önbelleği")
+    cache.add_argument("action", choices=["warm", "stats", "clear"])
+    cache.add_argument("--base-dir", type=Path, default=None,
+                       help="Excel klasörü (varsayılan: COMPANIES_DIR)")
+    cache.set_defaults(func=_cache)
+
+    panel = sub.add_parser("panel", help="Tüm şirketlerin sütunlu tablo paneli")
+    panel.add_argument("action", choices=["build", "stats"])
+    panel.add_argument("--base-dir", type=Path, default=None,
+                       help="Excel klasörü (varsayılan: COMPANIES_DIR)")
+    panel.add_argument("--full", action="store_true",
+                       help="Değişmemiş şirketleri de yeniden oku")
+    panel.set_defaults(func=_panel)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
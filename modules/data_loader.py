@@ -1,19 +1,128 @@
-
 import pandas as pd
 from pathlib import Path
 from config import COMPANIES_DIR
+from modules.workbook_cache import CacheStats, workbook_cache
+from modules.financial_statement import FinancialStatement
 
-def load_financial_data(symbol: str, base_dir: Path = Path(COMPANIES_DIR)):
-    """Load Bilanço, Gelir Tablosu (Çeyreklik) and Nakit Akış (Çeyreklik) sheets for a ticker."""
-    path = base_dir / f"{symbol} (TRY).xlsx"
-    if not path.exists():
-        raise FileNotFoundError(f"{path} not found")
-    bilanco  = pd.read_excel(path, sheet_name="Bilanço")
-    gelir    = pd.read_excel(path, sheet_name="Gelir Tablosu (Çeyreklik)")
-    cashflow = pd.read_excel(path, sheet_name="Nakit Akış (Çeyreklik)")
+SHEETS = ("Bilanço", "Gelir Tablosu (Çeyreklik)", "Nakit Akış (Çeyreklik)")
+
+def company_path(symbol: str, base_dir: Path = Path(COMPANIES_DIR)) -> Path:
+    return Path(base_dir) / f"{symbol} (TRY).xlsx"
 
-    for df in (bilanco, gelir, cashflow):
+def _read_statements(path: Path, sheets, use_cache: bool, use_panel: bool = True) -> dict:
+    """{sheet: FinancialStatement} for `sheets`, parsed in one workbook pass."""
+    if use_cache and use_panel:
+        from modules.panel_store import panel_statements   # panel_store → data_loader döngüsü
+        statements = panel_statements(path, sheets)
+        if statements is not None:
+            return statements
+    if use_cache:
+        frames = workbook_cache.read_sheets(path, sheets)
+    else:
+        with pd.ExcelFile(path) as xls:
+            frames = {s: pd.read_excel(xls, sheet_name=s) for s in sheets}
+
+    for df in frames.values():
         df['Kalem'] = df['Kalem'].astype(str).str.strip()
+    return {s: FinancialStatement.from_frame(df) for s, df in frames.items()}
+
+
+class CompanyFinancials:
+    """
+    One company's statements, each loaded on first access.
+
+        fin = load_financial_data("ASELS")
+        fin.cashflow                       # yalnızca Nakit Akış sayfası okunur
+        balance, income, cashflow = fin    # eski tuple kullanımı: üçü birden
+
+    Sheets come from the shared panel (read-only views, see `panel_store`),
+    the binary workbook cache (`use_cache=True`) or from openpyxl.  Unpacking / indexing behaves like the `(balance, income,
+    cashflow)` tuple `load_financial_data` used to return.
+    """
+
+    def __init__(self, symbol: str, path: Path, use_cache: bool = True):
+        self.symbol    = symbol
+        self.path      = Path(path)
+        self.use_cache = use_cache
+        self._sheets: dict = {}
+
+    def load(self, *sheets: str) -> "CompanyFinancials":
+        """Load the given sheets (all three by default) that are not loaded yet."""
+        missing = [s for s in (sheets or SHEETS) if s not in self._sheets]
+        if missing:
+            self._sheets.update(_read_statements(self.path, missing, self.use_cache))
+        return self
+
+    def sheet(self, name: str) -> FinancialStatement:
+        return self.load(name)._sheets[name]
+
+    @property
+    def balance(self) -> FinancialStatement:
+        return self.sheet(SHEETS[0])
 
-    return bilanco, gelir, cashflow
+    @property
+    def income(self) -> FinancialStatement:
+        return self.sheet(SHEETS[1])
+
+    @property
+    def cashflow(self) -> FinancialStatement:
+        return self.sheet(SHEETS[2])
+
+    def periods(self, sheet: str = SHEETS[0]) -> list:
+        """
+        Period columns of `sheet`.  Read from the loaded sheet if there is
+        one, otherwise only the header row of the workbook is parsed.
+        """
+        if sheet in self._sheets:
+            return list(self._sheets[sheet].periods)
+        from modules.xlsx_probe import header_row      # xlsx_probe → data_loader döngüsü
+        return [str(c).strip() for c in header_row(self.path, sheet)[1:] if c is not None]
+
+    @property
+    def loaded(self) -> tuple:
+        return tuple(s for s in SHEETS if s in self._sheets)
+
+    # -------- tuple uyumluluğu ------------------------------------------
+    def __iter__(self):
+        self.load()
+        return iter(self._sheets[s] for s in SHEETS)
+
+    def __getitem__(self, i):
+        return tuple(self)[i]
+
+    def __len__(self) -> int:
+        return len(SHEETS)
+
+    def __repr__(self) -> str:
+        return f"CompanyFinancials({self.symbol}, yüklü: {', '.join(self.loaded) or '-'})"
+
+
+def load_financial_data(symbol: str, base_dir: Path = Path(COMPANIES_DIR),
+                        use_cache: bool = True) -> CompanyFinancials:
+    """Bilanço, Gelir Tablosu (Çeyreklik) and Nakit Akış (Çeyreklik) sheets of a ticker.
+
+    Returns a lazy `CompanyFinancials` handle: `.balance`, `.income` and
+    `.cashflow` are read on first access, while `balance, income, cashflow
+    = load_financial_data(...)` still loads all three in a single pass.
+    Sheets are served from the shared memory-mapped panel or the binary
+    workbook cache when the xlsx has not changed since it was last ingested
+    (`use_cache=False` forces openpyxl).
+    Each sheet is an indexed `FinancialStatement`; the raw DataFrame stays
+    available as `.frame`.
+    """
+    path = company_path(symbol, base_dir)
+    if not path.exists():
+        raise FileNotFoundError(f"{path} not found")
+    return CompanyFinancials(symbol, path, use_cache)
 
+def warm_up_cache(base_dir: Path = Path(COMPANIES_DIR), log=lambda msg: None) -> CacheStats:
+    """Convert every `<TICKER> (TRY).xlsx` under `base_dir` into the binary cache."""
+    workbook_cache.reset_stats()
+    files = sorted(Path(base_dir).glob("* (TRY).xlsx"))
+    for i, path in enumerate(files, 1):
+        try:
+            workbook_cache.read_sheets(path, SHEETS)
+            log(f"[{i}/{len(files)}] {path.name}")
+        except Exception as e:
+            log(f"[{i}/{len(files)}] {path.name}: {e}")
+    return workbook_cache.stats
@@ -1,102 +1,401 @@
-import re
 import json
+import heapq
+import os
+import queue
+import shutil
+import threading
 import time
+from dataclasses import dataclass
 from pathlib import Path
-from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import pandas as pd
 from selenium import webdriver # type: ignore
 from selenium.webdriver.chrome.options import Options # type: ignore
 from selenium.webdriver.common.by import By # type: ignore
 from selenium.webdriver.support.ui import WebDriverWait # type: ignore
 from selenium.webdriver.support import expected_conditions as EC # type: ignore
-from modules.logger import logger 
+from modules.data_loader import SHEETS
+from modules.logger import logger
+from modules.reporting_calendar import ReportingCalendar, format_period
+from modules.workbook_manifest import WorkbookManifest
+from modules.xlsx_probe import workbook_problem
 
 
-from config import COMPANIES_DIR, SON_BILANCOLAR_JSON, DOWNLOADS_DIR
+from config import COMPANIES_DIR, SON_BILANCOLAR_JSON, DOWNLOADS_DIR, CHROME_PROFILE_DIR
 
-TARGET_PERIOD = "2025/3"
-PERIOD_RE = re.compile(r"^\d{4}/\d{1,2}$")     # 2025/3, 2024/12 vb.
+FINTABLES_URL = "https://fintables.com/sirketler/{ticker}/finansal-tablolar/bilanco"
+EXPORT_XPATH  = "//div[contains(text(), \"Excel'e Aktar\")]"
+FILE_NAME     = "{ticker} (TRY).xlsx"
 
-def is_bilanco_outdated(excel_path: Path, target: str = TARGET_PERIOD) -> bool:
+# ────────────────────────────────────────────────
+# Tarayıcı
+# ────────────────────────────────────────────────
+def configure_driver(download_dir: Path = DOWNLOADS_DIR,
+                     profile_dir: Optional[Path] = CHROME_PROFILE_DIR,
+                     headless: bool = False):
     """
-    Dosya yoksa - veya - içindeki son dönem TARGET_PERIOD değilse True döner.
-    """
-    if not excel_path.exists():
-        return True
-
-    try:
-        # Sadece başlık satırını oku – satırlara gerek yok
-        cols = pd.read_excel(excel_path, sheet_name="Bilanço", nrows=0).columns
-        # “Kalem”, “Unnamed: …”, boş hücreleri ve hedef regex’e uymayanları at
-        period_cols = [
-            str(c).strip()
-            for c in cols
-            if PERIOD_RE.match(str(c).strip())
-        ]
-        if not period_cols:
-            # Hiç dönem sütunu bulunamadıysa dosya bozuk say
-            return True
+    Chrome sürücüsü: indirmeler `download_dir`'e onaysız iner.
 
-        latest_period = period_cols[0]   # En soldaki = en yeni
-        return latest_period != target
-    except Exception as e:
-        logger.exception(f"⚠️ {excel_path.name} okunamadı: {e}")
-        return True
-
-def configure_driver():
+    Aynı profil klasörünü iki Chrome aynı anda açamaz; paralel işçiler
+    profilin kendi kopyalarıyla çağırır (`DownloadPool`).
+    """
     options = Options()
-    options.add_argument(r"user-data-dir=C:\selenium_data")
+    if profile_dir is not None:
+        options.add_argument(f"user-data-dir={profile_dir}")
+    if headless:
+        options.add_argument("--headless=new")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--disable-gpu")
-    options.add_argument("--remote-debugging-port=9222")
+    options.add_argument("--remote-debugging-port=0")    # her örneğe boş bir port
     options.add_experimental_option("prefs", {
-        "download.default_directory": str(DOWNLOADS_DIR),
+        "download.default_directory": str(download_dir),
         "download.prompt_for_download": False,
         "safebrowsing.enabled": True
     })
     return webdriver.Chrome(options=options)
 
-def download_excel_for(ticker: str, driver, log, max_retry: int = 1):
-    url = f"https://fintables.com/sirketler/{ticker}/finansal-tablolar/bilanco"
 
-    for attempt in range(max_retry + 1):
-        driver.get(url) if attempt == 0 else driver.refresh()
+class DownloadError(RuntimeError):
+    pass
+
+
+def wait_for_download(download_dir: Path, file_name: str,
+                      timeout: float = 60, poll: float = 0.05, max_poll: float = 0.5,
+                      required_sheets: Iterable[str] = SHEETS) -> Path:
+    """
+    `download_dir/file_name` hazır olur olmaz yolunu döndür.
+
+    Chrome yarım dosyayı `*.crdownload` adıyla yazar ve ancak bitince hedef
+    ada çevirir; bu yüzden yalnızca hedef ad izlenir.  Görünen dosya zip
+    bütünlüğü ve `required_sheets` açısından doğrulanır; boyutu artık
+    değişmediği halde geçersizse (kesik / hatalı dosya) beklemeden
+    `DownloadError` verilir.  Sorgu aralığı `poll`'dan `max_poll`'a büyür:
+    küçük dosyalar hemen, büyükler CPU harcamadan beklenir.
+    """
+    target   = Path(download_dir) / file_name
+    deadline = time.monotonic() + timeout
+    delay, last_size, problem = poll, None, None
+    while True:
         try:
-            WebDriverWait(driver, 8).until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, "//div[contains(text(), \"Excel'e Aktar\")]")
-                )
-            ).click()
-
-            time.sleep(4)  # indirme tamamlanma payı
-            src = DOWNLOADS_DIR / f"{ticker} (TRY).xlsx"
-            if src.exists():
-                dst_dir = COMPANIES_DIR / ticker
-                dst_dir.mkdir(parents=True, exist_ok=True)
-                src.replace(dst_dir / src.name)
-                log(f"✅ {ticker} güncellendi.")
-                return
+            size = target.stat().st_size
+        except FileNotFoundError:
+            size = None
+        if size is not None:
+            problem = workbook_problem(target, required_sheets)
+            if problem is None:
+                return target
+            if size == last_size:
+                raise DownloadError(f"İnen dosya geçersiz – {problem}")
+            last_size = size
+        if time.monotonic() >= deadline:
+            raise DownloadError(f"Dosya {timeout:g} sn içinde inmedi"
+                                + (f" ({problem})" if problem else ""))
+        time.sleep(delay)
+        delay = min(delay * 1.5, max_poll)
+
+
+def fetch_workbook(ticker: str, driver, download_dir: Path, dest_dir: Path,
+                   url_template: str = FINTABLES_URL,
+                   export_xpath: str = EXPORT_XPATH,
+                   click_timeout: float = 8,
+                   download_timeout: float = 60) -> Path:
+    """
+    Tek deneme: sayfayı aç, "Excel'e Aktar"a tıkla, inen dosyayı
+    `dest_dir`'e taşı ve yolunu döndür.  Başarısızlıkta `DownloadError`.
+    """
+    name = FILE_NAME.format(ticker=ticker)
+    stale = Path(download_dir) / name
+    stale.unlink(missing_ok=True)           # yoksa Chrome "… (1).xlsx" diye kaydeder
+
+    driver.get(url_template.format(ticker=ticker))
+    try:
+        WebDriverWait(driver, click_timeout).until(
+            EC.element_to_be_clickable((By.XPATH, export_xpath))
+        ).click()
+    except Exception as e:
+        raise DownloadError(f"Buton bulunamadı – {e}") from e
+
+    src = wait_for_download(download_dir, name, timeout=download_timeout)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    dst = dest_dir / name
+    shutil.move(str(src), str(dst))
+    return dst
+
+
+# ────────────────────────────────────────────────
+# Paralel indirme havuzu
+# ────────────────────────────────────────────────
+def _tree_mtime(path: Path) -> int:
+    """En yeni değişiklik zamanı (ns): `path` ve altındaki tüm dosya / klasörler."""
+    newest = path.stat().st_mtime_ns
+    for dirpath, dirnames, filenames in os.walk(path):
+        for name in dirnames + filenames:
+            try:
+                newest = max(newest, os.stat(os.path.join(dirpath, name)).st_mtime_ns)
+            except OSError:
+                pass
+    return newest
+
+
+@dataclass
+class DownloadConfig:
+    """
+    `DownloadPool` ayarları.  `url_template` / `export_xpath` yerel bir
+    deneme sayfasına çevrilerek havuz Fintables olmadan da çalıştırılabilir.
+    """
+    workers:          int = 3
+    headless:         bool = True
+    url_template:     str = FINTABLES_URL
+    export_xpath:     str = EXPORT_XPATH
+    profile_dir:      Optional[Path] = CHROME_PROFILE_DIR   # her işçiye kopyalanır (değişince)
+    work_dir:         Path = DOWNLOADS_DIR                  # worker-<i>/{profile,downloads}
+    dest_dir:         Path = COMPANIES_DIR
+    max_retry:        int = 2
+    backoff:          float = 2.0          # n. tekrar → backoff · 2^(n-1) sn sonra
+    click_timeout:    float = 8
+    download_timeout: float = 60       # tek dosyanın inmesi için üst sınır
+
+
+@dataclass
+class DownloadResult:
+    ticker:   str
+    ok:       bool = False
+    attempts: int = 0
+    path:     Optional[Path] = None
+    error:    Optional[str] = None
+    seconds:  float = 0.0
+
+
+class _RetryQueue:
+    """
+    Hisse kuyruğu; başarısız hisse `retry` ile gecikmeli olarak geri konur.
+    `get` sıradaki hazır işi verir, iş kalmadığında (ve işlenen yoksa) None.
+    """
+
+    def __init__(self, tickers: Iterable[str]):
+        self._heap: List[Tuple[float, int, str, int]] = [
+            (0.0, i, t, 1) for i, t in enumerate(tickers)
+        ]
+        self._seq     = len(self._heap)
+        self._pending = len(self._heap)       # kuyrukta + işlenmekte
+        self._closed  = False
+        self._cond    = threading.Condition()
+
+    def get(self) -> Optional[Tuple[str, int]]:
+        with self._cond:
+            while not self._closed and self._pending:
+                if self._heap:
+                    wait = self._heap[0][0] - time.monotonic()
+                    if wait <= 0:
+                        _, _, ticker, attempt = heapq.heappop(self._heap)
+                        return ticker, attempt
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+            return None
+
+    def retry(self, ticker: str, attempt: int, delay: float):
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, self._seq, ticker, attempt))
+            self._seq += 1
+            self._cond.notify()
+
+    def done(self):
+        with self._cond:
+            self._pending -= 1
+            self._cond.notify_all()
+
+    def close(self) -> List[str]:
+        """Kuyruğu kapat; hiç işlenmemiş / tekrar bekleyen hisseleri döndür."""
+        with self._cond:
+            self._closed = True
+            left = [t for *_, t, _ in self._heap]
+            self._heap.clear()
+            self._cond.notify_all()
+            return left
+
+
+class DownloadPool:
+    """
+    Birden çok tarayıcı işçisiyle paralel Excel indirme.
+
+        pool = DownloadPool(DownloadConfig(workers=4))
+        results = pool.run(tickers, log=print)
+
+    Her işçi kendi Chrome profil kopyası ve indirme klasörüyle çalışır (aynı
+    profil / klasör paylaşılamaz), ortak kuyruktan hisse alır ve başarısız
+    hisseyi artan bekleme ile kuyruğa geri koyar.  `log` / `progress`
+    yalnızca `run`'ı çağıran iş parçacığından çağrılır (Streamlit güvenli).
+
+    `driver_factory(download_dir, profile_dir, headless)` varsayılan olarak
+    `configure_driver`'dır.  Bir `manifest` verilirse inen her dosya oraya
+    işlenir ve `run` sonunda kaydedilir.
+    """
+
+    def __init__(self, config: Optional[DownloadConfig] = None,
+                 driver_factory: Callable = configure_driver,
+                 manifest: Optional[WorkbookManifest] = None):
+        self.config = config or DownloadConfig()
+        self.driver_factory = driver_factory
+        self.manifest = manifest
+
+    # -------- işçi ---------------------------------------------------------
+    def _prepare_dirs(self, worker: int) -> Tuple[Path, Optional[Path]]:
+        root = Path(self.config.work_dir) / f"worker-{worker}"
+        download_dir = root / "downloads"
+        download_dir.mkdir(parents=True, exist_ok=True)
+
+        profile = None
+        template = self.config.profile_dir
+        if template is not None and Path(template).exists():
+            profile = root / "profile"
+            stamp   = root / "profile.stamp"
+            newest  = _tree_mtime(Path(template))
+            try:
+                fresh = profile.is_dir() and int(stamp.read_text()) >= newest
+            except (OSError, ValueError):
+                fresh = False
+            if fresh:
+                # Çökmüş bir Chrome'dan kalan kilitler yeni örneği engellemesin
+                for lock in profile.glob("Singleton*"):
+                    lock.unlink(missing_ok=True)
             else:
-                log(f"⚠️ {ticker}: Dosya inmedi (deneme {attempt+1}).")
+                stamp.unlink(missing_ok=True)
+                shutil.rmtree(profile, ignore_errors=True)
+                # Çalışan bir Chrome'un kilit dosyaları kopyalanmaz
+                shutil.copytree(template, profile, ignore=shutil.ignore_patterns("Singleton*", "*.lock"))
+                stamp.write_text(str(newest))
+        return download_dir, profile
+
+    def _worker(self, worker: int, jobs: _RetryQueue, events: queue.Queue):
+        cfg = self.config
+        try:
+            download_dir, profile = self._prepare_dirs(worker)
+            driver = self.driver_factory(download_dir, profile, cfg.headless)
         except Exception as e:
-            log(f"❌ {ticker}: Buton bulunamadı (deneme {attempt+1}) – {e}")
+            events.put(("dead", worker, f"İşçi {worker} başlatılamadı – {e}"))
+            events.put(("exit", worker))
+            return
 
-    log(f"🚫 {ticker}: Tüm denemeler başarısız.")
+        try:
+            while (job := jobs.get()) is not None:
+                ticker, attempt = job
+                t0 = time.perf_counter()
+                try:
+                    path = fetch_workbook(
+                        ticker, driver, download_dir, Path(cfg.dest_dir),
+                        url_template=cfg.url_template, export_xpath=cfg.export_xpath,
+                        click_timeout=cfg.click_timeout, download_timeout=cfg.download_timeout,
+                    )
+                    events.put(("ok", ticker, DownloadResult(
+                        ticker, True, attempt, path, None, time.perf_counter() - t0)))
+                    jobs.done()
+                except Exception as e:
+                    failed = DownloadResult(ticker, False, attempt, None, str(e),
+                                            time.perf_counter() - t0)
+                    if attempt <= cfg.max_retry:
+                        delay = cfg.backoff * 2 ** (attempt - 1)
+                        jobs.retry(ticker, attempt + 1, delay)
+                        events.put(("retry", ticker, failed, delay))
+                    else:
+                        events.put(("failed", ticker, failed))
+                        jobs.done()
+        finally:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            events.put(("exit", worker))
+
+    # -------- koordinasyon --------------------------------------------------
+    def run(self, tickers: Iterable[str],
+            log: Callable[[str], None] = lambda msg: None,
+            progress: Optional[Callable[[int, int, str], None]] = None) -> Dict[str, DownloadResult]:
+        """
+        `tickers`'ı indir; hisse → `DownloadResult` (girdi sırasıyla).
+        `progress(done, total, ticker)` her hisse sonuçlandığında çağrılır.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        results = {t: DownloadResult(t) for t in tickers}
+        if not tickers:
+            return results
 
+        jobs    = _RetryQueue(tickers)
+        events: queue.Queue = queue.Queue()
+        n_workers = max(1, min(self.config.workers, len(tickers)))
+        threads = [
+            threading.Thread(target=self._worker, args=(i, jobs, events),
+                             name=f"downloader-{i}", daemon=True)
+            for i in range(n_workers)
+        ]
+        for th in threads:
+            th.start()
 
-def update_companies_if_needed(log=lambda msg: None):
+        alive, done = n_workers, 0
+        while alive:
+            kind, key, *rest = events.get()
+            if kind == "exit":
+                alive -= 1
+            elif kind == "dead":
+                log(f"❌ {rest[0]}")
+                logger.warning(rest[0])
+            elif kind == "retry":
+                res, delay = rest
+                log(f"⚠️ {key}: {res.error} (deneme {res.attempts}) – {delay:g} sn sonra tekrar.")
+            else:
+                res = results[key] = rest[0]
+                done += 1
+                if res.ok:
+                    if self.manifest is not None:
+                        self.manifest.record(key, res.path, downloaded=True)
+                    log(f"✅ {key} güncellendi ({res.seconds:.1f} sn).")
+                else:
+                    log(f"🚫 {key}: Tüm denemeler başarısız – {res.error}")
+                    logger.warning(f"{key}: indirilemedi – {res.error}")
+                if progress:
+                    progress(done, len(tickers), key)
+
+            if alive == 0:
+                # Tüm işçiler düştüyse kalan hisseler başarısız sayılır
+                for t in jobs.close():
+                    results[t].error = results[t].error or "Çalışan işçi kalmadı"
+        for th in threads:
+            th.join()
+        if self.manifest is not None:
+            self.manifest.save()
+        return results
+
+
+def update_companies_if_needed(log=lambda msg: None,
+                               config: Optional[DownloadConfig] = None,
+                               progress: Optional[Callable[[int, int, str], None]] = None,
+                               calendar: Optional[ReportingCalendar] = None,
+                               ) -> Dict[str, DownloadResult]:
+    """
+    Yeni bir finansal raporu yayımlanmış olması beklenen şirketleri indir.
+    Hangi dönemin beklendiğine `calendar` (KAP son tarihleri + manifest'teki
+    akranlar) karar verir.
+    """
     with open(SON_BILANCOLAR_JSON, "r", encoding="utf-8") as f:
         data = json.load(f)
     df = pd.DataFrame(data).rename(columns={"code": "Şirket"})
     tickers = df["Şirket"].unique()
 
-    driver = configure_driver()
+    config   = config or DownloadConfig()
+    calendar = calendar or ReportingCalendar()
+    # Değişmemiş dosyalar için son dönem manifest'ten gelir (yalnızca stat)
+    manifest = WorkbookManifest(base_dir=config.dest_dir)
+    queue_   = calendar.plan(tickers, manifest)
+    manifest.save()
+
+    due = format_period(calendar.due_period())
+    log(f"📅 Son bildirim tarihi geçmiş dönem: {due}")
     for ticker in tickers:
-        path = COMPANIES_DIR / f"{ticker} (TRY).xlsx"
-        if is_bilanco_outdated(path):
-            log(f"🔄 {ticker} indiriliyor (veri eski veya eksik)…")
-            download_excel_for(ticker, driver, log)
+        if ticker in queue_:
+            log(f"🔄 {ticker}: {queue_[ticker]}")
         else:
             log(f"⏩ {ticker} verisi güncel.")
-    driver.quit()
+
+    log(f"🔄 {len(queue_)} şirket indirilecek ({config.workers} işçi)…")
+    return DownloadPool(config, manifest=manifest).run(queue_, log=log, progress=progress)
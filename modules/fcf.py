@@ -0,0 +1,134 @@
+"""
+Free-cash-flow series of one company, computed once and shared.
+
+The FCF tab shows the same numbers three times (detail table, yield chart,
+multi-plot) and the valuation tab needs the TTM FCF again.  `fcf_series`
+loads the income / cash-flow sheets once, builds the chronological FCF
+frame with its rolling means and yields, and memoises the result on
+(ticker, workbook fingerprint, market cap) – a changed workbook or market
+cap gives a fresh computation, everything else is a dict lookup.
+"""
+
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config import COMPANIES_DIR
+from modules.data_loader import company_path, load_financial_data
+from modules.utils import period_order
+from modules.workbook_cache import workbook_fingerprint
+
+OCF_KALEM  = "İşletme Faaliyetlerinden Nakit Akışları"
+CAPEX_KALEMLERI = (
+    "Maddi ve Maddi Olmayan Duran Varlık Alımları",
+    "Yatırım Faaliyetlerinden Kaynaklanan Nakit Akışları",     # yedek
+)
+MA_WINDOW = 3           # hareketli ortalama (çeyrek)
+
+
+class FcfDataError(ValueError):
+    """FCF hesaplanamıyor (eksik kalem); mesaj kullanıcıya gösterilebilir."""
+
+
+@dataclass(frozen=True)
+class FcfSeries:
+    """
+    * `frame`   → dönem (kronolojik) × Satışlar, Net Kâr, Faaliyet Nakit Akışı,
+                  CAPEX, FCF, FCF Verimi (%)
+    * `rolling` → `frame`'in `MA_WINDOW` çeyreklik hareketli ortalaması
+    * `dates`   → dönemlerin zaman damgaları (grafik ekseni)
+
+    Paylaşılan nesnedir: değiştirmeden okuyun (gerekirse `.copy()`).
+    """
+    company:    str
+    market_cap: float            # geçersizse NaN → verim sütunu NaN
+    frame:      pd.DataFrame
+    rolling:    pd.DataFrame
+    dates:      pd.DatetimeIndex
+
+    @property
+    def has_market_cap(self) -> bool:
+        return not math.isnan(self.market_cap) and self.market_cap > 0
+
+    @property
+    def fcf_yield(self) -> pd.Series:
+        """FCF verimi (%), boş dönemler atılmış."""
+        y = self.frame["FCF Verimi (%)"].dropna()
+        return y.loc[~y.index.duplicated()]
+
+    @property
+    def ttm_fcf(self) -> float:
+        """Son 4 çeyreğin FCF toplamı (4'ten az dönem varsa son dönem)."""
+        fcf = self.frame["FCF"]
+        return float(fcf.iloc[-4:].sum() if len(fcf) >= 4 else fcf.iloc[-1])
+
+
+def market_cap_of(row) -> float:
+    """Radar satırındaki piyasa değeri; yoksa / geçersizse NaN."""
+    try:
+        value = pd.to_numeric(row["Piyasa Değeri"], errors="coerce").squeeze()
+        value = float(value)
+    except (KeyError, TypeError, ValueError):
+        return math.nan
+    return value if value > 0 else math.nan
+
+
+def compute_fcf_series(company: str, income, cashflow, market_cap: float) -> FcfSeries:
+    """Build the FCF frame from already loaded income / cash-flow statements."""
+    if OCF_KALEM not in cashflow:
+        raise FcfDataError("İşletme nakit akışı verisi bulunamadı.")
+    capex_kalem = next((k for k in CAPEX_KALEMLERI if k in cashflow), None)
+    if capex_kalem is None:
+        raise FcfDataError("CAPEX verisi bulunamadı.")
+
+    def optional(statement, kalem):
+        if kalem in statement:
+            return statement.series(kalem)
+        return pd.Series(np.nan, index=pd.Index(statement.periods), name=kalem)
+
+    ocf   = cashflow.series(OCF_KALEM)
+    capex = cashflow.series(capex_kalem)
+    fcf   = ocf - capex
+    fcf_yield = (fcf / market_cap * 100).dropna() if market_cap > 0 else fcf * np.nan
+
+    df = pd.DataFrame({
+        "Satışlar"             : optional(income, "Satış Gelirleri"),
+        "Net Kâr"              : optional(cashflow, "Dönem Karı (Zararı)"),
+        "Faaliyet Nakit Akışı" : ocf,
+        "CAPEX"                : capex,
+        "FCF"                  : fcf,
+        "FCF Verimi (%)"       : fcf_yield,
+    })
+    df = df.loc[sorted(df.index, key=period_order)]
+
+    return FcfSeries(
+        company=company,
+        market_cap=market_cap,
+        frame=df,
+        rolling=df.rolling(MA_WINDOW).mean(),
+        dates=pd.to_datetime(df.index, format="%Y/%m", errors="coerce"),
+    )
+
+
+@lru_cache(maxsize=256)
+def _fcf_series_cached(company: str, path: Path, fingerprint, market_cap: float) -> FcfSeries:
+    fin = load_financial_data(company, base_dir=path.parent).load(
+        "Gelir Tablosu (Çeyreklik)", "Nakit Akış (Çeyreklik)")
+    return compute_fcf_series(company, fin.income, fin.cashflow,
+                              market_cap if market_cap > 0 else math.nan)
+
+
+def fcf_series(company: str, row, base_dir: Path = Path(COMPANIES_DIR)) -> FcfSeries:
+    """
+    Memoised `FcfSeries` of `company` with the market cap of radar `row`.
+    Raises `FileNotFoundError` / `FcfDataError` like the underlying load.
+    """
+    path = company_path(company, base_dir)
+    market_cap = market_cap_of(row)
+    # NaN != NaN → önbellek anahtarında tek bir "geçersiz" değer kullan
+    key_cap = -1.0 if math.isnan(market_cap) else market_cap
+    return _fcf_series_cached(company, path, workbook_fingerprint(path), key_cap)
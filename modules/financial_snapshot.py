@@ -1,8 +1,9 @@
 # financial_snapshot.py
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Optional
+import numpy as np
 import pandas as pd
-from modules.utils import get_value   # mevcut yardımcı işleviniz
+from modules.financial_statement import as_statement
 # ------------------------------------------------------------
 
 @dataclass
@@ -31,50 +32,104 @@ class FinancialSnapshot:
     net_profit:                Optional[float] = None   # Dönem Karı (Zararı)
 
 
-def build_snapshot(balance_df, income_df, cashflow_df: Optional[pd.DataFrame] = None, *, period: str) -> FinancialSnapshot:
+# Alan → (tablo, Kalem / alias listesi).  total_liabilities türetilir.
+SNAPSHOT_SOURCES = {
+    # Balance
+    "short_term_liabilities": ("balance",  "Toplam Kısa Vadeli Yükümlülükler"),
+    "long_term_liabilities":  ("balance",  "Toplam Uzun Vadeli Yükümlülükler"),
+    "total_assets":           ("balance",  "Toplam Varlıklar"),
+    "current_assets":         ("balance",  "Toplam Dönen Varlıklar"),
+    "equity":                 ("balance",  "Ana Ortaklığa Ait Özkaynaklar"),
+    "pp_e":                   ("balance",  "Maddi Duran Varlıklar"),
+    "trade_receivables":      ("balance",  "Ticari Alacaklar"),
+    # Income
+    "sales":                  ("income",   "Satış Gelirleri"),
+    "cogs":                   ("income",   "Satışların Maliyeti (-)"),
+    "gross_profit":           ("income",   ["Brüt Kar (Zarar)",
+                                            "Ticari Faaliyetlerden Brüt Kar (Zarar)"]),
+    "g_and_a_exp":            ("income",   "Genel Yönetim Giderleri (-)"),
+    "marketing_exp":          ("income",   "Pazarlama, Satış ve Dağıtım Giderleri (-)"),
+    "revenue":                ("income",   "Toplam Hasılat"),
+    "net_profit":             ("income",   "Dönem Karı (Zararı)"),
+    # Cash‑flow
+    "operating_cash_flow":    ("cashflow", "İşletme Faaliyetlerinden Nakit Akışları"),
+    "depreciation":           ("cashflow", "Amortisman ve İtfa Gideri İle İlgili Düzeltmeler"),
+}
+
+
+@dataclass
+class SnapshotPanel:
     """
-    Tüm kalemleri tek seferde okuyup FinancialSnapshot döndürür.
-    `period` => '2024/12' formatında dönem etiketi.
+    Column-oriented FinancialSnapshot over several periods.
+
+    Every snapshot field is one float array indexed like `periods`
+    (None when its statement was not given, e.g. cash-flow).
+    """
+    periods: List[str]
+    arrays:  Dict[str, Optional[np.ndarray]]
+    found:   Dict[str, Optional[np.ndarray]] = field(repr=False, default_factory=dict)
+
+    def __getattr__(self, name):
+        arrays = self.__dict__.get("arrays", {})
+        if name in arrays:
+            return arrays[name]
+        raise AttributeError(name)
+
+    def index(self, period: str) -> int:
+        return self.periods.index(period)
+
+    def at(self, period: str) -> FinancialSnapshot:
+        """Single-period snapshot, identical to `build_snapshot(..., period=period)`."""
+        j = self.index(period)
+        values = {}
+        for name, arr in self.arrays.items():
+            if arr is None:
+                values[name] = None
+            else:
+                # get_value bulamadığında düz 0 (int) döner – aynısını koru
+                values[name] = arr[j] if self.found[name][j] else 0
+        return FinancialSnapshot(**values)
+
+
+def build_snapshots(balance_df, income_df, cashflow_df: Optional[pd.DataFrame] = None, *,
+                    periods: Optional[List[str]] = None) -> SnapshotPanel:
+    """
+    Tüm snapshot alanlarını, verilen tüm dönemler için tek seferde okur.
+    `periods` verilmezse bilançodaki bütün dönemler kullanılır.
     """
+    statements = {
+        "balance":  as_statement(balance_df),
+        "income":   as_statement(income_df),
+        "cashflow": as_statement(cashflow_df),
+    }
+    if periods is None:
+        periods = [p for p in statements["balance"].periods if "/" in p]
+    periods = list(periods)
 
-    # -------- Balance ----------
-    short = get_value(balance_df, "Toplam Kısa Vadeli Yükümlülükler", period)
-    long  = get_value(balance_df, "Toplam Uzun Vadeli Yükümlülükler",  period)
-
-    snapshot = FinancialSnapshot(
-        # Balance
-        short_term_liabilities = short,
-        long_term_liabilities  = long,
-        total_liabilities      = (short or 0) + (long or 0) if None not in (short, long) else None,
-        total_assets           = get_value(balance_df, "Toplam Varlıklar",         period),
-        current_assets         = get_value(balance_df, "Toplam Dönen Varlıklar",   period),
-        equity                 = get_value(balance_df, "Ana Ortaklığa Ait Özkaynaklar", period),
-        pp_e                   = get_value(balance_df, "Maddi Duran Varlıklar",    period),
-        trade_receivables      = get_value(balance_df, "Ticari Alacaklar",         period),
-
-        # Income
-        sales                  = get_value(income_df, "Satış Gelirleri",           period),
-        cogs                   = get_value(income_df, "Satışların Maliyeti (-)",   period),
-        gross_profit           = get_value(income_df,
-                                           ["Brüt Kar (Zarar)",
-                                            "Ticari Faaliyetlerden Brüt Kar (Zarar)"], period),
-        g_and_a_exp            = get_value(income_df, "Genel Yönetim Giderleri (-)", period),
-        marketing_exp          = get_value(income_df, "Pazarlama, Satış ve Dağıtım Giderleri (-)", period),
-        revenue                = get_value(income_df, "Toplam Hasılat",            period),
-        net_profit   = (
-            get_value(income_df, "Dönem Karı (Zararı)", period)
-            if income_df is not None else None
-        ),
-        # Cash‑flow
-        operating_cash_flow = (
-            get_value(cashflow_df, "İşletme Faaliyetlerinden Nakit Akışları", period)
-            if cashflow_df is not None else None
-        ),
-        depreciation = (
-            get_value(cashflow_df, "Amortisman ve İtfa Gideri İle İlgili Düzeltmeler", period)
-            if cashflow_df is not None else None
-        ),
-        
+    arrays, found = {}, {}
+    for name, (source, kalem) in SNAPSHOT_SOURCES.items():
+        stmt = statements[source]
+        if stmt is None:
+            arrays[name], found[name] = None, None
+        else:
+            arrays[name], found[name] = stmt.lookup(kalem, periods)
+
+    # (short or 0) + (long or 0): iki kalem de 0 ise sonuç düz 0 (int)
+    short, long = arrays["short_term_liabilities"], arrays["long_term_liabilities"]
+    arrays["total_liabilities"] = short + long
+    found["total_liabilities"]  = (short != 0) | (long != 0)
+
+    order = [f.name for f in fields(FinancialSnapshot)]
+    return SnapshotPanel(
+        periods=periods,
+        arrays={n: arrays[n] for n in order},
+        found={n: found[n] for n in order},
     )
 
-    return snapshot
+
+def build_snapshot(balance_df, income_df, cashflow_df: Optional[pd.DataFrame] = None, *, period: str) -> FinancialSnapshot:
+    """
+    Tüm kalemleri tek seferde okuyup FinancialSnapshot döndürür.
+    `period` => '2024/12' formatında dönem etiketi.
+    """
+    return build_snapshots(balance_df, income_df, cashflow_df, periods=[period]).at(period)
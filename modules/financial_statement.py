@@ -0,0 +1,160 @@
+# financial_statement.py
+"""
+Indexed view of one financial-statement sheet (Bilanço / Gelir / Nakit Akış).
+
+`get_value` scans the whole `Kalem` column for every lookup; a
+`FinancialStatement` is built once per sheet and answers the same
+questions with two dict lookups and one array read.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+from modules.periods import PeriodIndex
+
+# Özel durum: "Toplam Hasılat" = Yurt İçi + Yurt Dışı satışlar
+TOPLAM_HASILAT = "Toplam Hasılat"
+HASILAT_PARCALARI = ("Yurt İçi Satışlar", "Yurt Dışı Satışlar")
+
+
+class FinancialStatement:
+    """
+    Kalem × dönem değer matrisi.
+
+    * `values`   → float matrix, shape (len(kalem), len(periods))
+    * `_rows`    → Kalem  → satır   (aynı isimli kalemlerde ilk satır, `get_value` gibi)
+    * `_cols`    → dönem  → sütun
+    """
+
+    def __init__(self,
+                 kalem: Iterable[str],
+                 periods: Iterable[str],
+                 values: np.ndarray,
+                 frame: Optional[pd.DataFrame] = None):
+        self.kalem:   List[str] = list(kalem)
+        self.periods: List[str] = list(periods)
+        self.values = values
+        self._frame = frame
+
+        self._rows: Dict[str, int] = {}
+        for i, k in enumerate(self.kalem):
+            self._rows.setdefault(k, i)
+        self._cols: Dict[str, int] = {p: j for j, p in enumerate(self.periods)}
+        self._period_index: Optional[PeriodIndex] = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "FinancialStatement":
+        kalem   = [str(k).strip() for k in df["Kalem"]]
+        periods = [c for c in df.columns if c != "Kalem"]
+        values  = df[periods].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+        return cls(kalem, periods, values, frame=df)
+
+    # -------- DataFrame uyumluluğu --------------------------------------
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Sheet as a DataFrame (`Kalem` + period columns), built on demand."""
+        if self._frame is None:
+            df = pd.DataFrame(self.values, columns=self.periods)
+            df.insert(0, "Kalem", self.kalem)
+            self._frame = df
+        return self._frame
+
+    @property
+    def columns(self) -> pd.Index:
+        return pd.Index(["Kalem", *self.periods])
+
+    @property
+    def period_index(self) -> PeriodIndex:
+        """Parsed, ordered period columns (built once per sheet)."""
+        if self._period_index is None:
+            self._period_index = PeriodIndex(self.periods)
+        return self._period_index
+
+    @property
+    def empty(self) -> bool:
+        return not self.kalem or not self.periods
+
+    def __len__(self) -> int:
+        return len(self.kalem)
+
+    def __contains__(self, kalem: str) -> bool:
+        return kalem in self._rows
+
+    def __repr__(self) -> str:
+        return f"FinancialStatement({len(self.kalem)} kalem × {len(self.periods)} dönem)"
+
+    # -------- lookups ---------------------------------------------------
+    def value(self, kalem_adlari: Union[str, List[str]], period: str):
+        """
+        `get_value` ile aynı sözleşme: ilk bulunan alias'ın değeri,
+        'Toplam Hasılat' için (Yurt İçi + Yurt Dışı) > 0 ise toplam,
+        hiçbiri yoksa 0.  Dönem yoksa KeyError.
+        """
+        if isinstance(kalem_adlari, str):
+            kalem_adlari = [kalem_adlari]
+        col = self._cols[period]
+
+        for kalem in kalem_adlari:
+            if kalem == TOPLAM_HASILAT:
+                toplam = 0
+                for parca in HASILAT_PARCALARI:
+                    row = self._rows.get(parca)
+                    if row is not None:
+                        toplam += self.values[row, col]
+                if toplam > 0:
+                    return toplam
+
+            row = self._rows.get(kalem)
+            if row is not None:
+                return self.values[row, col]
+
+        return 0
+
+    def lookup(self, kalem_adlari: Union[str, List[str]],
+               periods: Optional[List[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorised `value` over several periods at once.
+
+        Returns `(values, found)`; `found[j]` is False where `value` would
+        have fallen through to its literal 0.
+        """
+        if isinstance(kalem_adlari, str):
+            kalem_adlari = [kalem_adlari]
+        cols = (np.arange(len(self.periods)) if periods is None
+                else np.fromiter((self._cols[p] for p in periods), dtype=int, count=len(periods)))
+
+        out   = np.zeros(len(cols))
+        found = np.zeros(len(cols), dtype=bool)
+        for kalem in kalem_adlari:
+            if kalem == TOPLAM_HASILAT:
+                rows = [self._rows[p] for p in HASILAT_PARCALARI if p in self._rows]
+                if rows:
+                    toplam = self.values[np.ix_(rows, cols)].sum(axis=0)
+                    take = ~found & (toplam > 0)
+                    out[take] = toplam[take]
+                    found |= take
+
+            row = self._rows.get(kalem)
+            if row is not None:
+                rest = ~found
+                out[rest] = self.values[row, cols][rest]
+                found[:] = True
+                break
+
+        return out, found
+
+    def row(self, kalem: str) -> np.ndarray:
+        """All periods of one line item (view into `values`)."""
+        return self.values[self._rows[kalem]]
+
+    def series(self, kalem: str) -> pd.Series:
+        """`df.set_index("Kalem").loc[kalem]` karşılığı."""
+        return pd.Series(self.row(kalem), index=pd.Index(self.periods), name=kalem)
+
+
+def as_statement(df) -> Optional[FinancialStatement]:
+    """Wrap a raw sheet DataFrame; statements and None pass through."""
+    if df is None or isinstance(df, FinancialStatement):
+        return df
+    return FinancialStatement.from_frame(df)
@@ -0,0 +1,474 @@
+"""
+Consolidated, columnar store of every company's statements.
+
+Each ticker lives in its own xlsx; a cross-sectional question ("Satış
+Gelirleri of every company in 2024/12") used to mean one workbook parse
+per ticker.  `build_panel` ingests all workbooks once into a long-format
+table – one row per (ticker, statement, Kalem, period) cell – saved as
+plain `.npy` columns in a build directory under `PANEL_DIR` and opened
+memory-mapped:
+
+    cell_kalem   int32    Kalem sözlük kodu (`kalem_names`)
+    cell_period  int32    `Period` kodu (202412), dönem olmayan sütunda -1
+    cell_value   float64  değer (boş hücre NaN)
+
+Ticker and statement are run-length encoded in a per-sheet directory
+(`sheet_*` arrays): every sheet's cells are stored contiguously in row-major
+order, so a sheet is a `(rows, cols)` slice of `cell_value` and
+`PanelStore.statement` returns the same `FinancialStatement` that
+`load_financial_data` builds, without touching the xlsx.
+
+    python -m modules panel build      # değişen çalışma kitaplarını yeniden al
+    store = PanelStore.open()
+    store.cross_section("Satış Gelirleri", "2024/12", "Gelir Tablosu (Çeyreklik)")
+
+Sharing: `shared_panel()` keeps one read-only mapping per process, and
+`load_financial_data` serves unchanged workbooks from it.  Statements are
+views into the mapped file, so every Streamlit session and every scan
+worker reads the same page-cache pages instead of holding its own copy.
+
+Versions: every build goes to a new `PANEL_DIR/v<zaman>` directory and the
+`CURRENT` pointer file is switched to it; mapped files are never renamed
+or overwritten (Windows refuses both).  Builds older than the previous one
+are deleted by a later build, once no process maps them any more.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import COMPANIES_DIR, PANEL_DIR
+from modules.data_loader import SHEETS, _read_statements, company_path
+from modules.financial_statement import FinancialStatement
+from modules.logger import logger
+from modules.periods import parse_periods, period_key
+from modules.workbook_cache import workbook_fingerprint
+
+PANEL_VERSION = 1
+_META = "meta.json"
+_POINTER = "CURRENT"            # PANEL_DIR içindeki güncel sürüm dizininin adı
+
+# Sayfa dizini: sayfa başına bir satır
+_SHEET_COLUMNS = ("sheet_ticker", "sheet_statement", "sheet_rows", "sheet_cols",
+                  "sheet_cell_start", "sheet_row_start", "sheet_col_start")
+# Hücre tablosu ve sayfa düzeni (Kalem sırası, sütun etiketleri)
+_CELL_COLUMNS = ("cell_kalem", "cell_period", "cell_value", "layout_kalem", "layout_col")
+
+
+class PanelStoreError(RuntimeError):
+    """Panel deposu yok, eski sürüm ya da bozuk."""
+
+
+def _ticker_of(path: Path) -> str:
+    return path.name[: -len(" (TRY).xlsx")]
+
+
+def _resolve(path: Path) -> Path:
+    """Panel directory behind `path`: the `CURRENT` version, or `path` itself."""
+    try:
+        name = (path / _POINTER).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return path
+    return path / name if name else path
+
+
+# ────────────────────────────────────────────────
+# Ingest
+# ────────────────────────────────────────────────
+@dataclass
+class _Builder:
+    """Accumulates sheets and dictionary-encodes names while ingesting."""
+    kalem_codes: Dict[str, int] = field(default_factory=dict)
+    label_codes: Dict[str, int] = field(default_factory=dict)
+    sheets:  Dict[str, List[int]] = field(default_factory=lambda: {c: [] for c in _SHEET_COLUMNS})
+    kalem:   List[np.ndarray] = field(default_factory=list)
+    labels:  List[np.ndarray] = field(default_factory=list)
+    periods: List[np.ndarray] = field(default_factory=list)
+    values:  List[np.ndarray] = field(default_factory=list)
+    n_cells: int = 0
+    n_rows:  int = 0
+    n_cols:  int = 0
+
+    @staticmethod
+    def _encode(names: Sequence[str], codes: Dict[str, int]) -> np.ndarray:
+        return np.fromiter((codes.setdefault(n, len(codes)) for n in names),
+                           dtype=np.int32, count=len(names))
+
+    def add(self, ticker_code: int, statement_code: int, st: FinancialStatement):
+        rows, cols = len(st.kalem), len(st.periods)
+        for name, v in zip(_SHEET_COLUMNS, (ticker_code, statement_code, rows, cols,
+                                            self.n_cells, self.n_rows, self.n_cols)):
+            self.sheets[name].append(v)
+
+        kalem  = self._encode(st.kalem, self.kalem_codes)
+        labels = self._encode([str(p) for p in st.periods], self.label_codes)
+        self.kalem.append(kalem)
+        self.labels.append(labels)
+        # Satır öncelikli düzen: hücre (i, j) → start + i * cols + j
+        self.periods.append(np.tile(parse_periods(st.periods).astype(np.int32), rows))
+        self.values.append(np.ascontiguousarray(st.values, dtype=np.float64).reshape(-1))
+        self.n_cells += rows * cols
+        self.n_rows  += rows
+        self.n_cols  += cols
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        def cat(parts, dtype):
+            return np.concatenate(parts).astype(dtype, copy=False) if parts else np.empty(0, dtype)
+
+        out = {name: np.asarray(v, dtype=np.int64) for name, v in self.sheets.items()}
+        out["layout_kalem"] = cat(self.kalem, np.int32)
+        out["layout_col"]   = cat(self.labels, np.int32)
+        out["cell_kalem"]   = np.repeat(out["layout_kalem"],
+                                        np.repeat(out["sheet_cols"], out["sheet_rows"]))
+        out["cell_period"]  = cat(self.periods, np.int32)
+        out["cell_value"]   = cat(self.values, np.float64)
+        return out
+
+
+def build_panel(base_dir: Path = Path(COMPANIES_DIR), out_dir: Path = PANEL_DIR,
+                tickers: Optional[Iterable[str]] = None, incremental: bool = True,
+                log: Callable[[str], None] = lambda msg: None) -> "PanelStore":
+    """
+    Ingest every `<TICKER> (TRY).xlsx` under `base_dir` (or just `tickers`)
+    into a new panel version under `out_dir`.  With `tickers`, the other
+    companies of the existing panel are carried over as they are (with
+    their old fingerprints, so `panel_statements` still spots changes).
+
+    With `incremental=True`, tickers whose workbook fingerprint matches the
+    existing panel are copied from it; only changed workbooks are read
+    (through the npz workbook cache).  The new version is written to its
+    own directory and published by replacing the `CURRENT` pointer, so
+    open readers keep their mapping of the previous files.
+    """
+    out_dir = Path(out_dir)
+    if tickers is None:
+        paths = sorted(Path(base_dir).glob("* (TRY).xlsx"))
+    else:
+        paths = [company_path(t, base_dir) for t in tickers]
+
+    old = None
+    if incremental or tickers is not None:
+        try:
+            old = PanelStore.open(out_dir)
+        except PanelStoreError:
+            old = None
+
+    builder = _Builder()
+    names: List[str] = []
+    fingerprints: Dict[str, list] = {}
+    reused = 0
+    for i, path in enumerate(paths, 1):
+        ticker = _ticker_of(path)
+        try:
+            fp = list(workbook_fingerprint(path))
+            if incremental and old is not None and old.fingerprints.get(ticker) == fp:
+                statements = old.financials(ticker)
+                reused += 1
+            else:
+                # Panelin kendisini değil npz önbelleğini / Excel'i oku
+                statements = tuple(_read_statements(path, SHEETS, use_cache=True,
+                                                    use_panel=False).values())
+        except Exception as e:
+            logger.warning(f"{path.name}: panele alınamadı → {e}")
+            log(f"[{i}/{len(paths)}] {path.name}: {e}")
+            continue
+
+        code = len(names)
+        names.append(ticker)
+        fingerprints[ticker] = fp
+        for s, st in enumerate(statements):
+            builder.add(code, s, st)
+        log(f"[{i}/{len(paths)}] {ticker}")
+
+    # Yalnızca `tickers` yenilendi; paneldeki diğer şirketler olduğu gibi kalır
+    if tickers is not None and old is not None:
+        for ticker in old.tickers:
+            if ticker in fingerprints:
+                continue
+            code = len(names)
+            names.append(ticker)
+            fingerprints[ticker] = old.fingerprints[ticker]
+            for s, st in enumerate(old.financials(ticker)):
+                builder.add(code, s, st)
+            reused += 1
+
+    meta = {
+        "version":      PANEL_VERSION,
+        "statements":   list(SHEETS),
+        "tickers":      names,
+        "kalem_names":  list(builder.kalem_codes),
+        "col_labels":   list(builder.label_codes),
+        "fingerprints": fingerprints,
+    }
+    _write(out_dir, meta, builder.arrays())
+    logger.info(f"Panel: {len(names)} şirket ({reused} değişmemiş), {builder.n_cells} hücre → {out_dir}")
+    return PanelStore.open(out_dir)
+
+
+def _write(out_dir: Path, meta: dict, arrays: Dict[str, np.ndarray]):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    previous = _resolve(out_dir)
+    version = out_dir / f"v{time.time_ns()}.{os.getpid()}"
+    version.mkdir()
+    for name, arr in arrays.items():
+        np.save(version / f"{name}.npy", arr)
+    (version / _META).write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+    # Yalnızca küçük işaretçi dosyası değiştirilir; eşlenmiş dosyalara dokunulmaz
+    tmp = out_dir / f"{_POINTER}.{os.getpid()}.tmp"
+    tmp.write_text(version.name, encoding="utf-8")
+    for attempt in range(5):
+        try:
+            os.replace(tmp, out_dir / _POINTER)
+            break
+        except PermissionError:             # Windows: okuyucu işaretçiyi o an açık tutuyor
+            if attempt == 4:
+                raise
+            time.sleep(0.1)
+    _prune(out_dir, keep={version.name, previous.name})
+
+
+def _prune(out_dir: Path, keep: Iterable[str]):
+    """
+    Delete panel versions other than `keep` (the new and the previous one,
+    which open sessions may still map).  Files still mapped somewhere cannot
+    be deleted on Windows; they are skipped and retried by the next build.
+    """
+    keep = set(keep)
+    for d in out_dir.glob("v*"):
+        if d.is_dir() and d.name not in keep:
+            shutil.rmtree(d, ignore_errors=True)
+    # Sürümsüz (tek dizinli) eski düzenin dosyaları
+    if out_dir.name not in keep:
+        for name in (*(f"{c}.npy" for c in (*_SHEET_COLUMNS, *_CELL_COLUMNS)), _META):
+            try:
+                (out_dir / name).unlink(missing_ok=True)
+            except OSError:
+                pass
+
+
+# ────────────────────────────────────────────────
+# Reader
+# ────────────────────────────────────────────────
+class PanelStore:
+    """
+    Read-only view of a built panel; columns are memory-mapped.
+
+    * `statement(ticker, sheet)` / `financials(ticker)` → `FinancialStatement`s
+      equal to `load_financial_data`'s
+    * `cross_section(kalem, period, statement)` → ticker → value
+    * `long_frame(...)` → long-format DataFrame (categorical ticker /
+      statement / Kalem)
+    """
+
+    def __init__(self, path: Path, meta: dict, arrays: Dict[str, np.ndarray]):
+        self.path = Path(path)
+        self.statements: List[str] = meta["statements"]
+        self.tickers:    List[str] = meta["tickers"]
+        self.kalem_names: List[str] = meta["kalem_names"]
+        self.col_labels:  List[str] = meta["col_labels"]
+        self.fingerprints: Dict[str, list] = meta["fingerprints"]
+        self._a = arrays
+
+        # (ticker, tablo) → sayfa satırı
+        self._sheet_of: Dict[Tuple[int, int], int] = {
+            (t, s): i for i, (t, s) in enumerate(zip(arrays["sheet_ticker"].tolist(),
+                                                     arrays["sheet_statement"].tolist()))
+        }
+        self._ticker_codes = {t: i for i, t in enumerate(self.tickers)}
+        self._statement_codes = {s: i for i, s in enumerate(self.statements)}
+        self._kalem_codes: Dict[str, int] = {k: i for i, k in enumerate(self.kalem_names)}
+
+    @classmethod
+    def open(cls, path: Path = PANEL_DIR, mmap: bool = True) -> "PanelStore":
+        """Open the current version under `path` (or a version directory itself)."""
+        path = _resolve(Path(path))
+        try:
+            meta = json.loads((path / _META).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            raise PanelStoreError(f"{path}: panel yok (python -m modules panel build)") from None
+        except (OSError, ValueError) as e:
+            raise PanelStoreError(f"{path}: panel okunamadı → {e}") from e
+        if meta.get("version") != PANEL_VERSION:
+            raise PanelStoreError(f"{path}: panel sürümü {meta.get('version')} ≠ {PANEL_VERSION}")
+
+        mode = "r" if mmap else None
+        try:
+            arrays = {c: np.load(path / f"{c}.npy", mmap_mode=mode, allow_pickle=False)
+                      for c in (*_SHEET_COLUMNS, *_CELL_COLUMNS)}
+        except (OSError, ValueError) as e:
+            raise PanelStoreError(f"{path}: panel sütunu okunamadı → {e}") from e
+        return cls(path, meta, arrays)
+
+    # -------- freshness ---------------------------------------------------
+    def is_fresh(self, ticker: str, base_dir: Path = Path(COMPANIES_DIR)) -> bool:
+        """True if `ticker`'s workbook has not changed since it was ingested."""
+        path = company_path(ticker, base_dir)
+        fp = self.fingerprints.get(ticker)
+        return fp is not None and path.exists() and list(workbook_fingerprint(path)) == fp
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._ticker_codes
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __repr__(self) -> str:
+        return f"PanelStore({len(self.tickers)} şirket, {len(self._a['cell_value'])} hücre)"
+
+    # -------- per-ticker --------------------------------------------------
+    def _sheet(self, ticker: str, sheet: str) -> int:
+        try:
+            return self._sheet_of[(self._ticker_codes[ticker], self._statement_codes[sheet])]
+        except KeyError:
+            raise KeyError(f"{ticker} / {sheet} panelde yok") from None
+
+    def statement(self, ticker: str, sheet: str) -> FinancialStatement:
+        """`ticker`'s `sheet` as the `FinancialStatement` `load_financial_data` gives."""
+        i, a = self._sheet(ticker, sheet), self._a
+        rows, cols = int(a["sheet_rows"][i]), int(a["sheet_cols"][i])
+        c0, r0, k0 = int(a["sheet_cell_start"][i]), int(a["sheet_row_start"][i]), int(a["sheet_col_start"][i])
+
+        kalem   = [self.kalem_names[k] for k in a["layout_kalem"][r0:r0 + rows].tolist()]
+        periods = [self.col_labels[c] for c in a["layout_col"][k0:k0 + cols].tolist()]
+        values  = a["cell_value"][c0:c0 + rows * cols].reshape(rows, cols)
+        return FinancialStatement(kalem, periods, values)
+
+    def financials(self, ticker: str) -> Tuple[FinancialStatement, ...]:
+        """`(balance, income, cashflow)` of `ticker`."""
+        return tuple(self.statement(ticker, s) for s in self.statements)
+
+    # -------- cross-section -----------------------------------------------
+    def _cell_sheets(self, cells: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self._a["sheet_cell_start"], cells, side="right") - 1
+
+    def cross_section(self, kalem: str, period, statement: Optional[str] = None) -> pd.Series:
+        """
+        Value of `kalem` in `period` for every ticker, in one scan of the
+        Kalem / period columns.  Like `FinancialStatement.value`, the first
+        row of a repeated Kalem wins.  Tickers without the item or period
+        are absent from the result.
+        """
+        code = self._kalem_codes.get(kalem)
+        pcode = period_key(period)
+        if code is None:
+            return pd.Series(dtype=float, name=kalem)
+
+        a = self._a
+        cells = np.flatnonzero((a["cell_kalem"] == code) & (a["cell_period"] == pcode))
+        sheets = self._cell_sheets(cells)
+        if statement is not None:
+            keep = a["sheet_statement"][sheets] == self._statement_codes[statement]
+            cells, sheets = cells[keep], sheets[keep]
+
+        tickers = a["sheet_ticker"][sheets]
+        # Hücreler satır sırasında: ticker başına ilk eşleşme = ilk satır
+        first = np.unique(tickers, return_index=True)[1]
+        return pd.Series(a["cell_value"][cells[first]],
+                         index=pd.Index([self.tickers[t] for t in tickers[first].tolist()], name="ticker"),
+                         name=kalem)
+
+    def long_frame(self, tickers: Optional[Iterable[str]] = None,
+                   statements: Optional[Iterable[str]] = None,
+                   kalem: Optional[Iterable[str]] = None,
+                   dropna: bool = True) -> pd.DataFrame:
+        """
+        Cells as a long-format DataFrame: ticker, statement, Kalem (categorical,
+        dictionary codes kept), period (`Period` code) and value.
+        """
+        a = self._a
+        mask = np.ones(len(a["cell_value"]), dtype=bool)
+        if dropna:
+            mask &= ~np.isnan(a["cell_value"])
+        if kalem is not None:
+            codes = [self._kalem_codes[k] for k in kalem if k in self._kalem_codes]
+            mask &= np.isin(a["cell_kalem"], codes)
+
+        sheet_keep = np.ones(len(a["sheet_ticker"]), dtype=bool)
+        if tickers is not None:
+            codes = [self._ticker_codes[t] for t in tickers if t in self._ticker_codes]
+            sheet_keep &= np.isin(a["sheet_ticker"], codes)
+        if statements is not None:
+            codes = [self._statement_codes[s] for s in statements]
+            sheet_keep &= np.isin(a["sheet_statement"], codes)
+        if not sheet_keep.all():
+            mask &= np.repeat(sheet_keep, a["sheet_rows"] * a["sheet_cols"])
+
+        cells  = np.flatnonzero(mask)
+        sheets = self._cell_sheets(cells)
+        return pd.DataFrame({
+            "ticker":    pd.Categorical.from_codes(a["sheet_ticker"][sheets], self.tickers),
+            "statement": pd.Categorical.from_codes(a["sheet_statement"][sheets], self.statements),
+            "Kalem":     pd.Categorical.from_codes(a["cell_kalem"][cells], self.kalem_names),
+            "period":    np.asarray(a["cell_period"][cells]),
+            "value":     np.asarray(a["cell_value"][cells]),
+        })
+
+    def disk_usage(self) -> int:
+        return sum(f.stat().st_size for f in self.path.iterdir() if f.is_file())
+
+
+# ────────────────────────────────────────────────
+# Process-wide shared mapping
+# ────────────────────────────────────────────────
+_shared: Dict[Path, Tuple[tuple, Optional[PanelStore]]] = {}
+_shared_lock = threading.Lock()
+
+
+def _stamp(path: Path) -> Optional[tuple]:
+    version = _resolve(path)
+    try:
+        st = (version / _META).stat()
+    except FileNotFoundError:
+        return None
+    return version.name, st.st_mtime_ns, st.st_size
+
+
+def shared_panel(path: Path = PANEL_DIR) -> Optional[PanelStore]:
+    """
+    This process's memory-mapped `PanelStore` (None if there is no usable
+    panel).  Opened once; a rebuild (`build_panel` switches `CURRENT`) is
+    picked up on the next call.  The mapping is read-only and shared by
+    all threads – never write into the statements it returns.
+    """
+    path = Path(path)
+    stamp = _stamp(path)
+    with _shared_lock:
+        cached = _shared.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        store = None
+        if stamp is not None:
+            try:
+                store = PanelStore.open(path)
+            except PanelStoreError as e:
+                logger.warning(str(e))
+        _shared[path] = (stamp, store)
+        return store
+
+
+def panel_statements(path: Path, sheets: Iterable[str],
+                     panel_dir: Path = PANEL_DIR) -> Optional[Dict[str, FinancialStatement]]:
+    """
+    `{sheet: FinancialStatement}` of workbook `path` from the shared panel,
+    or None if the panel lacks it or the workbook changed since ingest.
+    """
+    store = shared_panel(panel_dir)
+    if store is None:
+        return None
+    ticker = _ticker_of(path)
+    fp = store.fingerprints.get(ticker)
+    try:
+        if fp is None or list(workbook_fingerprint(path)) != fp:
+            return None
+    except FileNotFoundError:
+        return None
+    return {s: store.statement(ticker, s) for s in sheets}
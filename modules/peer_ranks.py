@@ -0,0 +1,312 @@
+"""
+Market and sector percentile ranks of the scan metrics.
+
+`run_scan` scores are absolute; this stage places every ticker among its
+peers for F-Skor, M-Skor, MOS, F/K and PD/DD:
+
+* **pct** – percentile within the group, oriented so that 100 = best
+  (M-Skor, F/K and PD/DD: lower is better)
+* **z**   – z-score within the group, same orientation (positive = better)
+
+All groups (whole market + every sector) are ranked in one groupby pass
+over a stacked frame.  Results are persisted in the score database next
+to `scan_scores`; `PeerRankStore.update` only recomputes and rewrites the
+groups that contain a ticker whose inputs changed.
+
+Sectors come from a `Sektör` column of the radar sheet or, if there is
+none, from `SECTORS_JSON` (`{"ASELS": "Savunma", …}`); without either
+only market ranks exist.
+"""
+
+import json
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Mapping, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from config import SCORES_DB, SECTORS_JSON
+from modules.logger import logger
+from modules.radar import SECTOR_COL, TICKER_COL, RadarTable
+
+# Metrik → yüksek değer daha mı iyi?
+RANK_METRICS: Dict[str, bool] = {
+    "f_skor": True,
+    "m_skor": False,
+    "MOS":    True,
+    "F/K":    False,
+    "PD/DD":  False,
+}
+_POSITIVE_ONLY = ("F/K", "PD/DD")       # negatif / sıfır çarpan "ucuz" sayılmaz
+MARKET = "market"
+SECTOR = "sector"
+MARKET_GROUP = "BIST"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS peer_ranks (
+    ticker      TEXT NOT NULL,
+    scope       TEXT NOT NULL,
+    grp         TEXT NOT NULL,
+    metric      TEXT NOT NULL,
+    value       REAL,
+    pct         REAL,
+    z           REAL,
+    n           INTEGER NOT NULL,
+    updated_at  TEXT NOT NULL,
+    PRIMARY KEY (ticker, scope, metric)
+)
+"""
+_RANK_COLUMNS = ["ticker", "scope", "grp", "metric", "value", "pct", "z", "n"]
+
+
+# ────────────────────────────────────────────────
+# Inputs
+# ────────────────────────────────────────────────
+def load_sectors(radar: Optional[RadarTable] = None,
+                 path: Path = SECTORS_JSON) -> Dict[str, str]:
+    """Ticker → sector from the radar's `Sektör` column, else `path` (may be empty)."""
+    if radar is not None and SECTOR_COL in radar.frame.columns:
+        df = radar.frame.dropna(subset=[SECTOR_COL]).drop_duplicates(TICKER_COL)
+        return dict(zip(df[TICKER_COL], df[SECTOR_COL].astype(str).str.strip()))
+    try:
+        return {str(t).strip(): str(s).strip()
+                for t, s in json.loads(Path(path).read_text(encoding="utf-8")).items()}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning(f"{Path(path).name} okunamadı, sektör sıralaması yapılmayacak: {e}")
+        return {}
+
+
+def metric_frame(scores: pd.DataFrame, radar: RadarTable,
+                 sectors: Optional[Mapping[str, str]] = None) -> pd.DataFrame:
+    """
+    Ticker-indexed frame of `RANK_METRICS` (+ `Sektör`) from a `run_scan`
+    result and the radar (F/K, PD/DD; first radar row of each ticker).
+    """
+    radar = RadarTable.wrap(radar)
+    tickers = scores["hisse"].astype(str).to_numpy()
+    out = pd.DataFrame(index=pd.Index(tickers, name="ticker"))
+    pos = np.array([radar.position(t) if t in radar else -1 for t in tickers], dtype=int)
+
+    for metric in RANK_METRICS:
+        if metric in scores.columns:
+            values = pd.to_numeric(scores[metric], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        elif metric in radar.frame.columns:
+            col = radar.column(metric)
+            values = np.where(pos >= 0, col[np.maximum(pos, 0)], np.nan) if len(col) else np.nan
+        else:
+            values = np.nan
+        out[metric] = values
+
+    for metric in _POSITIVE_ONLY:
+        out[metric] = out[metric].where(out[metric] > 0)
+
+    sectors = load_sectors(radar) if sectors is None else sectors
+    out[SECTOR_COL] = pd.Series(sectors, dtype=object).reindex(out.index)
+    return out[~out.index.duplicated()]
+
+
+# ────────────────────────────────────────────────
+# Ranking
+# ────────────────────────────────────────────────
+def compute_ranks(metrics: pd.DataFrame, sectors: Optional[Iterable[str]] = None,
+                  market: bool = True) -> pd.DataFrame:
+    """
+    Long frame `ticker, scope, grp, metric, value, pct, z, n` for the market
+    group and the sector groups in `sectors` (all sectors if None).
+
+    Market and sector rows are stacked and ranked by one groupby over
+    (scope, grp) for all metrics at once; lower-is-better metrics are
+    negated first so `pct` / `z` read "higher = better".
+    """
+    names = list(RANK_METRICS)
+    parts = []
+    if market:
+        parts.append(metrics[names].assign(scope=MARKET, grp=MARKET_GROUP))
+    if SECTOR_COL in metrics.columns:
+        sec = metrics[metrics[SECTOR_COL].notna()]
+        if sectors is not None:
+            sec = sec[sec[SECTOR_COL].isin(list(sectors))]
+        parts.append(sec[names].assign(scope=SECTOR, grp=sec[SECTOR_COL]))
+    if not parts or not sum(len(p) for p in parts):
+        return pd.DataFrame(columns=_RANK_COLUMNS)
+
+    stacked = pd.concat(parts)
+    sign = np.array([1.0 if RANK_METRICS[m] else -1.0 for m in names])
+    oriented = stacked[names] * sign
+    grouped = oriented.groupby([stacked["scope"], stacked["grp"]], sort=False)
+
+    pct  = grouped.rank(pct=True, method="average") * 100
+    mean = grouped.transform("mean")
+    std  = grouped.transform("std")
+    n    = grouped.transform("count")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (oriented - mean) / std.where(std > 0)
+
+    # Satır öncelikli düzleştirme: her satırın metrikleri art arda
+    reps = len(names)
+    long = pd.DataFrame({
+        "ticker": np.repeat(stacked.index.to_numpy(), reps),
+        "scope":  np.repeat(stacked["scope"].to_numpy(), reps),
+        "grp":    np.repeat(stacked["grp"].to_numpy(), reps),
+        "metric": np.tile(names, len(stacked)),
+        "value":  stacked[names].to_numpy(dtype=float).ravel(),
+        "pct":    pct.to_numpy(dtype=float).ravel(),
+        "z":      z.to_numpy(dtype=float).ravel(),
+        "n":      n.to_numpy(dtype=int).ravel(),
+    })
+    return long[_RANK_COLUMNS]
+
+
+# ────────────────────────────────────────────────
+# Persistence
+# ────────────────────────────────────────────────
+@dataclass
+class RankUpdate:
+    changed: int = 0        # girdisi değişen / eklenen / çıkan şirket
+    groups:  int = 0        # yeniden sıralanan grup
+    rows:    int = 0        # yazılan satır
+
+
+class PeerRankStore:
+    """
+    `peer_ranks` table in the score database.
+
+        store = PeerRankStore()
+        store.update(metric_frame(score_df, radar))
+        store.ranks("ASELS")          # metrik × (piyasa, sektör)
+    """
+
+    def __init__(self, path: Path = SCORES_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as con:
+            con.execute(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        con = sqlite3.connect(self.path)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _stored_inputs(self) -> pd.DataFrame:
+        """Ticker-indexed metrics + sector as of the last update."""
+        with self._connect() as con:
+            rows = pd.read_sql_query("SELECT ticker, scope, grp, metric, value FROM peer_ranks", con)
+        if rows.empty:
+            return pd.DataFrame(columns=[*RANK_METRICS, SECTOR_COL])
+        market = rows[rows["scope"] == MARKET].pivot(index="ticker", columns="metric", values="value")
+        market = market.reindex(columns=list(RANK_METRICS)).astype(float)
+        sector = rows[rows["scope"] == SECTOR].drop_duplicates("ticker").set_index("ticker")["grp"]
+        market[SECTOR_COL] = sector.reindex(market.index)
+        return market
+
+    def update(self, metrics: pd.DataFrame) -> RankUpdate:
+        """
+        Bring the stored ranks in line with `metrics` (a `metric_frame`):
+        only groups holding a new, removed or changed ticker are
+        recomputed and rewritten.
+        """
+        old = self._stored_inputs()
+        names = list(RANK_METRICS)
+        if SECTOR_COL not in metrics.columns:
+            metrics = metrics.assign(**{SECTOR_COL: np.nan})
+
+        removed = old.index.difference(metrics.index)
+        common  = metrics.index.intersection(old.index)
+        a, b = metrics.loc[common, names].to_numpy(float), old.loc[common, names].to_numpy(float)
+        diff = ~((a == b) | (np.isnan(a) & np.isnan(b))).all(axis=1)
+        diff |= (metrics.loc[common, SECTOR_COL].fillna("").astype(str).to_numpy()
+                 != old.loc[common, SECTOR_COL].fillna("").astype(str).to_numpy())
+        changed = common[diff].union(metrics.index.difference(old.index)).union(removed)
+
+        result = RankUpdate(changed=len(changed))
+        if result.changed == 0:
+            return result
+
+        # Etkilenen sektörler: değişen şirketlerin eski ve yeni sektörleri
+        touched: Set[str] = set()
+        for frame in (metrics, old):
+            touched |= set(frame.loc[frame.index.intersection(changed), SECTOR_COL].dropna())
+
+        ranks = compute_ranks(metrics, sectors=touched)
+        result.groups = 1 + len(touched)
+        result.rows = len(ranks)
+
+        now = datetime.now().isoformat(timespec="seconds")
+        payload = [
+            (r.ticker, r.scope, r.grp, r.metric,
+             None if pd.isna(r.value) else float(r.value),
+             None if pd.isna(r.pct) else float(r.pct),
+             None if pd.isna(r.z) else float(r.z),
+             int(r.n), now)
+            for r in ranks.itertuples(index=False)
+        ]
+        stale_sector = [t for t in changed if t not in metrics.index
+                        or pd.isna(metrics.at[t, SECTOR_COL])]
+        with self._connect() as con:
+            con.executemany("DELETE FROM peer_ranks WHERE ticker = ?", [(t,) for t in removed])
+            con.executemany("DELETE FROM peer_ranks WHERE ticker = ? AND scope = ?",
+                            [(t, SECTOR) for t in stale_sector])
+            con.executemany(
+                "INSERT OR REPLACE INTO peer_ranks "
+                "(ticker, scope, grp, metric, value, pct, z, n, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                payload,
+            )
+        logger.info(f"Akran sıralaması: {result.changed} şirket değişti, "
+                    f"{result.groups} grup yeniden sıralandı.")
+        return result
+
+    # -------- queries -------------------------------------------------------
+    def ranks(self, ticker: str) -> pd.DataFrame:
+        """Stored rows of `ticker` (`_RANK_COLUMNS`), market first."""
+        with self._connect() as con:
+            df = pd.read_sql_query(
+                "SELECT ticker, scope, grp, metric, value, pct, z, n FROM peer_ranks "
+                "WHERE ticker = ?", con, params=(ticker,))
+        order = {m: i for i, m in enumerate(RANK_METRICS)}
+        return (df.assign(_m=df["metric"].map(order), _s=(df["scope"] != MARKET))
+                  .sort_values(["_m", "_s"]).drop(columns=["_m", "_s"]).reset_index(drop=True))
+
+    def peer_context(self, ticker: str) -> pd.DataFrame:
+        """
+        One row per metric: value, market / sector percentile and z-score
+        (empty if `ticker` has not been ranked yet).
+        """
+        df = self.ranks(ticker)
+        if df.empty:
+            return df
+        wide = df.pivot(index="metric", columns="scope", values=["pct", "z", "n"])
+        out = pd.DataFrame(index=pd.Index([m for m in RANK_METRICS if m in wide.index], name="Metrik"))
+        out["Değer"] = df[df["scope"] == MARKET].set_index("metric")["value"].reindex(out.index)
+        for scope, label in ((MARKET, "Piyasa"), (SECTOR, "Sektör")):
+            if ("pct", scope) in wide.columns:
+                out[f"{label} %"] = wide[("pct", scope)].reindex(out.index).astype(float)
+                out[f"{label} z"] = wide[("z", scope)].reindex(out.index).astype(float)
+                out[f"{label} n"] = wide[("n", scope)].reindex(out.index)
+        sector = df.loc[df["scope"] == SECTOR, "grp"]
+        out.attrs["sector"] = sector.iloc[0] if len(sector) else None
+        return out
+
+    def clear(self):
+        with self._connect() as con:
+            con.execute("DELETE FROM peer_ranks")
+
+    def __len__(self) -> int:
+        with self._connect() as con:
+            return con.execute("SELECT COUNT(DISTINCT ticker) FROM peer_ranks").fetchone()[0]
+
+
+def update_peer_ranks(scores: pd.DataFrame, radar: RadarTable,
+                      path: Path = SCORES_DB) -> RankUpdate:
+    """Rank a `run_scan` result and persist it next to the score store."""
+    return PeerRankStore(path).update(metric_frame(scores, RadarTable.wrap(radar)))
@@ -0,0 +1,159 @@
+"""
+Reporting periods as small integers.
+
+Fintables labels periods "2024/12", "2025/3" …; sorting them used to go
+through `pd.to_datetime` for every key.  A `Period` packs year and month
+into one int (`2024/12` → 202412), so ordering, "one year back" and
+common-period intersection are integer operations:
+
+    Period.parse("2024/12") > Period.parse("2024/9")       # True
+    str(Period.parse("2024/12").year_back())               # "2023/12"
+    parse_periods(statement.periods)                       # int64 array
+
+Every `FinancialStatement` carries a `PeriodIndex` of its columns, built
+once when the sheet is loaded.
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+NO_PERIOD = -1          # parse_periods: dönem olmayan etiketler
+
+
+class Period(int):
+    """`year * 100 + month`; compares / hashes like the int."""
+
+    __slots__ = ()
+
+    def __new__(cls, year: int, month: int):
+        if not 1 <= month <= 12:
+            raise ValueError(f"geçersiz ay: {month}")
+        return super().__new__(cls, year * 100 + month)
+
+    def __getnewargs__(self):
+        return self.year, self.month
+
+    @classmethod
+    def from_code(cls, code: int) -> "Period":
+        return cls(int(code) // 100, int(code) % 100)
+
+    @staticmethod
+    def parse(label) -> Optional["Period"]:
+        """'2024/12' → Period; anything else → None (cached)."""
+        return parse_period(label)
+
+    @property
+    def year(self) -> int:
+        return int(self) // 100
+
+    @property
+    def month(self) -> int:
+        return int(self) % 100
+
+    def shift(self, months: int) -> "Period":
+        m = self.year * 12 + self.month - 1 + months
+        return Period(m // 12, m % 12 + 1)
+
+    def year_back(self, years: int = 1) -> "Period":
+        return Period(self.year - years, self.month)
+
+    def to_timestamp(self) -> pd.Timestamp:
+        return pd.Timestamp(self.year, self.month, 1)
+
+    def __str__(self) -> str:
+        return f"{self.year}/{self.month}"
+
+    def __repr__(self) -> str:
+        return f"Period({self})"
+
+
+@lru_cache(maxsize=8192)
+def parse_period(label) -> Optional[Period]:
+    try:
+        year, month = str(label).strip().split("/")
+        return Period(int(year), int(month))
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_periods(labels: Iterable) -> np.ndarray:
+    """Vectorised parse: int64 codes, `NO_PERIOD` for non-period labels."""
+    s = pd.Series(list(labels), dtype=object).astype(str).str.strip()
+    parts = s.str.extract(r"^(\d{4})/(\d{1,2})$")
+    year  = pd.to_numeric(parts[0], errors="coerce")
+    month = pd.to_numeric(parts[1], errors="coerce")
+    codes = (year * 100 + month).where(month.between(1, 12))
+    return codes.fillna(NO_PERIOD).to_numpy(dtype=np.int64)
+
+
+def period_key(label) -> int:
+    """Sort key for period labels (non-periods sort first)."""
+    p = parse_period(label)
+    return NO_PERIOD if p is None else int(p)
+
+
+class PeriodIndex:
+    """
+    Period columns of one sheet.
+
+    * `labels` / `codes` → column labels that are periods, and their codes
+    * `ordered`          → labels newest first
+    """
+
+    __slots__ = ("labels", "codes", "_by_code", "_order")
+
+    def __init__(self, labels: Sequence):
+        labels = [str(c) for c in labels]
+        codes  = parse_periods(labels)
+        keep   = codes != NO_PERIOD
+        self.labels: List[str] = [c for c, k in zip(labels, keep) if k]
+        self.codes = codes[keep]
+        self._by_code: Dict[int, str] = {}
+        for label, code in zip(self.labels, self.codes.tolist()):
+            self._by_code.setdefault(code, label)
+        self._order = np.argsort(-self.codes, kind="stable")
+
+    @property
+    def ordered(self) -> List[str]:
+        return [self.labels[i] for i in self._order]
+
+    def label(self, period) -> Optional[str]:
+        """Column label of `period` (Period, code or label), None if absent."""
+        code = period if isinstance(period, (int, np.integer)) else period_key(period)
+        return self._by_code.get(int(code))
+
+    def __contains__(self, period) -> bool:
+        return self.label(period) is not None
+
+    def year_back(self, period, years: int = 1) -> Optional[str]:
+        p = period if isinstance(period, Period) else parse_period(period)
+        return None if p is None else self.label(p.year_back(years))
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __repr__(self) -> str:
+        return f"PeriodIndex({len(self.labels)} dönem)"
+
+
+def _period_index(obj) -> PeriodIndex:
+    index = getattr(obj, "period_index", None)
+    return index if index is not None else PeriodIndex(obj.columns)
+
+
+def common_periods(*statements) -> List[str]:
+    """
+    Periods present in every statement, newest first (labels of the first
+    statement).  Accepts `FinancialStatement`s or raw sheet DataFrames.
+    """
+    indexes = [_period_index(s) for s in statements]
+    codes = indexes[0].codes
+    for ix in indexes[1:]:
+        codes = np.intersect1d(codes, ix.codes)
+    first = indexes[0]
+    # Etiketler birebir aynı olmalı (sayfalar dönemlere etiketle erişir)
+    return [first.label(c) for c in np.sort(np.unique(codes))[::-1].tolist()
+            if all(ix.label(c) == first.label(c) for ix in indexes[1:])]
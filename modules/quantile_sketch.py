@@ -0,0 +1,163 @@
+"""
+Mergeable quantile sketch for streamed Monte Carlo values.
+
+Values are counted in logarithmic buckets (DDSketch style): every
+quantile comes back with a relative error of at most
+`relative_accuracy`, memory depends on the value range – not on the
+number of values – and two sketches merge by adding bucket counts, so
+chunks, workers or tickers can be combined freely.
+"""
+
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class _Buckets:
+    """Dense int64 counts for bucket indices `offset … offset + len − 1`."""
+
+    def __init__(self):
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def _extend(self, lo: int, hi: int):
+        if not self.counts.size:
+            self.offset, self.counts = lo, np.zeros(hi - lo + 1, dtype=np.int64)
+            return
+        new_lo = min(lo, self.offset)
+        new_hi = max(hi, self.offset + self.counts.size - 1)
+        if new_lo == self.offset and new_hi == self.offset + self.counts.size - 1:
+            return
+        counts = np.zeros(new_hi - new_lo + 1, dtype=np.int64)
+        start = self.offset - new_lo
+        counts[start:start + self.counts.size] = self.counts
+        self.offset, self.counts = new_lo, counts
+
+    def add(self, index: np.ndarray):
+        if not index.size:
+            return
+        self._extend(int(index.min()), int(index.max()))
+        self.counts += np.bincount(index - self.offset, minlength=self.counts.size)
+
+    def merge(self, other: "_Buckets"):
+        if not other.counts.size:
+            return
+        self._extend(other.offset, other.offset + other.counts.size - 1)
+        start = other.offset - self.offset
+        self.counts[start:start + other.counts.size] += other.counts
+
+    def nonzero(self) -> Tuple[np.ndarray, np.ndarray]:
+        idx = np.flatnonzero(self.counts)
+        return idx + self.offset, self.counts[idx]
+
+
+class ValueSketch:
+    """
+    Streaming summary of a value distribution.
+
+        sketch = ValueSketch()
+        for chunk in chunks:
+            sketch.add(chunk)
+        sketch.median, sketch.quantile([0.05, 0.95]), sketch.histogram(50)
+    """
+
+    def __init__(self, relative_accuracy: float = 0.001):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy 0 ile 1 arasında olmalı")
+        self.relative_accuracy = relative_accuracy
+        self._gamma     = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+
+        self._pos   = _Buckets()
+        self._neg   = _Buckets()          # −x için
+        self.zeros  = 0
+        self.nans   = 0
+        self.count  = 0                   # NaN hariç
+        self.min    = math.inf
+        self.max    = -math.inf
+
+    # -------- update ----------------------------------------------------
+    def _index(self, x: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(x) / self._log_gamma).astype(np.int64)
+
+    def add(self, values) -> "ValueSketch":
+        values = np.asarray(values, dtype=float).ravel()
+        nan = np.isnan(values)
+        if nan.any():
+            self.nans += int(nan.sum())
+            values = values[~nan]
+        if not values.size:
+            return self
+
+        self.count += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.zeros += int((values == 0).sum())
+        self._pos.add(self._index(values[values > 0]))
+        self._neg.add(self._index(-values[values < 0]))
+        return self
+
+    def merge(self, other: "ValueSketch") -> "ValueSketch":
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Farklı doğruluktaki sketch'ler birleştirilemez")
+        self._pos.merge(other._pos)
+        self._neg.merge(other._neg)
+        self.zeros += other.zeros
+        self.nans  += other.nans
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    # -------- queries ---------------------------------------------------
+    def _support(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(bucket representative values ascending, counts)."""
+        pos_idx, pos_cnt = self._pos.nonzero()
+        neg_idx, neg_cnt = self._neg.nonzero()
+        rep = 2 / (self._gamma + 1)
+        values = np.concatenate([
+            -rep * self._gamma ** neg_idx[::-1].astype(float),
+            [0.0] if self.zeros else [],
+            rep * self._gamma ** pos_idx.astype(float),
+        ])
+        counts = np.concatenate([neg_cnt[::-1], [self.zeros] if self.zeros else [], pos_cnt])
+        return values, counts.astype(np.int64)
+
+    def quantile(self, q):
+        """Quantile(s) like `np.quantile(values, q, method="lower")`, within `relative_accuracy`."""
+        q = np.asarray(q, dtype=float)
+        if not self.count:
+            return np.full(q.shape, np.nan) if q.ndim else math.nan
+        values, counts = self._support()
+        rank = np.floor(q * (self.count - 1))
+        out = values[np.searchsorted(np.cumsum(counts), rank, side="right")]
+        out = np.clip(out, self.min, self.max)
+        return out if q.ndim else float(out)
+
+    @property
+    def median(self) -> float:
+        return self.quantile(0.5)
+
+    def histogram(self, bins: int = 50,
+                  range: Optional[Tuple[float, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(counts, edges) like `np.histogram(values, bins)`, built from the buckets."""
+        if not self.count:
+            return np.zeros(bins, dtype=np.int64), np.linspace(0, 1, bins + 1)
+        values, counts = self._support()
+        if range is None:
+            # Kova temsilcileri uç değerleri ±relative_accuracy kadar aşabilir
+            range = (self.min, self.max)
+            values = np.clip(values, *range)
+        hist, edges = np.histogram(values, bins=bins, range=range, weights=counts)
+        return hist.astype(np.int64), edges
+
+    def summary(self) -> dict:
+        p5, p50, p95 = self.quantile([0.05, 0.5, 0.95])
+        return {"count": self.count, "median": float(p50), "p5": float(p5), "p95": float(p95)}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __repr__(self) -> str:
+        return f"ValueSketch(n={self.count}, medyan≈{self.median:,.4g})" if self.count else "ValueSketch(boş)"
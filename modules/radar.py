@@ -0,0 +1,88 @@
+"""
+Fintables radar sheet (`fintables_radar.xlsx`) with a ticker index.
+
+`radar[radar["Şirket"] == c]` scans the whole frame for every company;
+`RadarTable` coerces the numeric columns once, keeps a ticker → rows
+index and hands out the same one-row DataFrames the scorers expect.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Union
+
+import numpy as np
+import pandas as pd
+
+from config import RADAR_XLSX
+
+TICKER_COL = "Şirket"
+SECTOR_COL = "Sektör"      # isteğe bağlı metin kolonu (akran sıralaması)
+
+
+class RadarTable:
+    def __init__(self, df: pd.DataFrame):
+        df = df.reset_index(drop=True).copy()
+        df[TICKER_COL] = df[TICKER_COL].str.strip()
+
+        # F/K, PD/DD, Cari Oran, Piyasa Değeri … bir kez sayıya çevrilir
+        if SECTOR_COL in df.columns:
+            df[SECTOR_COL] = df[SECTOR_COL].where(df[SECTOR_COL].notna(), None)
+        for col in df.columns:
+            if col not in (TICKER_COL, SECTOR_COL):
+                df[col] = pd.to_numeric(df[col], errors="coerce")
+
+        self.frame = df
+        # Aynı kod birden fazla satırda geçebilir; filtre davranışı korunur
+        self._positions: Dict[str, np.ndarray] = {
+            ticker: np.asarray(pos)
+            for ticker, pos in df.groupby(TICKER_COL, sort=False).indices.items()
+        }
+        self._numeric: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_excel(cls, path: Path = RADAR_XLSX) -> "RadarTable":
+        return cls(pd.read_excel(path))
+
+    @classmethod
+    def wrap(cls, radar: Union["RadarTable", pd.DataFrame]) -> "RadarTable":
+        return radar if isinstance(radar, RadarTable) else cls(radar)
+
+    # -------- per-ticker access -----------------------------------------
+    @property
+    def tickers(self) -> np.ndarray:
+        """Unique tickers in sheet order (`radar["Şirket"].dropna().unique()`)."""
+        return self.frame[TICKER_COL].dropna().unique()
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._positions
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def row(self, ticker: str) -> pd.DataFrame:
+        """Rows of `ticker` as a DataFrame – empty (same columns) when unknown."""
+        pos = self._positions.get(ticker)
+        if pos is None:
+            return self.frame.iloc[0:0]
+        return self.frame.iloc[pos]
+
+    def rows(self, tickers: Iterable[str]) -> Dict[str, pd.DataFrame]:
+        return {t: self.row(t) for t in tickers}
+
+    def position(self, ticker: str) -> int:
+        """First row position of `ticker` (KeyError when unknown)."""
+        return int(self._positions[ticker][0])
+
+    # -------- whole-universe access -------------------------------------
+    def column(self, name: str) -> np.ndarray:
+        """Float array of one numeric column, aligned with `frame` rows."""
+        arr = self._numeric.get(name)
+        if arr is None:
+            arr = self.frame[name].to_numpy(dtype=float, na_value=np.nan)
+            self._numeric[name] = arr
+        return arr
+
+    def columns(self, names: List[str]) -> Dict[str, np.ndarray]:
+        return {n: self.column(n) for n in names}
+
+    def __repr__(self) -> str:
+        return f"RadarTable({len(self._positions)} şirket, {self.frame.shape[1]} kolon)"
@@ -1,42 +1,44 @@
 import pandas as pd
-from modules.utils import scalar
-from modules.financial_snapshot import build_snapshot
+from modules.financial_snapshot import SnapshotPanel, build_snapshots
+from modules.periods import common_periods
 from modules.logger import logger 
 
-def calculate_roa_ttm(income: pd.DataFrame, balance: pd.DataFrame, period_order_fn) -> float:
+def roa_ttm_panel(income, balance, period_order_fn=None) -> SnapshotPanel:
     """
-    Adım adım loglayarak Yıllıklandırılmış ROA hesapla:
-    ROA = (TTM Net Kar) / (Ortalama Toplam Varlık) * 100
-
-    Returns:
-        float: Yüzde olarak ROA (örn: -4.92)
+    Snapshots of the (at most) four latest periods common to income and balance.
+    Periods come from the sheets' `PeriodIndex`; `period_order_fn` (eski
+    arayüz) sorts the labels with a custom key instead.
     """
-    try:
-        # 1️⃣ Geçerli ortak dönemleri sırala
+    if period_order_fn is None:
+        valid_periods = common_periods(income, balance)
+    else:
         valid_periods = sorted(
             [c for c in income.columns if "/" in c and c in balance.columns],
             key=period_order_fn,
             reverse=True
         )
+    return build_snapshots(balance, income, None, periods=valid_periods[:4])
+
+def calculate_roa_ttm(income: pd.DataFrame, balance: pd.DataFrame, period_order_fn=None) -> float:
+    """
+    Adım adım loglayarak Yıllıklandırılmış ROA hesapla:
+    ROA = (TTM Net Kar) / (Ortalama Toplam Varlık) * 100
 
-        # 2️⃣ Net Kar verilerini topla
-        net_incomes = []
-        for p in valid_periods[:4]:
-            snap_curr = build_snapshot(balance, income, None, period=p)
-            val = scalar(snap_curr.net_profit)
-            net_incomes.append(val or 0)
+    Returns:
+        float: Yüzde olarak ROA (örn: -4.92)
+    """
+    try:
+        # 1️⃣ + 2️⃣ Son 4 ortak dönemin snapshot'ları tek seferde
+        panel = roa_ttm_panel(income, balance, period_order_fn)
 
-        net_income_ttm = sum(net_incomes)
+        # Net Kar verilerini topla (bulunamayan kalem → 0)
+        net_income_ttm = panel.net_profit.sum()
 
-        # 3️⃣ Toplam Varlık verilerini al (2 dönem)
-        assets = []
-        for p in valid_periods[:4]:
-            snap_curr = build_snapshot(balance, income, None, period=p)
-            val = scalar(snap_curr.total_assets)
-            assets.append(val or 0)
+        # 3️⃣ Toplam Varlık verilerini al
+        assets = panel.total_assets
 
-        if all(a > 0 for a in assets):
-            avg_assets = sum(assets) / 4
+        if (assets > 0).all():
+            avg_assets = assets.sum() / 4
         else:
             avg_assets = None
 
@@ -0,0 +1,141 @@
+"""
+Reporting calendar: which period should each company's workbook have?
+
+Instead of a hardcoded target period, the expected latest period is
+derived from today's date:
+
+* **due**  – the latest quarter whose KAP filing deadline (`KAP_DEADLINE_DAYS`
+  after quarter end, rolled to the next weekday) has passed; every
+  company should have it.
+* **open** – a newer quarter that has ended but is not due yet; only some
+  companies have filed.  It is expected from a company only once enough
+  peers in the staleness manifest already have it (`min_peer_share`),
+  otherwise just a few `probe` downloads look for the first filers.
+
+A company that was downloaded within `recheck_days` and still lacks the
+expected period is not queued again (geç bildirim / işlem görmeyen şirket).
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from config import KAP_DEADLINE_DAYS
+from modules.periods import Period, parse_period
+from modules.workbook_manifest import ManifestEntry, WorkbookManifest
+
+
+def format_period(q: Period) -> str:
+    return str(q)
+
+
+def _quarter_end(q: Period) -> date:
+    return date(q.year + q.month // 12, q.month % 12 + 1, 1) - timedelta(days=1)
+
+
+def _previous(q: Period) -> Period:
+    return q.shift(-3)
+
+
+def _next_weekday(d: date) -> date:
+    while d.weekday() >= 5:
+        d += timedelta(days=1)
+    return d
+
+
+@dataclass
+class ReportingCalendar:
+    deadline_days:  Mapping[int, int] = field(default_factory=lambda: dict(KAP_DEADLINE_DAYS))
+    min_peer_share: float = 0.05     # açık dönem, akranların bu kadarı yayımlayınca beklenir
+    probe:          int = 5          # kanıt yokken açık dönem için denenecek şirket sayısı
+    recheck_days:   float = 3
+
+    # -------- takvim ------------------------------------------------------
+    def deadline(self, q: Period) -> date:
+        return _next_weekday(_quarter_end(q) + timedelta(days=self.deadline_days[q.month]))
+
+    def last_ended(self, today: date) -> Period:
+        q = Period(today.year, 12)
+        while _quarter_end(q) >= today:
+            q = _previous(q)
+        return q
+
+    def due_period(self, today: Optional[date] = None) -> Period:
+        """Latest quarter whose filing deadline has passed."""
+        today = today or date.today()
+        q = self.last_ended(today)
+        while self.deadline(q) >= today:
+            q = _previous(q)
+        return q
+
+    def open_periods(self, today: Optional[date] = None) -> List[Period]:
+        """Ended but not yet due quarters, newest first."""
+        today = today or date.today()
+        due, q, out = self.due_period(today), self.last_ended(today), []
+        while q > due:
+            out.append(q)
+            q = _previous(q)
+        return out
+
+    # -------- planlama ----------------------------------------------------
+    def expected_periods(self, latest: Mapping[str, Optional[str]],
+                         today: Optional[date] = None) -> Tuple[Period, Optional[Period], float]:
+        """
+        `(due, open, peer_share)` for a universe whose latest periods are
+        `latest`: the newest open quarter already published by at least
+        `min_peer_share` of the companies (None if none is).
+        """
+        due = self.due_period(today)
+        have = [parse_period(p) for p in latest.values()]
+        n = max(len(have), 1)
+        best_share = 0.0
+        for q in self.open_periods(today):
+            share = sum(h is not None and h >= q for h in have) / n
+            if share >= self.min_peer_share:
+                return due, q, share
+            best_share = max(best_share, share)
+        return due, None, best_share
+
+    def plan(self, tickers: Iterable[str], manifest: WorkbookManifest,
+             today: Optional[date] = None,
+             now: Optional[datetime] = None) -> Dict[str, str]:
+        """
+        Tickers that need a download → reason.  Entries are read from
+        `manifest` (stat only for unchanged workbooks).
+        """
+        today = today or date.today()
+        now   = now or datetime.now()
+        tickers = list(tickers)
+        entries: Dict[str, Optional[ManifestEntry]] = {t: manifest.entry(t) for t in tickers}
+        latest = {t: e.latest_period if e else None for t, e in entries.items()}
+
+        due, open_q, share = self.expected_periods(latest, today)
+        recheck = timedelta(days=self.recheck_days)
+
+        def recently_tried(e: Optional[ManifestEntry]) -> bool:
+            return (e is not None and e.downloaded_at is not None
+                    and now - datetime.fromisoformat(e.downloaded_at) < recheck)
+
+        queue: Dict[str, str] = {}
+        probes: List[Tuple[str, str]] = []
+        for t in tickers:
+            e, have = entries[t], parse_period(latest[t])
+            if e is None:
+                queue[t] = "dosya yok"
+            elif recently_tried(e):
+                continue
+            elif have is None:
+                queue[t] = "dönem okunamadı"
+            elif have < due:
+                queue[t] = f"{latest[t]} < {format_period(due)} (son tarih geçti)"
+            elif open_q is not None and have < open_q:
+                queue[t] = f"{format_period(open_q)} yayımlanıyor (akranların %{share * 100:.0f}'i)"
+            elif open_q is None:
+                pending = [q for q in self.open_periods(today) if have < q]
+                if pending:
+                    probes.append((e.downloaded_at or "", t))
+
+        # Henüz kimse açık dönemi yayımlamadıysa en uzun süredir denenmeyen birkaç şirket
+        for _, t in sorted(probes)[:self.probe]:
+            queue[t] = "yeni dönem yoklaması"
+        return queue
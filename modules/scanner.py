@@ -2,20 +2,28 @@
 Generic scan utilities shared by Financial Radar and Trap Radar.
 """
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 import numpy as np
 import pandas as pd
-from typing import Tuple, List, Dict
+from typing import Callable, NamedTuple, Optional, Tuple, List, Dict, Union
 from modules.data_loader import load_financial_data
-from modules.scoring import (
-    beneish, graham, lynch, piotroski
-)
-from modules.scores import (
-    monte_carlo_dcf_simple,
-    period_order,
-    fcf_detailed_analysis
+from modules.scoring import graham, lynch
+from modules.scoring.batch import (
+    stack_panels, roa_ttm_batch, piotroski_f_scores, beneish_m_scores
 )
+from modules.financial_snapshot import SnapshotPanel, build_snapshots
+from modules.ratios import roa_ttm_panel
+from modules.scores import fcf_detailed_analysis
+from modules.periods import common_periods
+from modules.valuation import monte_carlo_dcf_batch
 from modules.logger import logger 
+from modules.peer_ranks import update_peer_ranks
+from modules.score_store import ScoreStore, scan_key
+from modules.radar import RadarTable
+
+# Skor mantığı değiştiğinde artırılır → kayıtlı skorlar geçersizleşir
+SCAN_VERSION = 3
 
 # ────────────────────────────────────────────────
 # Helpers
@@ -23,117 +31,263 @@ from modules.logger import logger
 def latest_common_period(balance: pd.DataFrame,
                          income: pd.DataFrame,
                          cash: pd.DataFrame) -> list[str]:
-    bal = {c for c in balance.columns if "/" in c}
-    inc = {c for c in income.columns  if "/" in c}
-    cf  = {c for c in cash.columns    if "/" in c}
-    return sorted(bal & inc & cf, key=period_order, reverse=True)
+    """Periods common to the three sheets, newest first."""
+    return common_periods(balance, income, cash)
+
+def _error_category(exc: Exception) -> str:
+    """Map a per-company failure onto the scan counters."""
+    if not isinstance(exc, ValueError):
+        return "diğer"
+    msg = str(exc).lower()
+    if "dönem" in msg:
+        return "dönem"
+    if "fcf" in msg:
+        return "fcf"
+    if "piyasa" in msg:
+        return "piyasa"
+    return "diğer"
+
+# ────────────────────────────────────────────────
+# Per-company work (runs in the parent or in a pool worker)
+# ────────────────────────────────────────────────
+class ScanInputs(NamedTuple):
+    """What a worker hands back for the universe-wide passes."""
+    panel:     SnapshotPanel              # [curr, prev]
+    roa_panel: SnapshotPanel              # son 4 dönem (ROA TTM)
+    ttm_fcf:   Optional[float] = None     # MOS için; hesaplanamadıysa None
+
+ScanResult = Tuple[Optional[dict], Optional[ScanInputs],
+                   Optional[str], Optional[str]]                     # (record, inputs, log, counter)
+
+def _scan_company(c: str, row: pd.DataFrame, forecast_years: int, n_sims: int,
+                  g_score: int, l_score: int) -> ScanResult:
+    """
+    Company-level part of the scan.  Graham / Lynch only need the radar row
+    and are computed for the whole universe up front (`g_score`, `l_score`);
+    F / M skorları ve MOS için yalnızca girdiler (paneller, TTM FCF) döner;
+    `_batch_scores` / `_batch_mos` tüm şirketleri tek geçişte hesaplar.
+    """
+    try:
+        bal, inc, cash    = load_financial_data(c)
+
+        if bal is None or inc is None or cash is None or bal.empty or inc.empty or cash.empty:
+            # Teknik loglama için
+            logger.warning(f"{c}: Finansal veri setlerinden biri (bilanço, gelir, nakit akış) boş veya eksik. Şirket atlanıyor.")
+            # UI'da göstermek için log listesine ekle; atlanan şirket "diğer" sayacına
+            return None, None, f"{c}: Gerekli finansal veri (bilanço/gelir/nakit) bulunamadı, atlandı.", "diğer"
+
+        periods           = latest_common_period(bal, inc, cash)
+        if len(periods) < 2:
+            raise ValueError("ortak dönem yok")
+        curr, prev        = periods[:2]
+
+        panel             = build_snapshots(bal, inc, cash, periods=[curr, prev])
+        roa_panel         = roa_ttm_panel(inc, bal)
+        ttm_fcf           = None
+
+        record = {
+            "hisse": c,
+            "f_skor": None,     # _batch_scores doldurur
+            "m_skor": None,
+            "graham": g_score,
+            "lynch":  l_score,
+        }
+
+        # Optional MOS branch (Trap Radar view)
+        if forecast_years and n_sims:
+            try:
+                df_fcf   = fcf_detailed_analysis(c, row)
+                if df_fcf is None or df_fcf.empty:
+                    raise ValueError("FCF verileri eksik.")
+
+                ttm_fcf  = (df_fcf["FCF"].iloc[-4:].sum()
+                            if len(df_fcf) >= 4 else df_fcf["FCF"].iloc[-1])
+                if ttm_fcf <= 0:
+                    ttm_fcf = None
+                    raise ValueError("Son FCF negatif.")
+            except Exception as mos_error:
+                logger.warning(f"{c}: MOS hesaplanamadı → {mos_error}")
+
+        return record, ScanInputs(panel, roa_panel, ttm_fcf), None, None
+
+    except Exception as exc:
+        logger.warning(f"{c}: {exc}")
+        return None, None, f"{c}: {exc}", _error_category(exc)
+
+def _batch_scores(radar: RadarTable, inputs: Dict[str, ScanInputs]) -> Dict[str, Tuple]:
+    """{ticker: (f_skor, m_skor)} – Piotroski / Beneish over the stacked panels."""
+    if not inputs:
+        return {}
+    tickers = list(inputs)
+    stack   = stack_panels({c: x.panel for c, x in inputs.items()}, 2)
+    roa     = roa_ttm_batch(stack_panels({c: x.roa_panel for c, x in inputs.items()}, 4))
+
+    pos = [radar.position(c) for c in tickers]
+    try:
+        net_profit = radar.column("Net Dönem Karı")[pos]
+        ocf        = radar.column("İşletme Faaliyetlerinden Nakit Akışları")[pos]
+        f_scores, _ = piotroski_f_scores(stack, net_profit, ocf, roa)
+    except KeyError as e:
+        logger.warning(f"F-Skor hesaplanamadı: radar kolonu yok → {e}")
+        f_scores = np.full(len(tickers), np.nan)
+    m_scores = beneish_m_scores(stack)
+
+    out = {}
+    for c, f, m in zip(tickers, f_scores, m_scores):
+        if np.isnan(m):
+            logger.warning(f"{c}: Beneish M-Score hesaplanamadı")
+        out[c] = (None if np.isnan(f) else int(f),
+                  None if np.isnan(m) else float(m))
+    return out
+
+def _batch_mos(radar: RadarTable, ttm_fcfs: Dict[str, float],
+               forecast_years: int, n_sims: int, seed: Optional[int],
+               rel_tol: Optional[float] = None) -> Dict[str, dict]:
+    """
+    {ticker: MOS kolonları} – one Monte Carlo DCF for every company with a
+    positive TTM FCF (common scenarios, see `monte_carlo_dcf_batch`).
+    """
+    if not ttm_fcfs:
+        return {}
+    tickers = list(ttm_fcfs)
+    pos = [radar.position(c) for c in tickers]
+    try:
+        cur_price  = radar.column("Son Fiyat")[pos]
+        market_cap = radar.column("Piyasa Değeri")[pos]
+    except KeyError as e:
+        logger.warning(f"MOS hesaplanamadı: radar kolonu yok → {e}")
+        return {}
+
+    intrinsic = monte_carlo_dcf_batch(
+        np.fromiter(ttm_fcfs.values(), dtype=float, count=len(tickers)),
+        forecast_years=forecast_years, n_sims=n_sims, seed=seed, quantiles=(0.5,),
+        rel_tol=rel_tol,
+    )[:, 0]
+
+    # Fiyat NaN ise MOS da NaN (eski `cur_price and ...` davranışı)
+    ok = (cur_price != 0) & (market_cap > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        intrinsic_ps = intrinsic / (market_cap / cur_price)
+        premium      = (intrinsic_ps - cur_price) / cur_price
+
+    return {
+        c: {
+            "icsel_deger_medyan": float(intrinsic[i]),
+            "piyasa_degeri":      float(market_cap[i]),
+            "MOS":                float(premium[i]),
+        }
+        for i, c in enumerate(tickers) if ok[i]
+    }
 
 # ────────────────────────────────────────────────
 # Generic scanner
 # ────────────────────────────────────────────────
 def run_scan(
-        radar: pd.DataFrame,
+        radar: Union[RadarTable, pd.DataFrame],
         *,
         forecast_years: int = 5,   # default 5 yıl
-        n_sims: int = 1000         # default 1000 simülasyon
+        n_sims: int = 1000,        # default 1000 simülasyon
+        workers: Optional[int] = None,
+        progress: Optional[Callable[[int, int, str], None]] = None,
+        store: Optional[ScoreStore] = None,
+        seed: Optional[int] = 42,
+        rel_tol: Optional[float] = None,
 ) -> Tuple[pd.DataFrame, List[str], Dict]:
     """
     If `forecast_years`+`n_sims` are given, the scan also
     calculates intrinsic value & MOS (Trap_Radar use-case).
     Otherwise it only returns the core F/M/L/G scores
     (Financial Radar use-case).
+
+    `radar` may be a `RadarTable` or the raw radar DataFrame.
+
+    `workers > 1` distributes companies over a process pool; results are
+    merged as they complete but `records` / `logs` keep radar order, so the
+    output is identical to the serial scan.  `progress(done, total, ticker)`
+    is called after every company.
+
+    With a `store`, companies whose workbook, radar row and scan parameters
+    are unchanged since the last scan are taken from the store instead of
+    being recomputed; `logs` / `counters` then only cover recomputed ones.
+    The store's market / sector peer ranks (`peer_ranks`) are refreshed too.
+
+    MOS comes from a single `monte_carlo_dcf_batch` call: every company is
+    valued on the same `seed`-determined scenarios, so results do not
+    depend on `workers` or on which other companies are scanned
+    (`seed=None` → non-reproducible draws).  With `rel_tol` the scenario
+    count is adaptive: simulation stops once the median's standard error is
+    within `rel_tol` (relative), `n_sims` being the upper bound.
     """
-    records, logs = [], []
+    logs = []
     counters = {"dönem": 0, "fcf": 0, "piyasa": 0, "diğer": 0}
 
-    companies = radar["Şirket"].dropna().unique()
+    radar     = RadarTable.wrap(radar)
+    companies = radar.tickers
+    rows      = radar.rows(companies)
 
-    for c in companies:
-        try:
-            row               = radar[radar["Şirket"] == c]
-            
-            bal, inc, cash    = load_financial_data(c)
-            
-            if bal is None or inc is None or cash is None or bal.empty or inc.empty or cash.empty:
-                # Teknik loglama için
-                logger.warning(f"{c}: Finansal veri setlerinden biri (bilanço, gelir, nakit akış) boş veya eksik. Şirket atlanıyor.")
-                # UI'da göstermek için log listesine ekle
-                logs.append(f"{c}: Gerekli finansal veri (bilanço/gelir/nakit) bulunamadı, atlandı.")
-                counters["diğer"] += 1 # Atlanan şirketleri sayaca ekle
-                continue  # Bu şirketi işlemeyi bırak ve döngüde bir sonrakine geç
-
-            periods           = latest_common_period(bal, inc, cash)
-            if len(periods) < 2:
-                raise ValueError("ortak dönem yok")
-            curr, prev        = periods[:2]
-
-            f_score, *_        = piotroski.PiotroskiScorer(row, bal, inc,
-                                                          curr, prev).calculate()
-            m_score, *_       = beneish.BeneishScorer(c, bal, inc, cash,
-                                                     curr, prev).calculate()
-            g_score, *_       = graham.GrahamScorer(row).calculate()
-            l_score, *_       = lynch.LynchScorer(row).calculate()
-
-            record = {
-                "hisse": c,
-                "f_skor": f_score,
-                "m_skor": m_score,
-                "graham": g_score,
-                "lynch":  l_score,
-            }
+    cached: Dict[str, dict] = {}
+    keys = {}
+    if store is not None:
+        params = {"forecast_years": forecast_years, "n_sims": n_sims, "seed": seed,
+                  "rel_tol": rel_tol, "version": SCAN_VERSION}
+        keys   = {c: scan_key(c, rows[c], params) for c in companies}
+        cached = store.fetch(keys)
+        logger.info(f"{len(cached)}/{len(companies)} şirket skor deposundan alındı.")
 
-            # Optional MOS branch (Trap Radar view)
-            if forecast_years and n_sims:
+    # Radar-only skorlar tüm evren için tek geçişte; satır başına ilk kayıt (row.iloc[0])
+    g_all = graham.graham_score_vectorised(radar)
+    l_all = lynch.lynch_score_vectorised(radar)
+
+    jobs = [
+        (c, rows[c], int(g_all[radar.position(c)]), int(l_all[radar.position(c)]))
+        for c in companies if c not in cached
+    ]
+    results: List[Optional[ScanResult]] = [None] * len(jobs)
+
+    if workers and workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_scan_company, c, row, forecast_years, n_sims, g, l): i
+                for i, (c, row, g, l) in enumerate(jobs)
+            }
+            for done, fut in enumerate(as_completed(futures), 1):
+                i = futures[fut]
+                c = jobs[i][0]
                 try:
-                    df_fcf   = fcf_detailed_analysis(c, row)
-                    if df_fcf is None or df_fcf.empty:
-                        raise ValueError("FCF verileri eksik.")
-
-                    ttm_fcf  = (df_fcf["FCF"].iloc[-4:].sum()
-                                if len(df_fcf) >= 4 else df_fcf["FCF"].iloc[-1])
-                    if ttm_fcf <= 0:
-                        raise ValueError("Son FCF negatif.")
-
-                    intrinsic = np.median(
-                        monte_carlo_dcf_simple(ttm_fcf,
-                                            forecast_years=forecast_years,
-                                            n_sims=n_sims)
-                    )
-
-                    cur_price   = row.get("Son Fiyat").iat[0]
-                    market_cap  = row.get("Piyasa Değeri").iat[0]
-                    if cur_price and market_cap and market_cap > 0:
-                        shares_out = market_cap / cur_price
-                        intrinsic_ps = intrinsic / shares_out
-                        premium = (intrinsic_ps - cur_price) / cur_price
-
-                        record.update({
-                            "icsel_deger_medyan": intrinsic,    # Güncellendi
-                            "piyasa_degeri":      market_cap,   # Güncellendi
-                            "MOS":                premium,      # Zaten doğru
-                        })
-                except Exception as mos_error:
-                    logger.warning(f"{c}: MOS hesaplanamadı → {mos_error}")
-            
-            records.append(record)
-
-        except ValueError as exc:
-            msg = str(exc).lower()
-            if "dönem" in msg:
-                counters["dönem"] += 1
-            elif "fcf" in msg:
-                counters["fcf"] += 1
-            elif "piyasa" in msg:
-                counters["piyasa"] += 1
-            else:
-                counters["diğer"] += 1
-            
-            logger.warning(f"{c}: {exc}")
-            logs.append(f"{c}: {exc}")
-        except Exception as exc:
-            counters["diğer"] += 1
-            logger.warning(f"{c}: {exc}")
-            logs.append(f"{c}: {exc}")
+                    results[i] = fut.result()
+                except Exception as exc:          # ör. worker süreci çöktü
+                    logger.warning(f"{c}: {exc}")
+                    results[i] = (None, None, f"{c}: {exc}", "diğer")
+                if progress:
+                    progress(done, len(jobs), c)
+    else:
+        for i, (c, row, g, l) in enumerate(jobs):
+            results[i] = _scan_company(c, row, forecast_years, n_sims, g, l)
+            if progress:
+                progress(i + 1, len(jobs), c)
+
+    fresh, inputs = {}, {}
+    for (c, *_), (record, inp, log, counter) in zip(jobs, results):
+        if record is not None:
+            fresh[c] = record
+            inputs[c] = inp
+        if log is not None:
+            logs.append(log)
+        if counter is not None:
+            counters[counter] += 1
+
+    for c, (f_score, m_score) in _batch_scores(radar, inputs).items():
+        fresh[c]["f_skor"], fresh[c]["m_skor"] = f_score, m_score
+
+    if forecast_years and n_sims:
+        ttm_fcfs = {c: x.ttm_fcf for c, x in inputs.items() if x.ttm_fcf is not None}
+        for c, mos in _batch_mos(radar, ttm_fcfs, forecast_years, n_sims, seed, rel_tol).items():
+            fresh[c].update(mos)
+
+    if store is not None:
+        store.save((c, keys[c], record) for c, record in fresh.items())
+
+    records = [fresh.get(c) or cached[c] for c in companies if c in fresh or c in cached]
 
     df = pd.DataFrame(records)
 
@@ -149,4 +303,11 @@ def run_scan(
     if "MOS" in df.columns:
         df.sort_values("MOS", ascending=False, inplace=True)
 
+    if store is not None and not df.empty:
+        # Piyasa / sektör sıralaması skor deposunun yanında; yalnızca değişen gruplar
+        try:
+            update_peer_ranks(df, radar, store.path)
+        except Exception as e:
+            logger.warning(f"Akran sıralaması güncellenemedi: {e}")
+
     return df, logs, counters
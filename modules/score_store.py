@@ -0,0 +1,146 @@
+"""
+Persistent per-ticker score store for incremental radar scans.
+
+Each scanned company is saved together with the inputs it was computed
+from: the workbook fingerprint (path, mtime, size), a hash of its radar
+row and the scan parameters.  `run_scan(..., store=ScoreStore())` only
+recomputes tickers whose key changed and merges the rest from here.
+"""
+
+import hashlib
+import json
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from config import SCORES_DB
+from modules.data_loader import company_path
+from modules.workbook_cache import workbook_fingerprint
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scan_scores (
+    ticker      TEXT NOT NULL,
+    params      TEXT NOT NULL,
+    workbook    TEXT NOT NULL,
+    radar_hash  TEXT NOT NULL,
+    record      TEXT NOT NULL,
+    updated_at  TEXT NOT NULL,
+    PRIMARY KEY (ticker, params)
+)
+"""
+
+
+@dataclass(frozen=True)
+class ScanKey:
+    workbook:   str     # "mtime_ns:size" – dosya yoksa ""
+    radar_hash: str
+    params:     str
+
+
+def radar_row_hash(row: pd.DataFrame) -> str:
+    payload = row.to_json(orient="values", double_precision=15, date_format="iso")
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def workbook_key(ticker: str) -> str:
+    try:
+        _, mtime_ns, size = workbook_fingerprint(company_path(ticker))
+    except FileNotFoundError:
+        return ""
+    return f"{mtime_ns}:{size}"
+
+
+def scan_key(ticker: str, row: pd.DataFrame, params: dict) -> ScanKey:
+    return ScanKey(
+        workbook=workbook_key(ticker),
+        radar_hash=radar_row_hash(row),
+        params=json.dumps(params, sort_keys=True),
+    )
+
+
+def _json_default(o):
+    # numpy skalerleri (np.float64, np.int64, …) ve zaman damgaları
+    if hasattr(o, "item"):
+        return o.item()
+    return str(o)
+
+
+class ScoreStore:
+    def __init__(self, path: Path = SCORES_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as con:
+            con.execute(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        con = sqlite3.connect(self.path)
+        try:
+            with con:              # commit / rollback
+                yield con
+        finally:
+            con.close()
+
+    def fetch(self, keys: Dict[str, ScanKey]) -> Dict[str, dict]:
+        """Return stored records whose inputs still match `keys`."""
+        if not keys:
+            return {}
+        params = {k.params for k in keys.values()}
+        hits: Dict[str, dict] = {}
+        with self._connect() as con:
+            for p in params:
+                rows = con.execute(
+                    "SELECT ticker, workbook, radar_hash, record FROM scan_scores WHERE params = ?",
+                    (p,),
+                )
+                for ticker, workbook, radar_hash, record in rows:
+                    key = keys.get(ticker)
+                    if (key is not None and key.params == p and key.workbook
+                            and key.workbook == workbook and key.radar_hash == radar_hash):
+                        hits[ticker] = json.loads(record)
+        return hits
+
+    def save(self, items: Iterable[Tuple[str, ScanKey, dict]]):
+        now = datetime.now().isoformat(timespec="seconds")
+        rows = [
+            (ticker, key.params, key.workbook, key.radar_hash,
+             json.dumps(record, default=_json_default, ensure_ascii=False), now)
+            for ticker, key, record in items
+            if key.workbook
+        ]
+        if not rows:
+            return
+        with self._connect() as con:
+            con.executemany(
+                "INSERT OR REPLACE INTO scan_scores "
+                "(ticker, params, workbook, radar_hash, record, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def latest(self, tickers: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Most recently saved record of every ticker (any scan parameters) as
+        the DataFrame `run_scan` returns – for screening without a rescan.
+        Records are not checked against the current workbooks / radar.
+        """
+        with self._connect() as con:
+            rows = con.execute(
+                "SELECT ticker, record FROM scan_scores ORDER BY updated_at, rowid"
+            ).fetchall()
+        newest = {ticker: record for ticker, record in rows}      # sonraki kayıt öncekini ezer
+        order = list(tickers) if tickers is not None else sorted(newest)
+        return pd.DataFrame([json.loads(newest[t]) for t in order if t in newest])
+
+    def clear(self):
+        with self._connect() as con:
+            con.execute("DELETE FROM scan_scores")
+
+    def __len__(self) -> int:
+        with self._connect() as con:
+            return con.execute("SELECT COUNT(*) FROM scan_scores").fetchone()[0]
@@ -1,5 +1,6 @@
 from .piotroski import PiotroskiScorer
 from .beneish import BeneishScorer
-from .graham import GrahamScorer
-from .lynch import LynchScorer
+from .graham import GrahamScorer, graham_score_vectorised
+from .lynch import LynchScorer, lynch_score_vectorised
 from .aggregator import ScoreAggregator
+from .batch import stack_panels, piotroski_f_scores, beneish_m_scores
@@ -0,0 +1,190 @@
+"""
+Batched Piotroski F-Score / Beneish M-Score over many companies.
+
+The per-company scorers read a `SnapshotPanel` for `[curr, prev]` and
+combine its two columns with scalar `safe_divide` calls.  Here the panels
+of the whole universe are stacked into `(n_tickers, n_periods)` arrays and
+every signal / index is one masked array expression with the same
+NaN / zero-denominator semantics (`safe_divide_array`).
+
+Where `calculate_piotroski_f_score` / `calculate_beneish_m_score` would
+return None, the batched result is NaN.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from modules.financial_snapshot import SnapshotPanel
+from modules.utils import safe_divide_array, round_array
+
+CURR, PREV = 0, 1
+
+F_SIGNALS = (
+    "Net Kar > 0",
+    "ROA > 0",
+    "Nakit Akışı > 0",
+    "Nakit Akışı > Net Kar",
+    "Borç Oranı Azalmış",
+    "Cari Oran Artmış",
+    "Öz Kaynak Artmış",
+    "Brüt Kar Marjı Artmış",
+    "Varlık Devir Hızı Artmış",
+)
+
+
+@dataclass
+class PanelStack:
+    """
+    SnapshotPanel'ler alt alta: her alan `(n_tickers, n_periods)` float matrisi.
+
+    * `valid[i, j]` → i. şirketin j. dönemi var mı (kısa paneller sağdan doldurulur)
+    * `ok[i]`       → i. şirketin paneli verildi mi
+    """
+    tickers: List[str]
+    arrays:  Dict[str, np.ndarray]
+    found:   Dict[str, np.ndarray] = field(repr=False, default_factory=dict)
+    valid:   np.ndarray = field(repr=False, default=None)
+    ok:      np.ndarray = field(repr=False, default=None)
+
+    def __getattr__(self, name):
+        arrays = self.__dict__.get("arrays", {})
+        if name in arrays:
+            return arrays[name]
+        raise AttributeError(name)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+
+def stack_panels(panels: Mapping[str, Optional[SnapshotPanel]],
+                 n_periods: Optional[int] = None) -> PanelStack:
+    """
+    Stack per-ticker panels (None → eksik şirket) into one `PanelStack`.
+    Fields a panel does not have (e.g. no cash-flow) stay NaN / not found.
+    """
+    tickers = list(panels)
+    given   = [p for p in panels.values() if p is not None]
+    if n_periods is None:
+        n_periods = max((len(p.periods) for p in given), default=0)
+    names = list(dict.fromkeys(n for p in given for n in p.arrays))
+
+    shape  = (len(tickers), n_periods)
+    arrays = {n: np.full(shape, np.nan) for n in names}
+    found  = {n: np.zeros(shape, dtype=bool) for n in names}
+    valid  = np.zeros(shape, dtype=bool)
+    ok     = np.zeros(len(tickers), dtype=bool)
+
+    for i, p in enumerate(panels.values()):
+        if p is None:
+            continue
+        k = min(len(p.periods), n_periods)
+        ok[i], valid[i, :k] = True, True
+        for n, arr in p.arrays.items():
+            if arr is not None:
+                arrays[n][i, :k] = arr[:k]
+                found[n][i, :k]  = p.found[n][:k]
+
+    return PanelStack(tickers, arrays, found, valid, ok)
+
+
+# ────────────────────────────────────────────────
+# ROA (TTM)
+# ────────────────────────────────────────────────
+def roa_ttm_batch(stack: PanelStack) -> np.ndarray:
+    """`calculate_roa_ttm` for every row of a stack built from `roa_ttm_panel`s."""
+    net    = np.where(stack.valid, stack.net_profit, 0.0).sum(axis=1)
+    assets = stack.total_assets
+    positive   = np.where(stack.valid, assets > 0, True).all(axis=1)
+    avg_assets = np.where(stack.valid, assets, 0.0).sum(axis=1) / 4
+
+    use = stack.ok & positive & (avg_assets != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roa = net / np.where(use, avg_assets, 1.0) * 100
+    return np.where(use, roa, 0.0)
+
+
+# ────────────────────────────────────────────────
+# Piotroski
+# ────────────────────────────────────────────────
+def piotroski_f_scores(stack: PanelStack,
+                       net_profit: np.ndarray,
+                       operating_cash_flow: np.ndarray,
+                       roa: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    F-Skor for every row of a `[curr, prev]` stack.
+
+    `net_profit` / `operating_cash_flow` are the radar columns and `roa`
+    the TTM ROA, all aligned with `stack.tickers`.  Returns
+    `(scores, signals)`: float scores (NaN → hesaplanamadı) and one bool
+    array per `F_SIGNALS` entry.
+    """
+    net_profit          = np.asarray(net_profit, dtype=float)
+    operating_cash_flow = np.asarray(operating_cash_flow, dtype=float)
+
+    leverage      = safe_divide_array(stack.short_term_liabilities + stack.long_term_liabilities,
+                                      stack.total_assets)
+    current_ratio = safe_divide_array(stack.current_assets, stack.short_term_liabilities)
+    gp_margin     = safe_divide_array(stack.gross_profit, stack.revenue)
+    turnover      = safe_divide_array(stack.revenue, stack.total_assets)
+    eq_curr, eq_prev = stack.equity[:, CURR], stack.equity[:, PREV]
+
+    # NaN karşılaştırmaları False → eksik veri puan getirmez
+    signals = dict(zip(F_SIGNALS, (
+        net_profit > 0,
+        np.asarray(roa) > 0,
+        operating_cash_flow > 0,
+        operating_cash_flow > net_profit,
+        leverage[:, CURR] < leverage[:, PREV],
+        current_ratio[:, CURR] > current_ratio[:, PREV],
+        (eq_curr != 0) & (eq_prev != 0) & (eq_curr >= eq_prev),
+        gp_margin[:, CURR] > gp_margin[:, PREV],
+        turnover[:, CURR] > turnover[:, PREV],
+    )))
+
+    scores = np.sum(list(signals.values()), axis=0).astype(float)
+    scores[~(stack.ok & stack.valid[:, :2].all(axis=1))] = np.nan
+    return scores, signals
+
+
+# ────────────────────────────────────────────────
+# Beneish
+# ────────────────────────────────────────────────
+def _ratio(curr_prev: np.ndarray, reverse: bool = False) -> np.ndarray:
+    """safe_divide(curr, prev) – `reverse` → safe_divide(prev, curr)."""
+    a, b = curr_prev[:, CURR], curr_prev[:, PREV]
+    return safe_divide_array(b, a) if reverse else safe_divide_array(a, b)
+
+
+def beneish_indices(stack: PanelStack) -> Dict[str, np.ndarray]:
+    """The eight Beneish indices for every row of a `[curr, prev]` stack."""
+    s = stack
+    with np.errstate(divide="ignore", invalid="ignore"):
+        leverage = s.total_liabilities / s.total_assets
+    return {
+        "DSRI": _ratio(safe_divide_array(s.trade_receivables, s.sales)),
+        "GMI":  _ratio(safe_divide_array(s.sales - s.cogs, s.sales), reverse=True),
+        "AQI":  _ratio(1 - safe_divide_array(s.current_assets + s.pp_e, s.total_assets)),
+        "SGI":  _ratio(s.sales),
+        "DEPI": _ratio(safe_divide_array(s.depreciation, s.depreciation + s.pp_e), reverse=True),
+        "SGAI": _ratio(safe_divide_array(s.g_and_a_exp + s.marketing_exp, s.sales)),
+        "TATA": safe_divide_array(s.net_profit - s.operating_cash_flow, s.total_assets)[:, CURR],
+        "LVGI": _ratio(leverage),
+    }
+
+
+def beneish_m_scores(stack: PanelStack) -> np.ndarray:
+    """M-Skor (2 haneye yuvarlanmış) for every row; NaN where it cannot be computed."""
+    idx = beneish_indices(stack)
+    m = (
+        -4.84 + 0.92 * idx["DSRI"] + 0.528 * idx["GMI"] + 0.404 * idx["AQI"]
+        + 0.892 * idx["SGI"] + 0.115 * idx["DEPI"] - 0.172 * idx["SGAI"]
+        + 4.679 * idx["TATA"] - 0.327 * idx["LVGI"]
+    )
+
+    # LVGI düz bölme: varlık kalemi yok ve yükümlülük 0 ise skor hesaplanamaz
+    pair = stack.valid[:, :2]
+    lvgi_ok = ((stack.found["total_assets"] | stack.found["total_liabilities"])[:, :2] | ~pair).all(axis=1)
+    m[~(stack.ok & pair.all(axis=1) & lvgi_ok)] = np.nan
+    return round_array(m, 2)
@@ -1,45 +1,44 @@
-from modules.utils import safe_divide
-from modules.financial_snapshot import build_snapshot
+import numpy as np
+from modules.utils import safe_divide, safe_divide_array
+from modules.financial_snapshot import build_snapshots
 from modules.logger import logger
 
 def calculate_beneish_m_score(company, balance, income, cashflow, curr, prev):
     try:
-        #Gerekli kalemleri al
-        snap_curr = build_snapshot(balance, income, cashflow, period=curr)
-        snap_prev = build_snapshot(balance, income, cashflow, period=prev)
+        # Gerekli kalemleri al: her alan [curr, prev] vektörü
+        p = build_snapshots(balance, income, cashflow, periods=[curr, prev])
 
         # 1. DSRI
-        DSRI = safe_divide(safe_divide(snap_curr.trade_receivables, snap_curr.sales), safe_divide(snap_prev.trade_receivables, snap_prev.sales))
-        
+        DSRI = safe_divide(*safe_divide_array(p.trade_receivables, p.sales))
+
         # 2. GMI
-        GMI = safe_divide(safe_divide(snap_prev.sales - snap_prev.cogs, snap_prev.sales),
-                          safe_divide(snap_curr.sales - snap_curr.cogs, snap_curr.sales))
-        
+        gross_margin = safe_divide_array(p.sales - p.cogs, p.sales)
+        GMI = safe_divide(gross_margin[1], gross_margin[0])
+
         # 3. AQI
-        aqi_curr = 1 - safe_divide(snap_curr.current_assets + snap_curr.pp_e, snap_curr.total_assets)
-        aqi_prev = 1 - safe_divide(snap_prev.current_assets + snap_prev.pp_e, snap_prev.total_assets)
-        AQI = safe_divide(aqi_curr, aqi_prev)
+        aqi = 1 - safe_divide_array(p.current_assets + p.pp_e, p.total_assets)
+        AQI = safe_divide(*aqi)
 
         # 4. SGI
-        SGI = safe_divide(snap_curr.sales, snap_prev.sales)
-        
+        SGI = safe_divide(*p.sales)
+
         # 5. DEPI
-        depi_curr = safe_divide(snap_curr.depreciation, snap_curr.depreciation + snap_curr.pp_e)
-        depi_prev = safe_divide(snap_prev.depreciation, snap_prev.depreciation + snap_prev.pp_e)
-        DEPI = safe_divide(depi_prev, depi_curr)
-         
+        depi = safe_divide_array(p.depreciation, p.depreciation + p.pp_e)
+        DEPI = safe_divide(depi[1], depi[0])
+
         # 6. SGAI
-        sgai_numerator = safe_divide((snap_curr.g_and_a_exp + snap_curr.marketing_exp), snap_curr.sales)
-        sgai_denominator = safe_divide((snap_prev.g_and_a_exp + snap_prev.marketing_exp), snap_prev.sales)
-        SGAI = safe_divide(sgai_numerator, sgai_denominator)
+        sgai = safe_divide_array(p.g_and_a_exp + p.marketing_exp, p.sales)
+        SGAI = safe_divide(*sgai)
 
-        
         # 7. TATA
-        TATA = safe_divide(snap_curr.net_profit - snap_curr.operating_cash_flow, snap_curr.total_assets) if None not in (
-            snap_curr.net_profit, snap_curr.operating_cash_flow, snap_curr.total_assets) else 0
-        
-        # 8. LVGI
-        LVGI = safe_divide(snap_curr.total_liabilities / snap_curr.total_assets, snap_prev.total_liabilities / snap_prev.total_assets)
+        TATA = safe_divide_array(p.net_profit - p.operating_cash_flow, p.total_assets)[0]
+
+        # 8. LVGI – düz bölme; varlık kalemi yok ve yükümlülük 0 ise skor hesaplanamaz
+        if not (p.found["total_assets"] | p.found["total_liabilities"]).all():
+            raise ZeroDivisionError("Toplam Varlıklar / Yükümlülükler bulunamadı")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            leverage = p.total_liabilities / p.total_assets
+        LVGI = safe_divide(*leverage)
 
         m_score = (
             -4.84 + 0.92 * DSRI + 0.528 * GMI + 0.404 * AQI + 0.892 * SGI +
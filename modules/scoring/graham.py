@@ -1,4 +1,6 @@
+import numpy as np
 import pandas as pd
+from modules.utils import round_array
 
 def graham_score(row):
     if not row.empty:
@@ -41,6 +43,41 @@ def graham_score_card(row):
     return score, description, lines
 
 
+def _radar_column(radar_df, name: str) -> np.ndarray:
+    """Float column from a radar DataFrame or RadarTable."""
+    if hasattr(radar_df, "column"):
+        return radar_df.column(name)
+    return pd.to_numeric(radar_df[name], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+def graham_score_vectorised(radar_df) -> np.ndarray:
+    """
+    Graham skoru tüm radar satırları için tek geçişte (graham_score_card ile aynı kriterler).
+    Returns an int array aligned with the rows of `radar_df`.
+    """
+    def column(name):
+        try:
+            return _radar_column(radar_df, name)
+        except KeyError:
+            return np.full(len(radar_df), np.nan)
+
+    pe      = round_array(column("F/K"))
+    pb      = round_array(column("PD/DD"))
+    current = round_array(column("Cari Oran"))
+    ocf     = column("İşletme Faaliyetlerinden Nakit Akışları")
+    fcf     = column("Yıllıklandırılmış Serbest Nakit Akışı")
+
+    # NaN karşılaştırmaları False → eksik veri puan getirmez
+    criteria = (
+        pe < 15,
+        pb < 1.5,
+        (current > 2) & (current < 100),
+        ocf > 0,
+        fcf > 0,
+    )
+    return np.sum(criteria, axis=0).astype(int)
+
+
 class GrahamScorer:
     def __init__(self, row):
         self.row = row
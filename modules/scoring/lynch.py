@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
 from modules.utils import safe_float
+from modules.scoring.graham import _radar_column
 
 def peter_lynch_score_card(row):
     row = row.iloc[0]
@@ -45,6 +47,33 @@ def peter_lynch_score_card(row):
 
 
 
+def lynch_score_vectorised(radar_df) -> np.ndarray:
+    """
+    Peter Lynch skoru tüm radar satırları için tek geçişte (peter_lynch_score_card ile aynı kriterler).
+    Returns an int array aligned with the rows of `radar_df`.
+    """
+    def column(name):
+        try:
+            return _radar_column(radar_df, name)
+        except KeyError:
+            return np.full(len(radar_df), np.nan)
+
+    market_cap   = column("Piyasa Değeri")
+    operating_cf = column("İşletme Faaliyetlerinden Nakit Akışları")
+    fcf          = column("Yıllıklandırılmış Serbest Nakit Akışı")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fcf_yield = fcf / market_cap
+        pd_fcf    = market_cap / fcf
+
+    criteria = (
+        (market_cap > 0) & (fcf_yield >= 0.05),    # FCF Verimi
+        operating_cf > 0,                           # Nakit Akışı
+        ~np.isnan(market_cap) & (fcf > 0) & (pd_fcf <= 15),   # PD/FCF
+    )
+    return np.sum(criteria, axis=0).astype(int)
+
+
 class LynchScorer:
     def __init__(self, row):
         self.row = row
@@ -1,6 +1,6 @@
-from modules.utils import scalar, period_order, safe_divide
+from modules.utils import scalar, safe_divide_array
 from modules.ratios import calculate_roa_ttm
-from modules.financial_snapshot import build_snapshot
+from modules.financial_snapshot import build_snapshots
 from modules.logger import logger
 
 
@@ -13,50 +13,39 @@ def calculate_piotroski_f_score(row, balance, income, curr, prev):
         detail_str = {}
 
         detail["Net Kar > 0"] = int(net_profit > 0)
-        roa = calculate_roa_ttm(income, balance, period_order)
+        roa = calculate_roa_ttm(income, balance)
         detail["ROA > 0"] = int(roa > 0)
         detail["Nakit Akışı > 0"] = int(operating_cash_flow > 0)
         detail["Nakit Akışı > Net Kar"] = int(operating_cash_flow > net_profit)
         f_score += sum(detail.values())
 
-        snap_curr = build_snapshot(balance, income, None, period=curr)
-        snap_prev = build_snapshot(balance, income, None, period=prev)
+        # curr / prev tek panelde: her oran [curr, prev] vektörü
+        panel = build_snapshots(balance, income, None, periods=[curr, prev])
 
         # Leverage Ratio
-        if None not in (snap_curr.short_term_liabilities, snap_curr.long_term_liabilities, snap_curr.total_assets,
-                        snap_prev.short_term_liabilities, snap_prev.long_term_liabilities, snap_prev.total_assets):
-            leverage_ratio_curr = safe_divide(
-                snap_curr.short_term_liabilities + snap_curr.long_term_liabilities,
-                snap_curr.total_assets
-            )
-            leverage_ratio_prev = safe_divide(
-                snap_prev.short_term_liabilities + snap_prev.long_term_liabilities,
-                snap_prev.total_assets
-            )
-            detail["Borç Oranı Azalmış"] = int(leverage_ratio_curr is not None and leverage_ratio_prev is not None and leverage_ratio_curr < leverage_ratio_prev)
-        else:
-            detail["Borç Oranı Azalmış"] = 0
-
+        leverage = safe_divide_array(
+            panel.short_term_liabilities + panel.long_term_liabilities,
+            panel.total_assets
+        )
+        detail["Borç Oranı Azalmış"] = int(leverage[0] < leverage[1])
         f_score += detail["Borç Oranı Azalmış"]
 
         # Current Ratio
-        curr_ratio = safe_divide(snap_curr.current_assets, snap_curr.short_term_liabilities)
-        prev_ratio = safe_divide(snap_prev.current_assets, snap_prev.short_term_liabilities)
-        detail["Cari Oran Artmış"] = int(curr_ratio is not None and prev_ratio is not None and curr_ratio > prev_ratio)
+        current_ratio = safe_divide_array(panel.current_assets, panel.short_term_liabilities)
+        detail["Cari Oran Artmış"] = int(current_ratio[0] > current_ratio[1])
         f_score += detail["Cari Oran Artmış"]
 
         # Equity
-        detail["Öz Kaynak Artmış"] = int(snap_curr.equity and snap_prev.equity and snap_curr.equity >= snap_prev.equity)
+        eq_curr, eq_prev = panel.equity
+        detail["Öz Kaynak Artmış"] = int(bool(eq_curr and eq_prev and eq_curr >= eq_prev))
         f_score += detail["Öz Kaynak Artmış"]
 
         # Margin & Turnover
-        gp_margin_curr = safe_divide(snap_curr.gross_profit, snap_curr.revenue)
-        gp_margin_prev = safe_divide(snap_prev.gross_profit, snap_prev.revenue)
-        turnover_curr = safe_divide(snap_curr.revenue, snap_curr.total_assets)
-        turnover_prev = safe_divide(snap_prev.revenue, snap_prev.total_assets)
+        gp_margin = safe_divide_array(panel.gross_profit, panel.revenue)
+        turnover  = safe_divide_array(panel.revenue, panel.total_assets)
 
-        detail["Brüt Kar Marjı Artmış"] = int(gp_margin_curr is not None and gp_margin_prev is not None and gp_margin_curr > gp_margin_prev)
-        detail["Varlık Devir Hızı Artmış"] = int(turnover_curr is not None and turnover_prev is not None and turnover_curr > turnover_prev)
+        detail["Brüt Kar Marjı Artmış"] = int(gp_margin[0] > gp_margin[1])
+        detail["Varlık Devir Hızı Artmış"] = int(turnover[0] > turnover[1])
 
         f_score += detail["Brüt Kar Marjı Artmış"] + detail["Varlık Devir Hızı Artmış"]
 
@@ -0,0 +1,479 @@
+"""
+Screening expressions over scores, radar columns and panel items.
+
+    table  = ScreenTable.from_sources(score_df, radar, panel, period="2024/12")
+    rows   = compile_screen("f_skor >= 7 and m_skor < -2.22 and FD/FAVÖK < 8").rows(table)
+    score_df.iloc[rows]
+
+Grammar (Turkish aliases in brackets):
+
+    expr     := term (or [veya] term)*
+    term     := factor (and [ve] factor)*
+    factor   := not [değil] factor | "(" expr ")" | operand (OP operand)+
+    operand  := number | column | `column with spaces` | kalem('Kalem', ['2024/9'])
+    OP       := >= <= > < == = !=
+
+`/` belongs to column names (`F/K`, `PD/DD`, `FD/FAVÖK`); names with spaces
+or `%` go in backticks.  Chained comparisons (`0 < F/K < 10`) are ANDs.
+`kalem('Satış Gelirleri')` is the panel value in the table's period.
+Comparisons with a missing (NaN) value are false, like pandas masks.
+
+Evaluation works on candidate row sets: `column OP number` predicates are
+answered from a per-column sorted index (`searchsorted`, built once per
+table column), an AND evaluates its most selective predicate first and
+tests the rest only on the surviving rows, and stops as soon as no row is
+left; an OR only tests rows not accepted yet.
+"""
+
+import difflib
+import operator
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from modules.periods import period_key
+
+SCORE_TICKER_COL = "hisse"
+
+_OPS = {
+    ">=": operator.ge, "<=": operator.le, ">": operator.gt, "<": operator.lt,
+    "==": operator.eq, "!=": operator.ne,
+}
+_FLIP = {">=": "<=", "<=": ">=", ">": "<", "<": ">", "==": "==", "!=": "!="}
+_KEYWORDS = {"and": "and", "ve": "and", "or": "or", "veya": "or", "not": "not", "değil": "not"}
+
+_TOKEN_RE = re.compile(r"""
+      (?P<ws>\s+)
+    | (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+    | (?P<string>'[^']*'|"[^"]*")
+    | (?P<quoted>`[^`]+`)
+    | (?P<op>>=|<=|!=|==|=|>|<)
+    | (?P<punct>[(),-])
+    | (?P<name>[^\W\d][\w/.%]*)
+""", re.VERBOSE)
+
+
+class ScreenError(ValueError):
+    """Geçersiz tarama ifadesi; mesaj kullanıcıya gösterilebilir."""
+
+
+# ────────────────────────────────────────────────
+# Parsing
+# ────────────────────────────────────────────────
+@dataclass(frozen=True)
+class _Token:
+    kind:  str
+    text:  str
+    pos:   int
+
+
+def _tokenize(expr: str) -> List[_Token]:
+    tokens, pos = [], 0
+    while pos < len(expr):
+        m = _TOKEN_RE.match(expr, pos)
+        if m is None:
+            raise ScreenError(f"{pos + 1}. karakterde beklenmeyen '{expr[pos]}'")
+        kind, text = m.lastgroup, m.group()
+        if kind == "name" and text.lower() in _KEYWORDS:
+            kind, text = "keyword", _KEYWORDS[text.lower()]
+        if kind != "ws":
+            tokens.append(_Token(kind, text, pos))
+        pos = m.end()
+    tokens.append(_Token("end", "", len(expr)))
+    return tokens
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+
+
+@dataclass(frozen=True)
+class Const:
+    value: float
+
+
+@dataclass(frozen=True)
+class Kalem:
+    name:   str
+    period: Optional[str] = None        # None → tablonun dönemi
+
+
+Operand = Union[Column, Const, Kalem]
+
+
+@dataclass(frozen=True)
+class Compare:
+    left:  Operand
+    op:    str
+    right: Operand
+
+
+@dataclass(frozen=True)
+class And:
+    children: Tuple
+
+
+@dataclass(frozen=True)
+class Or:
+    children: Tuple
+
+
+@dataclass(frozen=True)
+class Not:
+    child: object
+
+
+class _Parser:
+    def __init__(self, expr: str):
+        self.tokens = _tokenize(expr)
+        self.i = 0
+
+    def peek(self) -> _Token:
+        return self.tokens[self.i]
+
+    def take(self, kind: str, text: Optional[str] = None) -> _Token:
+        tok = self.peek()
+        if tok.kind != kind or (text is not None and tok.text != text):
+            want = text or {"end": "ifade sonu", "name": "kolon adı", "string": "metin"}.get(kind, kind)
+            got = tok.text or "ifade sonu"
+            raise ScreenError(f"{tok.pos + 1}. karakter: '{want}' beklenirken '{got}' bulundu")
+        self.i += 1
+        return tok
+
+    def accept(self, kind: str, text: Optional[str] = None) -> bool:
+        tok = self.peek()
+        if tok.kind == kind and (text is None or tok.text == text):
+            self.i += 1
+            return True
+        return False
+
+    def parse(self):
+        node = self.expr()
+        self.take("end")
+        return node
+
+    def expr(self):
+        children = [self.term()]
+        while self.accept("keyword", "or"):
+            children.append(self.term())
+        return children[0] if len(children) == 1 else Or(tuple(children))
+
+    def term(self):
+        children = [self.factor()]
+        while self.accept("keyword", "and"):
+            children.append(self.factor())
+        return children[0] if len(children) == 1 else And(tuple(children))
+
+    def factor(self):
+        if self.accept("keyword", "not"):
+            return Not(self.factor())
+        if self.accept("punct", "("):
+            node = self.expr()
+            self.take("punct", ")")
+            return node
+
+        left = self.operand()
+        compares = []
+        while self.peek().kind == "op":
+            op = self.take("op").text
+            right = self.operand()
+            compares.append(Compare(left, "==" if op == "=" else op, right))
+            left = right
+        if not compares:
+            tok = self.peek()
+            raise ScreenError(f"{tok.pos + 1}. karakter: karşılaştırma (>=, <, == …) bekleniyor")
+        return compares[0] if len(compares) == 1 else And(tuple(compares))
+
+    def operand(self) -> Operand:
+        tok = self.peek()
+        if self.accept("punct", "-"):
+            inner = self.operand()
+            if not isinstance(inner, Const):
+                raise ScreenError(f"{tok.pos + 1}. karakter: '-' yalnızca sayılarla kullanılabilir")
+            return Const(-inner.value)
+        if tok.kind == "number":
+            self.i += 1
+            return Const(float(tok.text))
+        if tok.kind == "quoted":
+            self.i += 1
+            return Column(tok.text[1:-1].strip())
+        if tok.kind == "name":
+            self.i += 1
+            if tok.text.lower() == "kalem" and self.accept("punct", "("):
+                name = self.take("string").text[1:-1]
+                period = self.take("string").text[1:-1] if self.accept("punct", ",") else None
+                self.take("punct", ")")
+                return Kalem(name.strip(), period)
+            return Column(tok.text)
+        raise ScreenError(f"{tok.pos + 1}. karakter: sayı ya da kolon adı beklenirken "
+                          f"'{tok.text or 'ifade sonu'}' bulundu")
+
+
+@lru_cache(maxsize=256)
+def compile_screen(expr: str) -> "Screen":
+    """Parse `expr` once (cached); raises `ScreenError` on syntax errors."""
+    if not expr.strip():
+        raise ScreenError("Boş ifade")
+    return Screen(expr, _Parser(expr).parse())
+
+
+# ────────────────────────────────────────────────
+# Table
+# ────────────────────────────────────────────────
+class _SortedColumn:
+    """Row order of one column by value; NaN rows sorted last and excluded."""
+
+    __slots__ = ("order", "sorted", "n_valid")
+
+    def __init__(self, values: np.ndarray):
+        self.order   = np.argsort(values, kind="stable")
+        self.sorted  = values[self.order]
+        self.n_valid = int(np.count_nonzero(~np.isnan(values)))
+
+    def bounds(self, op: str, c: float) -> Tuple[int, int]:
+        s = self.sorted[:self.n_valid]
+        if op == ">=":
+            return int(np.searchsorted(s, c, "left")), self.n_valid
+        if op == ">":
+            return int(np.searchsorted(s, c, "right")), self.n_valid
+        if op == "<=":
+            return 0, int(np.searchsorted(s, c, "right"))
+        if op == "<":
+            return 0, int(np.searchsorted(s, c, "left"))
+        return int(np.searchsorted(s, c, "left")), int(np.searchsorted(s, c, "right"))  # ==
+
+
+class ScreenTable:
+    """
+    Float column arrays aligned on `tickers`, plus lazily built sorted
+    indexes.  Build one per data snapshot and reuse it for every screen.
+    """
+
+    def __init__(self, tickers: Iterable[str], columns: Dict[str, np.ndarray],
+                 panel=None, period: Optional[str] = None):
+        self.tickers = np.asarray(list(tickers), dtype=object)
+        self.columns: Dict[str, np.ndarray] = {}
+        for name, values in columns.items():
+            values = np.asarray(values, dtype=float)
+            if len(values) != len(self.tickers):
+                raise ValueError(f"{name}: {len(values)} değer, {len(self.tickers)} şirket")
+            self.columns[name] = values
+        self.panel  = panel
+        self.period = period
+        self._lookup = {n.strip().casefold(): n for n in self.columns}
+        self._indexes: Dict[str, _SortedColumn] = {}
+        self._kalem: Dict[Tuple[str, str], np.ndarray] = {}
+
+    @classmethod
+    def from_sources(cls, scores: pd.DataFrame, radar=None, panel=None,
+                     period: Optional[str] = None) -> "ScreenTable":
+        """
+        One row per `scores` row (`hisse` column).  Numeric score columns
+        come first; radar columns are joined on the ticker (first radar
+        row, NaN when missing) unless a score column has the same name.
+        `panel` (a `PanelStore`) enables `kalem(...)` operands.
+        """
+        tickers = scores[SCORE_TICKER_COL].astype(str).to_numpy()
+        columns: Dict[str, np.ndarray] = {}
+        for name in scores.columns:
+            if name == SCORE_TICKER_COL or pd.api.types.is_datetime64_any_dtype(scores[name]):
+                continue
+            values = pd.to_numeric(scores[name], errors="coerce")
+            if pd.api.types.is_numeric_dtype(scores[name]) or values.notna().any():
+                columns[name] = values.to_numpy(dtype=float, na_value=np.nan)
+
+        if radar is not None:
+            pos = np.array([radar.position(t) if t in radar else -1 for t in tickers], dtype=int)
+            for name in radar.frame.columns:
+                if name in columns or not pd.api.types.is_numeric_dtype(radar.frame[name]):
+                    continue
+                values = radar.column(name)
+                columns[name] = np.where(pos >= 0, values[np.maximum(pos, 0)], np.nan) \
+                    if len(values) else np.full(len(tickers), np.nan)
+        return cls(tickers, columns, panel=panel, period=period)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __repr__(self) -> str:
+        return f"ScreenTable({len(self.tickers)} şirket, {len(self.columns)} kolon)"
+
+    # -------- column access ----------------------------------------------
+    def resolve(self, name: str) -> str:
+        if name in self.columns:
+            return name
+        found = self._lookup.get(name.strip().casefold())
+        if found is not None:
+            return found
+        close = difflib.get_close_matches(name, list(self.columns), n=3)
+        hint = f" (bunu mu demek istediniz: {', '.join(close)})" if close else ""
+        raise ScreenError(f"Bilinmeyen kolon: '{name}'{hint}")
+
+    def values(self, operand: Operand) -> np.ndarray:
+        if isinstance(operand, Column):
+            return self.columns[self.resolve(operand.name)]
+        return self.kalem(operand.name, operand.period)
+
+    def index(self, name: str) -> _SortedColumn:
+        ix = self._indexes.get(name)
+        if ix is None:
+            ix = self._indexes[name] = _SortedColumn(self.columns[name])
+        return ix
+
+    def kalem(self, name: str, period: Optional[str] = None) -> np.ndarray:
+        """Panel value of Kalem `name` for every row (NaN if absent)."""
+        period = period or self.period
+        if self.panel is None or period is None:
+            raise ScreenError("kalem(...) için panel ve dönem gerekli")
+        key = (name, str(period_key(period)))
+        arr = self._kalem.get(key)
+        if arr is None:
+            cs = self.panel.cross_section(name, period)
+            if cs.empty and name not in self.panel.kalem_names:
+                raise ScreenError(f"Panelde olmayan kalem: '{name}'")
+            arr = self._kalem[key] = cs.reindex(self.tickers).to_numpy(dtype=float, na_value=np.nan)
+        return arr
+
+
+# ────────────────────────────────────────────────
+# Evaluation
+# ────────────────────────────────────────────────
+_DENSE_SHARE = 16       # aday sayısı n/16'dan azsa dizin yerine doğrudan karşılaştır
+
+
+def _normalise(node: Compare) -> Compare:
+    """Constant on the right: `8 > FD/FAVÖK` → `FD/FAVÖK < 8`."""
+    if isinstance(node.left, Const) and not isinstance(node.right, Const):
+        return Compare(node.right, _FLIP[node.op], node.left)
+    return node
+
+
+class Screen:
+    """A compiled screening expression (see module docstring)."""
+
+    def __init__(self, expr: str, tree):
+        self.expr = expr
+        self.tree = tree
+
+    def __repr__(self) -> str:
+        return f"Screen({self.expr!r})"
+
+    @property
+    def columns(self) -> List[str]:
+        """Column names referenced by the expression."""
+        out: List[str] = []
+
+        def walk(node):
+            if isinstance(node, (And, Or)):
+                for c in node.children:
+                    walk(c)
+            elif isinstance(node, Not):
+                walk(node.child)
+            elif isinstance(node, Compare):
+                for side in (node.left, node.right):
+                    if isinstance(side, Column) and side.name not in out:
+                        out.append(side.name)
+        walk(self.tree)
+        return out
+
+    def validate(self, table: ScreenTable):
+        """Raise `ScreenError` if a referenced column / Kalem is unknown."""
+        def walk(node):
+            if isinstance(node, (And, Or)):
+                for c in node.children:
+                    walk(c)
+            elif isinstance(node, Not):
+                walk(node.child)
+            elif isinstance(node, Compare):
+                for side in (node.left, node.right):
+                    if not isinstance(side, Const):
+                        table.values(side)
+        walk(self.tree)
+
+    def rows(self, table: ScreenTable) -> np.ndarray:
+        """Sorted row positions of `table` that satisfy the expression."""
+        self.validate(table)
+        return self._eval(self.tree, table, None)
+
+    def mask(self, table: ScreenTable) -> np.ndarray:
+        out = np.zeros(len(table), dtype=bool)
+        out[self.rows(table)] = True
+        return out
+
+    # -------- evaluation -------------------------------------------------
+    # `cand`: artan sırada aday satırlar; None = tablonun tamamı
+    def _estimate(self, node, table: ScreenTable) -> int:
+        """Expected matches (exact for indexed range predicates)."""
+        if isinstance(node, Compare):
+            node = _normalise(node)
+            if isinstance(node.left, Column) and isinstance(node.right, Const) and node.op != "!=":
+                lo, hi = table.index(table.resolve(node.left.name)).bounds(node.op, node.right.value)
+                return max(hi - lo, 0)
+        return len(table)
+
+    def _eval(self, node, table: ScreenTable, cand: Optional[np.ndarray]) -> np.ndarray:
+        n = len(table)
+        if isinstance(node, And):
+            for child in sorted(node.children, key=lambda c: self._estimate(c, table)):
+                cand = self._eval(child, table, cand)
+                if len(cand) == 0:
+                    break           # kısa devre: kalan koşullar değerlendirilmez
+            return np.arange(n) if cand is None else cand
+
+        if isinstance(node, Or):
+            pool = np.arange(n) if cand is None else cand
+            hit = np.zeros(n, dtype=bool)
+            rest = pool
+            for child in node.children:
+                hit[self._eval(child, table, rest)] = True
+                rest = pool[~hit[pool]]
+                if len(rest) == 0:
+                    break           # kısa devre: tüm adaylar kabul edildi
+            return pool[hit[pool]]
+
+        if isinstance(node, Not):
+            pool = np.arange(n) if cand is None else cand
+            drop = np.zeros(n, dtype=bool)
+            drop[self._eval(node.child, table, pool)] = True
+            return pool[~drop[pool]]
+
+        return self._compare(_normalise(node), table, cand)
+
+    def _compare(self, node: Compare, table: ScreenTable, cand: Optional[np.ndarray]) -> np.ndarray:
+        n = len(table)
+        indexed = (isinstance(node.left, Column) and isinstance(node.right, Const)
+                   and node.op != "!=")
+        if indexed and (cand is None or len(cand) * _DENSE_SHARE >= n):
+            name = table.resolve(node.left.name)
+            ix = table.index(name)
+            lo, hi = ix.bounds(node.op, node.right.value)
+            rows = np.sort(ix.order[lo:hi]) if hi > lo else np.empty(0, dtype=np.intp)
+            if cand is None:
+                return rows
+            return rows[np.isin(rows, cand, assume_unique=True)]
+
+        pool = np.arange(n) if cand is None else cand
+
+        def side(op):
+            if isinstance(op, Const):
+                return op.value
+            return table.values(op)[pool]
+
+        left, right = side(node.left), side(node.right)
+        with np.errstate(invalid="ignore"):
+            ok = _OPS[node.op](left, right)
+        if node.op == "!=":
+            # NaN hiçbir koşulu sağlamaz
+            ok &= ~np.isnan(left) if isinstance(left, np.ndarray) else True
+            ok &= ~np.isnan(right) if isinstance(right, np.ndarray) else True
+        return pool[np.broadcast_to(ok, pool.shape)]
+
+
+def screen(expr: str, table: ScreenTable) -> np.ndarray:
+    """`compile_screen(expr).rows(table)`."""
+    return compile_screen(expr).rows(table)
@@ -1,5 +1,7 @@
 import numpy as np
 import pandas as pd
+from modules.financial_statement import FinancialStatement
+from modules.periods import period_key
 
 # ------------------------------------------------------------------
 #  Güvenli hücre erişimi: Series   -> ilk eleman
@@ -24,10 +26,34 @@ def safe_divide(numerator, denominator):
         return 0
     return numerator / denominator
 
+def safe_divide_array(numerator, denominator) -> np.ndarray:
+    """Element-wise `safe_divide`: NaN pay/payda veya sıfır payda → 0."""
+    num = np.asarray(numerator, dtype=float)
+    den = np.asarray(denominator, dtype=float)
+    bad = np.isnan(num) | np.isnan(den) | (den == 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = num / np.where(bad, 1.0, den)
+    return np.where(bad, 0.0, out)
+
+def round_array(values, ndigits: int = 2) -> np.ndarray:
+    """`round(x, ndigits)` for arrays; .xx5 sınırındaki değerler Python'un round'u ile düzeltilir."""
+    values = np.asarray(values, dtype=float)
+    out = np.round(values, ndigits)
+    with np.errstate(invalid="ignore"):
+        scaled = np.abs(values * 10 ** ndigits) % 1
+    tie = np.abs(scaled - 0.5) < 1e-6
+    if tie.any():
+        out[tie] = [round(v, ndigits) for v in values[tie]]
+    return out
+
 def get_value(df, kalem_adlari, kolon):
     """
     Gerekli kalemi bulur. Eğer 'Hasılat' aranıyorsa, Yurt İçi + Yurt Dışı şeklinde toplar.
+    `FinancialStatement` verilirse indeks üzerinden O(1) okur.
     """
+    if isinstance(df, FinancialStatement):
+        return df.value(kalem_adlari, kolon)
+
     if isinstance(kalem_adlari, str):
         kalem_adlari = [kalem_adlari]
 
@@ -53,9 +79,6 @@ def get_value(df, kalem_adlari, kolon):
     return 0
 
 def period_order(period_str):
-    try:
-        year, month = period_str.split("/")
-        return pd.to_datetime(f"{year}-{month}-01")
-    except:
-        return pd.NaT
+    """Sort key for period labels ('2024/12' → 202412; dönem değilse -1)."""
+    return period_key(period_str)
 
@@ -0,0 +1,573 @@
+"""
+Monte Carlo DCF valuation models.
+
+Every model returns the simulated intrinsic (enterprise) values of one
+company; the valuation tab and the Trap Radar scan take the median.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Iterator, Optional, Union
+
+import numpy as np
+
+from modules.quantile_sketch import ValueSketch
+from modules.logger import logger
+
+# Bellek sınırı: tek seferde simüle edilen senaryo sayısı
+MC_CHUNK_SIZE = 100_000
+# Uyarlamalı modda ilk parti (medyan SE tahmini için)
+MC_MIN_SIMS   = 1_000
+# Uyarlamalı modda QMC / antitetik için bağımsız rastgeleleştirme sayısı
+MC_RANDOMISATIONS = 8
+
+# Senaryo sınırları: WACC ≥ %1, −%5 ≤ g ≤ %15, g < WACC − 1 puan
+WACC_MIN   = 0.01
+G_MIN      = -0.05
+G_MAX      = 0.15
+G_SPREAD   = 0.01
+
+SeedLike = Union[None, int, np.random.SeedSequence, np.random.Generator]
+
+
+# ────────────────────────────────────────────────
+# Random streams
+# ────────────────────────────────────────────────
+def make_rng(seed: SeedLike = None) -> np.random.Generator:
+    """Generator from an int / SeedSequence / Generator (None → fresh entropy)."""
+    return np.random.default_rng(seed)
+
+
+# ────────────────────────────────────────────────
+# Normal distribution helpers (scipy'siz)
+# ────────────────────────────────────────────────
+def norm_cdf(x) -> np.ndarray:
+    """Standard normal CDF via a Chebyshev erfc fit (relative error < 1.2e-7)."""
+    x = np.asarray(x, dtype=float)
+    z = np.abs(x) / np.sqrt(2)
+    t = 1 / (1 + 0.5 * z)
+    poly = (-z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418
+            + t * (-0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587
+            + t * (-0.82215223 + t * 0.17087277)))))))))
+    erfc = t * np.exp(poly)
+    return np.where(x >= 0, 1 - 0.5 * erfc, 0.5 * erfc)
+
+
+_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+      1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+      6.680131188771972e+01, -1.328068155288572e+01)
+_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+      -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+      3.754408661907416e+00)
+
+
+def norm_ppf(p) -> np.ndarray:
+    """Inverse standard normal CDF (Acklam, relative error < 1.2e-9); 0 → −inf, 1 → +inf."""
+    p = np.asarray(p, dtype=float)
+    out = np.empty_like(p)
+    lo, hi = p < 0.02425, p > 1 - 0.02425
+    mid = ~(lo | hi)
+
+    q = p[mid] - 0.5
+    r = q * q
+    out[mid] = (((((_A[0] * r + _A[1]) * r + _A[2]) * r + _A[3]) * r + _A[4]) * r + _A[5]) * q / \
+               (((((_B[0] * r + _B[1]) * r + _B[2]) * r + _B[3]) * r + _B[4]) * r + 1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for mask, sign, tail in ((lo, 1, p[lo]), (hi, -1, 1 - p[hi])):
+            q = np.sqrt(-2 * np.log(tail))
+            out[mask] = sign * (((((_C[0] * q + _C[1]) * q + _C[2]) * q + _C[3]) * q + _C[4]) * q + _C[5]) / \
+                        ((((_D[0] * q + _D[1]) * q + _D[2]) * q + _D[3]) * q + 1)
+    out[p <= 0] = -np.inf
+    out[p >= 1] = np.inf
+    return out
+
+
+def truncated_normal_ppf(u, mu: float, sigma: float, low, high) -> np.ndarray:
+    """
+    Map uniforms `u` onto N(mu, sigma) restricted to [low, high] (inverse
+    CDF).  `low` / `high` may be arrays (per-scenario bounds).
+    """
+    alpha = (np.asarray(low, dtype=float) - mu) / sigma
+    beta  = (np.asarray(high, dtype=float) - mu) / sigma
+    # İki sınır da sağ kuyruktaysa simetrik tarafta örnekle (1 − Φ kaybı olmasın)
+    flip = alpha > 0
+    a, b = np.where(flip, -beta, alpha), np.where(flip, -alpha, beta)
+    fa, fb = norm_cdf(a), norm_cdf(b)
+    z = norm_ppf(fa + np.asarray(u, dtype=float) * (fb - fa))
+    z = np.clip(np.where(flip, -z, z), alpha, beta)
+    return mu + sigma * z
+
+
+def truncated_normal(rng: np.random.Generator, mu: float, sigma: float,
+                     low, high, size: int) -> np.ndarray:
+    """
+    N(mu, sigma) draws restricted to [low, high] by inverse-CDF sampling –
+    exactly one uniform per draw, no rejection loop.
+    """
+    return truncated_normal_ppf(rng.random(size), mu, sigma, low, high)
+
+
+# ────────────────────────────────────────────────
+# Scenario samplers (variance reduction)
+# ────────────────────────────────────────────────
+MC_SAMPLERS = ("random", "antithetic", "sobol", "halton")
+
+
+def sobol_2d(n: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    First `n` points of the 2-D Sobol sequence with a random digital shift
+    (unbiased, reproducible via `rng`).  Dimension 1 is van der Corput in
+    base 2, dimension 2 uses the primitive polynomial x + 1.
+    """
+    v1 = np.array([1 << (32 - k) for k in range(1, 33)], dtype=np.uint64)
+    m, v2 = 1, []
+    for k in range(1, 33):
+        if k > 1:
+            m = (m << 1) ^ m                      # m_k = 2·m_{k−1} ⊕ m_{k−1}
+        v2.append(m << (32 - k))
+    v2 = np.array(v2, dtype=np.uint64)
+
+    i = np.arange(n, dtype=np.uint64)
+    x = np.zeros((n, 2), dtype=np.uint64)
+    for k in range(max(int(n - 1).bit_length(), 1)):
+        bit = ((i >> np.uint64(k)) & np.uint64(1)).astype(bool)
+        x[bit, 0] ^= v1[k]
+        x[bit, 1] ^= v2[k]
+    x ^= rng.integers(0, 1 << 32, size=2, dtype=np.uint64)
+    return (x.astype(float) + 0.5) / 2.0 ** 32
+
+
+def _radical_inverse(i: np.ndarray, base: int) -> np.ndarray:
+    i = i.copy()
+    out, f = np.zeros(i.shape), 1.0
+    while i.any():
+        f /= base
+        out += f * (i % base)
+        i //= base
+    return out
+
+
+def halton_2d(n: int, rng: np.random.Generator) -> np.ndarray:
+    """Halton points (bases 2, 3) with a random Cranley–Patterson rotation."""
+    i = np.arange(1, n + 1)
+    h = np.column_stack([_radical_inverse(i, 2), _radical_inverse(i, 3)])
+    return (h + rng.random(2)) % 1.0
+
+
+def scenario_uniforms(rng: np.random.Generator, n_sims: int, sampler: str) -> np.ndarray:
+    """(n_sims, 2) uniforms driving (WACC, g) for the non-"random" samplers."""
+    if sampler == "antithetic":
+        u = rng.random(((n_sims + 1) // 2, 2))
+        return np.concatenate([u, 1 - u])[:n_sims]
+    if sampler == "sobol":
+        return sobol_2d(n_sims, rng)
+    if sampler == "halton":
+        return halton_2d(n_sims, rng)
+    raise ValueError(f"Bilinmeyen örnekleyici: {sampler!r} ({', '.join(MC_SAMPLERS)})")
+
+
+# ────────────────────────────────────────────────
+# Models
+# ────────────────────────────────────────────────
+def draw_dcf_scenarios(rng: np.random.Generator, n_sims: int,
+                       wacc_mu: float = 0.15, wacc_sigma: float = 0.03,
+                       g_mu: float = 0.04, g_sigma: float = 0.01,
+                       sampler: str = "random", return_normals: bool = False):
+    """
+    (waccs, gs) for `n_sims` scenarios.  WACC ~ N(wacc_mu, wacc_sigma)
+    clipped at %1; g ~ N(g_mu, g_sigma) truncated to
+    [−%5, min(%15, WACC − 1 puan)], so every scenario is valid in one pass.
+
+    The old rejection loop redrew WACC as well; with the default parameters
+    the g < WACC − 1 puan constraint binds in ~%0.2 of scenarios, so both
+    samplers give the same distribution.  Under extreme parameters WACC
+    keeps its own (clipped) normal distribution here.
+
+    `sampler` picks pseudo-random draws, antithetic pairs or randomised
+    Sobol / Halton points (inverse CDF).  `return_normals` adds the
+    (n_sims, 2) standard normals behind each scenario (control variates).
+    """
+    if sampler == "random":
+        raw_w = rng.normal(wacc_mu, wacc_sigma, n_sims)
+        u_g   = rng.random(n_sims)
+        z_w   = (raw_w - wacc_mu) / wacc_sigma
+    else:
+        u     = scenario_uniforms(rng, n_sims, sampler)
+        z_w   = norm_ppf(u[:, 0])
+        raw_w = wacc_mu + wacc_sigma * z_w
+        u_g   = u[:, 1]
+
+    waccs = np.clip(raw_w, WACC_MIN, None)
+    # Üst sınırın alt sınırın altına düşmesi imkânsız: WACC ≥ %1 → üst sınır ≥ %0
+    gs = truncated_normal_ppf(u_g, g_mu, g_sigma, G_MIN, np.minimum(G_MAX, waccs - G_SPREAD))
+    # Φ yaklaşımı sınırda yuvarlanabilir; g < WACC − 1 puan kesin kalsın
+    gs = np.minimum(gs, np.nextafter(waccs - G_SPREAD, -np.inf))
+
+    if return_normals:
+        return waccs, gs, np.column_stack([z_w, norm_ppf(u_g)])
+    return waccs, gs
+
+
+def monte_carlo_dcf_simple(
+    last_fcf: float,
+    forecast_years: int = 5,
+    n_sims: int = 10_000,
+    wacc_mu: float = 0.15, wacc_sigma: float = 0.03,
+    g_mu: float = 0.04,  g_sigma: float = 0.01,
+    seed: SeedLike = 42,
+    sampler: str = "random",
+) -> np.ndarray:
+    """
+    Vectorised Monte-Carlo DCF (PV of explicit FCFs + Gordon terminal value).
+
+    IMPORTANT fixes
+    • Guarantees WACC > g and WACC > 0.
+    • Caps g at −5 % (conservative) and 15 %.  
+    • Discounts the terminal value N years (not N+1).  
+    • Returns np.ndarray of intrinsic values (length = n_sims).
+
+    `seed` may be an int, a `SeedSequence` or a
+    `Generator`; no global RNG state is touched.  `sampler` – see
+    `MC_SAMPLERS` / `draw_dcf_scenarios`.
+    """
+    rng = make_rng(seed)
+
+    # --- draw parameters ----------------------------------------------------
+    waccs, gs = draw_dcf_scenarios(rng, n_sims, wacc_mu, wacc_sigma, g_mu, g_sigma, sampler)
+
+    return last_fcf * dcf_unit_values(waccs, gs, forecast_years)
+
+
+def dcf_unit_values(waccs: np.ndarray, gs: np.ndarray, forecast_years: int) -> np.ndarray:
+    """Intrinsic value of 1 TL of last FCF in every (WACC, g) scenario."""
+    # --- explicit-period FCFs ----------------------------------------------
+    years          = np.arange(1, forecast_years + 1)                      # 1..N
+    growth_matrix  = (1 + gs[:, None]) ** years                            # shape (n_sims, N)
+    discount       = (1 + waccs[:, None]) ** years
+    pv_fcfs        = (growth_matrix / discount).sum(axis=1)
+
+    # --- terminal value (PV at t = 0) ---------------------------------------
+    fcf_N1   = (1 + gs) ** (forecast_years) * (1 + gs)                     # FCFₙ₊₁
+    tv       = fcf_N1 / (waccs - gs)
+    pv_tv    = tv / (1 + waccs) ** forecast_years
+
+    return pv_fcfs + pv_tv
+
+
+def gordon_control(z: np.ndarray, quantiles, forecast_years: int,
+                   wacc_mu: float, wacc_sigma: float, g_mu: float, g_sigma: float):
+    """
+    Control variate for DCF quantiles: the unit DCF value linearised around
+    the deterministic (wacc_mu, g_mu) valuation,
+
+        X = V₀ + ∂V/∂WACC · σ_w · z_w + ∂V/∂g · σ_g · z_g,
+
+    driven by the scenarios' standard normals `z`.  X is exactly normal, so
+    its quantiles are known: V₀ + s · Φ⁻¹(q).  Returns (X, exact quantiles).
+    """
+    h  = 1e-5
+    w0, g0 = np.array([wacc_mu]), np.array([g_mu])
+    v0    = dcf_unit_values(w0, g0, forecast_years)[0]
+    dv_dw = (dcf_unit_values(w0 + h, g0, forecast_years) - dcf_unit_values(w0 - h, g0, forecast_years))[0] / (2 * h)
+    dv_dg = (dcf_unit_values(w0, g0 + h, forecast_years) - dcf_unit_values(w0, g0 - h, forecast_years))[0] / (2 * h)
+
+    b_w, b_g = dv_dw * wacc_sigma, dv_dg * g_sigma
+    x = v0 + b_w * z[:, 0] + b_g * z[:, 1]
+    return x, v0 + np.hypot(b_w, b_g) * norm_ppf(quantiles)
+
+
+def control_variate_quantiles(values: np.ndarray, control: np.ndarray,
+                              quantiles, control_quantiles) -> np.ndarray:
+    """
+    Sample quantiles of `values` corrected with a control of known quantiles.
+
+    For every level q the indicator 1{X ≤ x_q} has known mean q; its
+    sample error, scaled by the regression coefficient of 1{Y ≤ ŷ_q} on it,
+    shifts the empirical CDF of Y:  F̂_cv(y) = F̂(y) − b (ĉ − q),
+    so the corrected quantile is the sample quantile at level q + b (ĉ − q).
+    """
+    out = []
+    for q, x_q in zip(np.atleast_1d(quantiles), np.atleast_1d(control_quantiles)):
+        c = control <= x_q
+        d = values <= np.quantile(values, q)
+        c_mean = c.mean()
+        var_c  = c_mean * (1 - c_mean)
+        b = ((d & c).mean() - d.mean() * c_mean) / var_c if var_c > 0 else 0.0
+        out.append(np.quantile(values, np.clip(q + b * (c_mean - q), 0.0, 1.0)))
+    return np.array(out)
+
+
+def monte_carlo_dcf_batch(
+    ttm_fcfs,
+    forecast_years: int = 5,
+    n_sims: int = 10_000,
+    wacc_mu: float = 0.15, wacc_sigma: float = 0.03,
+    g_mu: float = 0.04,  g_sigma: float = 0.01,
+    seed: SeedLike = 42,
+    quantiles=(0.05, 0.5, 0.95),
+    chunk_size: Optional[int] = None,
+    relative_accuracy: float = 0.001,
+    rel_tol: Optional[float] = None,
+    sampler: str = "random",
+    control_variate: bool = False,
+) -> np.ndarray:
+    """
+    `monte_carlo_dcf_simple` for a whole universe with common random numbers.
+
+    All companies share one set of (WACC, g) scenarios.  The DCF value is
+    linear in the last FCF, so every company's distribution is
+    `fcf × unit_values` and its quantiles are the scaled quantiles of the
+    unit distribution (mirrored for negative FCF) – the simulation costs
+    O(n_sims × forecast_years) whatever the number of companies.
+
+    Returns an array of shape (len(ttm_fcfs), len(quantiles)); NaN FCF → NaN.
+    A single company with the same `seed` gets the same quantiles as
+    `np.quantile(monte_carlo_dcf_simple(fcf, ...), q)`.
+
+    With `chunk_size` the unit values are streamed into a `ValueSketch`
+    instead of being held in memory (quantiles within `relative_accuracy`).
+    With `rel_tol` the scenario count is chosen adaptively
+    (`monte_carlo_dcf_adaptive`) and `n_sims` is only the upper bound; the
+    relative precision of the median is the same for every company.
+
+    `sampler` / `control_variate` reduce the variance: antithetic pairs or
+    randomised Sobol / Halton points for the scenarios (every path), and
+    `gordon_control` as a quantile control variate
+    (`control_variate_quantiles`, see benchmarks/mc_variance_reduction.py).
+    The control variate needs all unit values in memory, so it cannot be
+    combined with `chunk_size` or `rel_tol` (ValueError).
+    """
+    fcfs = np.asarray(ttm_fcfs, dtype=float).reshape(-1, 1)
+    q    = np.asarray(quantiles, dtype=float)
+
+    if control_variate and (rel_tol or chunk_size):
+        raise ValueError("control_variate yalnızca bellek içi yolda kullanılabilir (chunk_size / rel_tol olmadan)")
+
+    if rel_tol:
+        res = monte_carlo_dcf_adaptive(1.0, rel_tol=rel_tol, max_sims=n_sims,
+                                       min_sims=min(MC_MIN_SIMS, n_sims), seed=seed,
+                                       sampler=sampler, forecast_years=forecast_years,
+                                       wacc_mu=wacc_mu, wacc_sigma=wacc_sigma,
+                                       g_mu=g_mu, g_sigma=g_sigma)
+        logger.info(f"Monte Carlo: {res.n_sims:,} senaryo, medyan göreli SE %{res.rel_error * 100:.2f}")
+        q_pos, q_neg = res.sketch.quantile(q), res.sketch.quantile(1 - q)
+    elif chunk_size:
+        sketch = monte_carlo_dcf_sketch(1.0, forecast_years=forecast_years, n_sims=n_sims,
+                                        wacc_mu=wacc_mu, wacc_sigma=wacc_sigma,
+                                        g_mu=g_mu, g_sigma=g_sigma, seed=seed,
+                                        chunk_size=chunk_size, sampler=sampler,
+                                        relative_accuracy=relative_accuracy)
+        q_pos, q_neg = sketch.quantile(q), sketch.quantile(1 - q)
+    else:
+        waccs, gs, z = draw_dcf_scenarios(make_rng(seed), n_sims, wacc_mu, wacc_sigma,
+                                          g_mu, g_sigma, sampler, return_normals=True)
+        unit = dcf_unit_values(waccs, gs, forecast_years)
+        q_pos, q_neg = np.quantile(unit, q), np.quantile(unit, 1 - q)
+        if control_variate:
+            x, x_pos = gordon_control(z, q, forecast_years, wacc_mu, wacc_sigma, g_mu, g_sigma)
+            _, x_neg = gordon_control(z, 1 - q, forecast_years, wacc_mu, wacc_sigma, g_mu, g_sigma)
+            q_pos = control_variate_quantiles(unit, x, q, x_pos)
+            q_neg = control_variate_quantiles(unit, x, 1 - q, x_neg)
+
+    # Negatif FCF sıralamayı ters çevirir: q. yüzdelik ↔ (1 − q). yüzdelik
+    return np.where(fcfs >= 0, fcfs * q_pos, fcfs * q_neg)
+
+
+def monte_carlo_dcf_jump_diffusion(
+    last_fcf: float,
+    forecast_years: int = 5,
+    n_sims: int = 10_000,
+    wacc_mu: float = 0.15,
+    g_mu: float = 0.04,
+    mu: float = 0.10,
+    sigma: float = 0.25,
+    lambda_: float = 0.1,       # sıçrama yoğunluğu
+    jump_mu: float = 0.05,      # ortalama sıçrama büyüklüğü
+    jump_sigma: float = 0.10,   # sıçrama oynaklığı
+    seed: SeedLike = None,
+    chunk_size: int = MC_CHUNK_SIZE,
+) -> list:
+    """
+    Jump-diffusion Monte-Carlo DCF on `(n_sims, forecast_years)` matrices.
+
+    Yearly FCF growth = N(mu, sigma) + Poisson(lambda_) · N(jump_mu, jump_sigma);
+    explicit FCFs and the Gordon terminal value are discounted at `wacc_mu`.
+    Scenarios are simulated `chunk_size` rows at a time to bound memory.
+    Returns a list of intrinsic values (length = n_sims).
+    """
+    rng = make_rng(seed)
+    years    = np.arange(1, forecast_years + 1)
+    discount = (1 + wacc_mu) ** years
+
+    out  = np.empty(n_sims)
+    step = max(int(chunk_size), 1)
+    for start in range(0, n_sims, step):
+        n = min(step, n_sims - start)
+        growth = rng.normal(mu, sigma, (n, forecast_years))
+        jumps  = rng.poisson(lambda_, (n, forecast_years)) * rng.normal(jump_mu, jump_sigma, (n, forecast_years))
+        fcfs   = last_fcf * np.cumprod(1 + growth + jumps, axis=1)            # FCF₁..FCFₙ
+
+        fcf_N    = fcfs[:, -1] if forecast_years else np.full(n, float(last_fcf))
+        terminal = fcf_N * (1 + g_mu) / (wacc_mu - g_mu)
+        out[start:start + n] = (fcfs / discount).sum(axis=1) + terminal / (1 + wacc_mu) ** forecast_years
+
+    return out.tolist()
+
+
+# ────────────────────────────────────────────────
+# Streaming
+# ────────────────────────────────────────────────
+MC_MODELS = {
+    "simple": monte_carlo_dcf_simple,
+    "jump":   monte_carlo_dcf_jump_diffusion,
+}
+
+
+def iter_dcf_chunks(last_fcf: float, model: str = "simple", n_sims: int = 10_000,
+                    chunk_size: int = MC_CHUNK_SIZE, seed: SeedLike = 42,
+                    **params) -> Iterator[np.ndarray]:
+    """
+    Yield the intrinsic values of `n_sims` scenarios `chunk_size` at a time.
+    All chunks come from one Generator, so `chunk_size >= n_sims` gives
+    exactly the values of the non-streaming model.
+    """
+    simulate = MC_MODELS[model]
+    rng = make_rng(seed)
+    chunk_size = max(int(chunk_size), 1)
+    for start in range(0, n_sims, chunk_size):
+        n = min(chunk_size, n_sims - start)
+        yield np.asarray(simulate(last_fcf, n_sims=n, seed=rng, **params), dtype=float)
+
+
+def monte_carlo_dcf_sketch(last_fcf: float, model: str = "simple", n_sims: int = 10_000,
+                           chunk_size: int = MC_CHUNK_SIZE, seed: SeedLike = 42,
+                           relative_accuracy: float = 0.001, **params) -> ValueSketch:
+    """
+    Streaming Monte-Carlo DCF: scenarios are simulated in chunks and folded
+    into a mergeable `ValueSketch` (median, P5/P95, histogram) – memory stays
+    bounded for millions of scenarios.  `params` go to the model
+    (`forecast_years`, `wacc_mu`, `g_mu`, …).
+    """
+    sketch = ValueSketch(relative_accuracy)
+    for values in iter_dcf_chunks(last_fcf, model, n_sims, chunk_size, seed, **params):
+        sketch.add(values)
+    return sketch
+
+
+# ────────────────────────────────────────────────
+# Adaptive sample count
+# ────────────────────────────────────────────────
+def median_std_error(sketch: ValueSketch, z: float = 1.96) -> float:
+    """
+    Distribution-free standard error of the median from order statistics:
+    the median's z-confidence interval lies between the sample quantiles
+    at 0.5 ± z·√(0.25 / n), so SE ≈ (Q₊ − Q₋) / 2z.
+    """
+    n = sketch.count
+    if n < 2:
+        return math.inf
+    half = z * math.sqrt(0.25 / n)
+    lo, hi = sketch.quantile([max(0.5 - half, 0.0), min(0.5 + half, 1.0)])
+    return float(hi - lo) / (2 * z)
+
+
+@dataclass
+class AdaptiveResult:
+    sketch:    ValueSketch
+    n_sims:    int          # kullanılan senaryo sayısı
+    median:    float
+    std_error: float        # medyanın standart hatası (TL)
+    rel_error: float        # std_error / |median|
+    converged: bool         # rel_error ≤ rel_tol sağlandı mı
+
+    def summary(self) -> dict:
+        return {**self.sketch.summary(), "std_error": self.std_error,
+                "rel_error": self.rel_error, "converged": self.converged}
+
+
+def monte_carlo_dcf_adaptive(last_fcf: float, model: str = "simple",
+                             rel_tol: float = 0.005,
+                             min_sims: int = MC_MIN_SIMS,
+                             max_sims: int = 1_000_000,
+                             seed: SeedLike = 42,
+                             sampler: str = "random", **params) -> AdaptiveResult:
+    """
+    Simulate in batches until the median's standard error is at most
+    `rel_tol` × |median| (or `max_sims` is reached).
+
+    After each batch the remaining scenario count is extrapolated from
+    SE ∝ 1/√n, so stable companies stop after the first batch and
+    volatile ones get just enough scenarios.  `params` go to the model.
+
+    Non-"random" samplers are not iid, so the order-statistic SE would
+    hide their gain; they go through `_adaptive_randomised` instead.
+    """
+    if sampler != "random":
+        if model != "simple":
+            raise ValueError(f"Örnekleyici {sampler!r} yalnızca basit modelle kullanılabilir")
+        return _adaptive_randomised(last_fcf, rel_tol, min_sims, max_sims, seed, sampler, **params)
+
+    rng    = make_rng(seed)
+    sketch = ValueSketch(relative_accuracy=min(0.001, rel_tol / 10))
+    n, batch = 0, min(min_sims, max_sims)
+    rel_error = math.inf
+
+    while batch > 0:
+        for values in iter_dcf_chunks(last_fcf, model, batch, MC_CHUNK_SIZE, rng, **params):
+            sketch.add(values)
+        n += batch
+
+        median    = sketch.median
+        std_error = median_std_error(sketch)
+        rel_error = std_error / abs(median) if median else math.inf
+        if rel_error <= rel_tol or n >= max_sims:
+            break
+
+        # SE ∝ 1/√n → hedef için gereken toplam; %10 pay, en az ilk parti kadar
+        needed = math.ceil(n * (rel_error / rel_tol) ** 2 * 1.1) if math.isfinite(rel_error) else 2 * n
+        batch  = min(max(needed - n, min_sims), max_sims - n)
+
+    return AdaptiveResult(sketch, n, sketch.median, median_std_error(sketch),
+                          rel_error, rel_error <= rel_tol)
+
+
+def _adaptive_randomised(last_fcf: float, rel_tol: float, min_sims: int, max_sims: int,
+                         seed: SeedLike, sampler: str,
+                         n_rand: int = MC_RANDOMISATIONS, **params) -> AdaptiveResult:
+    """
+    Adaptive loop for antithetic / Sobol / Halton scenarios (batch means).
+
+    `n_rand` independent randomisations of the point set are simulated with
+    m points each; the SE of the median is the spread of their medians,
+    s / √n_rand.  When m has to grow, every randomisation is re-simulated
+    from its own seed with the larger m (same shift, longer sequence), so
+    the low-discrepancy structure is kept instead of stacking fresh nets.
+    The SE ∝ 1/√n extrapolation is conservative for QMC.
+    """
+    n_rand = max(min(n_rand, max_sims), 1)       # n_rand · m ≤ max_sims kalsın
+    rng    = make_rng(seed)
+    seeds  = rng.integers(0, 2 ** 63, size=n_rand)
+    m_max  = max(max_sims // n_rand, 1)
+    m      = min(max(math.ceil(min_sims / n_rand), 2), m_max)
+
+    while True:
+        sketch  = ValueSketch(relative_accuracy=min(0.001, rel_tol / 10))
+        medians = np.empty(n_rand)
+        for k, s in enumerate(seeds):
+            values = monte_carlo_dcf_simple(last_fcf, n_sims=m, seed=int(s), sampler=sampler, **params)
+            sketch.add(values)
+            medians[k] = np.median(values)
+
+        median    = sketch.median
+        std_error = float(medians.std(ddof=1)) / math.sqrt(n_rand) if n_rand > 1 else math.inf
+        rel_error = std_error / abs(median) if median else math.inf
+        if rel_error <= rel_tol or m >= m_max:
+            break
+
+        needed = math.ceil(m * (rel_error / rel_tol) ** 2 * 1.1) if math.isfinite(rel_error) else 2 * m
+        m = min(max(needed, 2 * m), m_max)
+
+    return AdaptiveResult(sketch, n_rand * m, median, std_error, rel_error, rel_error <= rel_tol)
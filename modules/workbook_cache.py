@@ -0,0 +1,207 @@
+"""
+Columnar on-disk cache for Fintables company workbooks.
+
+Every `<TICKER> (TRY).xlsx` sheet that goes through `load_financial_data`
+is converted once into a NumPy `.npz` file under `CACHE_DIR`.  The cache
+entry remembers the workbook's resolved path, mtime and size; as soon as
+the Excel file changes the entry is considered stale and the sheet is
+parsed again.
+
+Warm-up / bakım komutları:
+
+    python -m modules cache warm     # tüm şirketleri önbelleğe al
+    python -m modules cache stats    # önbellek durumu
+    python -m modules cache clear    # önbelleği sil
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import CACHE_DIR
+from modules.logger import logger
+
+CACHE_VERSION = 2
+
+# ────────────────────────────────────────────────
+# Helpers
+# ────────────────────────────────────────────────
+def workbook_fingerprint(path: Path) -> Tuple[str, int, int]:
+    """(resolved path, mtime_ns, size) – cache key of a workbook."""
+    stat = path.stat()
+    return str(path.resolve()), stat.st_mtime_ns, stat.st_size
+
+
+def _sheet_slug(sheet_name: str) -> str:
+    return re.sub(r"\W+", "_", sheet_name).strip("_")
+
+
+def _frame_to_arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Kalem → unicode array (+ boş hücre maskesi), remaining columns → float matrix."""
+    kalem_na = df["Kalem"].isna().to_numpy()
+    kalem    = df["Kalem"].fillna("").astype(str).to_numpy(dtype=str)
+    columns = [str(c) for c in df.columns if c != "Kalem"]
+    values  = (
+        df.drop(columns="Kalem")
+          .apply(pd.to_numeric, errors="coerce")
+          .to_numpy(dtype=float)
+    )
+    return {
+        "kalem":    kalem,
+        "kalem_na": kalem_na,
+        "columns": np.asarray(columns, dtype=str),
+        "values":  values,
+    }
+
+
+def _arrays_to_frame(kalem: np.ndarray, kalem_na: np.ndarray,
+                     columns: np.ndarray, values: np.ndarray) -> pd.DataFrame:
+    df = pd.DataFrame(values, columns=columns.tolist())
+    df.insert(0, "Kalem", [np.nan if na else k for k, na in zip(kalem.tolist(), kalem_na.tolist())])
+    return df
+
+
+@dataclass
+class CacheStats:
+    hits:    int = 0     # npz'den okunan sayfa sayısı
+    misses:  int = 0     # Excel'den parse edilen sayfa sayısı
+    writes:  int = 0     # yazılan npz sayısı
+    errors:  int = 0     # okunamayan / yazılamayan cache girdileri
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# ────────────────────────────────────────────────
+# Cache
+# ────────────────────────────────────────────────
+class WorkbookCache:
+    """
+    Sheet-level binary cache for xlsx workbooks.
+
+    One `.npz` per (workbook, sheet) so callers that need a single sheet
+    only pay for that sheet.  Writes are atomic (tmp file + os.replace),
+    so several scan processes can share the same cache directory.
+    """
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, enabled: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.enabled   = enabled
+        self.stats     = CacheStats()
+        self._lock     = threading.Lock()
+
+    # -------- paths ------------------------------------------------------
+    def entry_path(self, path: Path, sheet_name: str) -> Path:
+        digest = hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()[:10]
+        return self.cache_dir / f"{path.stem}-{digest}" / f"{_sheet_slug(sheet_name)}.npz"
+
+    def _count(self, field: str, n: int = 1):
+        with self._lock:
+            setattr(self.stats, field, getattr(self.stats, field) + n)
+
+    # -------- read / write ----------------------------------------------
+    def _load_entry(self, path: Path, sheet_name: str, fingerprint) -> Optional[pd.DataFrame]:
+        entry = self.entry_path(path, sheet_name)
+        if not entry.exists():
+            return None
+        try:
+            with np.load(entry, allow_pickle=False) as npz:
+                meta = json.loads(str(npz["meta"]))
+                if (meta.get("version") != CACHE_VERSION
+                        or meta.get("sheet") != sheet_name
+                        or tuple(meta.get("fingerprint", ())) != tuple(fingerprint)):
+                    return None
+                return _arrays_to_frame(npz["kalem"], npz["kalem_na"], npz["columns"], npz["values"])
+        except Exception as e:
+            logger.warning(f"{entry.name}: önbellek okunamadı → {e}")
+            self._count("errors")
+            return None
+
+    def _store_entry(self, path: Path, sheet_name: str, fingerprint, df: pd.DataFrame):
+        entry = self.entry_path(path, sheet_name)
+        meta = {"version": CACHE_VERSION, "sheet": sheet_name, "fingerprint": list(fingerprint)}
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            tmp = entry.with_name(f"{entry.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npz")
+            np.savez(tmp, meta=np.asarray(json.dumps(meta)), **_frame_to_arrays(df))
+            os.replace(tmp, entry)
+            self._count("writes")
+        except Exception as e:
+            logger.warning(f"{entry.name}: önbelleğe yazılamadı → {e}")
+            self._count("errors")
+
+    def read_sheets(self, path: Path, sheet_names: Iterable[str]) -> Dict[str, pd.DataFrame]:
+        """
+        Return {sheet_name: DataFrame}.  Fresh sheets come from the npz
+        copy, the rest is parsed from the workbook in a single pass and
+        written back to the cache.
+        """
+        path = Path(path)
+        sheet_names = list(sheet_names)
+
+        if not self.enabled:
+            with pd.ExcelFile(path) as xls:
+                return {s: pd.read_excel(xls, sheet_name=s) for s in sheet_names}
+
+        fingerprint = workbook_fingerprint(path)
+        frames, missing = {}, []
+        for s in sheet_names:
+            df = self._load_entry(path, s, fingerprint)
+            if df is None:
+                missing.append(s)
+            else:
+                frames[s] = df
+        self._count("hits", len(frames))
+
+        if missing:
+            self._count("misses", len(missing))
+            with pd.ExcelFile(path) as xls:
+                for s in missing:
+                    df = pd.read_excel(xls, sheet_name=s)
+                    self._store_entry(path, s, fingerprint, df)
+                    # Excel ve önbellek yolları birebir aynı çerçeveyi döndürsün
+                    frames[s] = _arrays_to_frame(**_frame_to_arrays(df))
+
+        return {s: frames[s] for s in sheet_names}
+
+    # -------- maintenance -----------------------------------------------
+    def is_fresh(self, path: Path, sheet_name: str) -> bool:
+        return self._load_entry(Path(path), sheet_name, workbook_fingerprint(Path(path))) is not None
+
+    def clear(self) -> int:
+        """Delete every cache entry; returns the number of files removed."""
+        removed = 0
+        if not self.cache_dir.exists():
+            return removed
+        for f in self.cache_dir.rglob("*.npz"):
+            f.unlink(missing_ok=True)
+            removed += 1
+        for d in sorted(self.cache_dir.rglob("*"), reverse=True):
+            if d.is_dir() and not any(d.iterdir()):
+                d.rmdir()
+        return removed
+
+    def disk_usage(self) -> Tuple[int, int]:
+        """(entry count, total bytes) currently on disk."""
+        if not self.cache_dir.exists():
+            return 0, 0
+        files = list(self.cache_dir.rglob("*.npz"))
+        return len(files), sum(f.stat().st_size for f in files)
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = CacheStats()
+
+
+# Uygulama genelinde paylaşılan önbellek
+workbook_cache = WorkbookCache()
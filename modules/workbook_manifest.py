@@ -0,0 +1,160 @@
+"""
+Staleness manifest for the company workbooks.
+
+`WORKBOOK_MANIFEST` (JSON) remembers, per ticker, the latest period found
+in the workbook's `Bilanço` header together with the file's mtime, size
+and SHA-1.  Deciding whether a ticker needs a new download is then one
+`stat()` for unchanged files; only new or modified workbooks are hashed
+and their header row is read (`xlsx_probe.header_row`).  The downloader
+records every finished download here.
+"""
+
+import hashlib
+import json
+import os
+import re
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from config import COMPANIES_DIR, WORKBOOK_MANIFEST
+from modules.data_loader import company_path
+from modules.logger import logger
+from modules.xlsx_probe import header_row
+
+MANIFEST_VERSION = 1
+PERIOD_RE = re.compile(r"^\d{4}/\d{1,2}$")     # 2025/3, 2024/12 vb.
+
+
+def latest_period_in(header: Iterable) -> Optional[str]:
+    """En soldaki (= en yeni) dönem başlığı; dönem sütunu yoksa None."""
+    for c in header:
+        c = str(c).strip()
+        if PERIOD_RE.match(c):
+            return c
+    return None
+
+
+def read_latest_period(path: Path) -> Optional[str]:
+    """Latest period of a workbook from its `Bilanço` header row only."""
+    return latest_period_in(header_row(path, "Bilanço"))
+
+
+def file_sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@dataclass
+class ManifestEntry:
+    latest_period: Optional[str]
+    mtime_ns:      int
+    size:          int
+    sha1:          str
+    checked_at:    str
+    downloaded_at: Optional[str] = None      # indirici son kez ne zaman indirdi
+
+
+class WorkbookManifest:
+    """
+    Ticker → `ManifestEntry`, persisted as JSON.
+
+        manifest = WorkbookManifest()
+        manifest.latest_period("ASELS")     # stat() + sözlük araması
+        manifest.record("ASELS")            # indirmeden sonra
+        manifest.save()
+    """
+
+    def __init__(self, path: Path = WORKBOOK_MANIFEST, base_dir: Path = COMPANIES_DIR):
+        self.path     = Path(path)
+        self.base_dir = Path(base_dir)
+        self.entries: Dict[str, ManifestEntry] = {}
+        self._dirty = False
+        self._load()
+
+    # -------- persistence ---------------------------------------------------
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"{self.path.name} okunamadı, yeniden oluşturulacak: {e}")
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            return
+        self.entries = {t: ManifestEntry(**e) for t, e in data.get("workbooks", {}).items()}
+
+    def save(self):
+        """Write the manifest if it changed (atomik: geçici dosya + replace)."""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "version":   MANIFEST_VERSION,
+            "workbooks": {t: asdict(e) for t, e in sorted(self.entries.items())},
+        }
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+    # -------- queries -------------------------------------------------------
+    def record(self, ticker: str, path: Optional[Path] = None,
+               downloaded: bool = False) -> Optional[ManifestEntry]:
+        """
+        (Re)read `ticker`'s workbook and store its entry; None if the file
+        is missing.  `downloaded=True` stamps `downloaded_at`.
+        """
+        path = Path(path) if path is not None else company_path(ticker, self.base_dir)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            if self.entries.pop(ticker, None) is not None:
+                self._dirty = True
+            return None
+
+        sha1 = file_sha1(path)
+        old  = self.entries.get(ticker)
+        if old is not None and old.sha1 == sha1:
+            latest = old.latest_period                 # yalnızca mtime değişmiş (kopyalama vb.)
+        else:
+            try:
+                latest = read_latest_period(path)
+            except Exception as e:
+                logger.warning(f"⚠️ {path.name} başlığı okunamadı: {e}")
+                latest = None
+
+        now = datetime.now().isoformat(timespec="seconds")
+        entry = ManifestEntry(latest, stat.st_mtime_ns, stat.st_size, sha1, now,
+                              now if downloaded else (old.downloaded_at if old else None))
+        self.entries[ticker] = entry
+        self._dirty = True
+        return entry
+
+    def entry(self, ticker: str, path: Optional[Path] = None) -> Optional[ManifestEntry]:
+        """Current entry of `ticker`, refreshed only when the file changed on disk."""
+        path = Path(path) if path is not None else company_path(ticker, self.base_dir)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return self.record(ticker, path)
+
+        old = self.entries.get(ticker)
+        if old is not None and old.mtime_ns == stat.st_mtime_ns and old.size == stat.st_size:
+            return old
+        return self.record(ticker, path)
+
+    def latest_period(self, ticker: str, path: Optional[Path] = None) -> Optional[str]:
+        entry = self.entry(ticker, path)
+        return entry.latest_period if entry is not None else None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.entries
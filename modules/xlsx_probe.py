@@ -0,0 +1,131 @@
+"""
+Cheap checks on xlsx files without parsing them with openpyxl.
+
+An xlsx is a zip archive; the sheet list lives in `xl/workbook.xml`, so
+"is this download complete and is it a Fintables workbook?" only needs
+the zip directory, a CRC pass and one small XML member.  `header_row`
+streams a worksheet's XML only until its first row is complete.
+"""
+
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from modules.data_loader import SHEETS
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL  = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG  = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_COL_RE  = re.compile(r"[A-Z]+")
+_CHUNK   = 16 * 1024
+
+PathOrZip = Union[Path, str, zipfile.ZipFile]
+
+
+def _open(source: PathOrZip) -> zipfile.ZipFile:
+    return source if isinstance(source, zipfile.ZipFile) else zipfile.ZipFile(source)
+
+
+def sheet_names(source: PathOrZip) -> List[str]:
+    """Sheet names in workbook order, read from `xl/workbook.xml`."""
+    zf = _open(source)
+    try:
+        root = ET.fromstring(zf.read("xl/workbook.xml"))
+        return [s.get("name") for s in root.iter(f"{_NS_MAIN}sheet")]
+    finally:
+        if zf is not source:
+            zf.close()
+
+
+def workbook_problem(path: Path, required: Iterable[str] = SHEETS,
+                     verify_crc: bool = True) -> Optional[str]:
+    """
+    None if `path` is a complete workbook with all `required` sheets,
+    otherwise a short description of what is wrong (yarım / bozuk zip,
+    eksik sayfa…).
+    """
+    try:
+        with zipfile.ZipFile(path) as zf:
+            if verify_crc and (bad := zf.testzip()) is not None:
+                return f"bozuk zip üyesi: {bad}"
+            names = set(sheet_names(zf))
+    except FileNotFoundError:
+        return "dosya yok"
+    except (zipfile.BadZipFile, EOFError, KeyError, ET.ParseError) as e:
+        return f"geçersiz xlsx – {e}"
+
+    missing = [s for s in required if s not in names]
+    if missing:
+        return f"eksik sayfa: {', '.join(missing)}"
+    return None
+
+
+# ────────────────────────────────────────────────
+# First-row reader
+# ────────────────────────────────────────────────
+def _sheet_member(zf: zipfile.ZipFile, sheet: str) -> str:
+    """Zip member of worksheet `sheet` (workbook.xml r:id → workbook.xml.rels)."""
+    root = ET.fromstring(zf.read("xl/workbook.xml"))
+    rid = next((s.get(f"{_NS_REL}id") for s in root.iter(f"{_NS_MAIN}sheet")
+                if s.get("name") == sheet), None)
+    if rid is None:
+        raise KeyError(f"'{sheet}' sayfası yok")
+
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    target = next(r.get("Target") for r in rels.iter(f"{_NS_PKG}Relationship")
+                  if r.get("Id") == rid)
+    return target.lstrip("/") if target.startswith("/") else posixpath.normpath(f"xl/{target}")
+
+
+def _shared_strings(zf: zipfile.ZipFile) -> List[str]:
+    try:
+        root = ET.fromstring(zf.read("xl/sharedStrings.xml"))
+    except KeyError:
+        return []
+    return ["".join(t.text or "" for t in si.iter(f"{_NS_MAIN}t"))
+            for si in root.iter(f"{_NS_MAIN}si")]
+
+
+def _column_index(ref: str) -> int:
+    n = 0
+    for ch in _COL_RE.match(ref).group():
+        n = n * 26 + ord(ch) - 64
+    return n - 1
+
+
+def header_row(path: Path, sheet: str = "Bilanço") -> List[Optional[str]]:
+    """
+    Cell texts of the first row of `sheet`, like
+    `pd.read_excel(path, sheet_name=sheet, nrows=0).columns` but without
+    reading the rest of the sheet: the worksheet XML is decompressed and
+    parsed chunk by chunk until the first `</row>`.  Empty cells are None.
+    """
+    with zipfile.ZipFile(path) as zf:
+        member = _sheet_member(zf, sheet)
+        cells: Dict[int, str] = {}
+        shared: Optional[List[str]] = None
+
+        parser = ET.XMLPullParser(events=("end",))
+        with zf.open(member) as f:
+            while chunk := f.read(_CHUNK):
+                parser.feed(chunk)
+                for _, el in parser.read_events():
+                    if el.tag == f"{_NS_MAIN}c":
+                        kind, value = el.get("t"), el.find(f"{_NS_MAIN}v")
+                        if kind == "inlineStr":
+                            text = "".join(t.text or "" for t in el.iter(f"{_NS_MAIN}t"))
+                        elif value is None or value.text is None:
+                            continue
+                        elif kind == "s":
+                            shared = _shared_strings(zf) if shared is None else shared
+                            text = shared[int(value.text)]
+                        else:
+                            text = value.text
+                        ref = el.get("r")
+                        cells[_column_index(ref) if ref else len(cells)] = text
+                    elif el.tag == f"{_NS_MAIN}row":
+                        return [cells.get(i) for i in range(max(cells, default=-1) + 1)]
+        return []
@@ -2,7 +2,12 @@ import os
 import streamlit as st # type: ignore
 import pandas as pd
 from modules.data_loader import load_financial_data
+from modules.periods import Period, PeriodIndex
 from modules.scanner import run_scan                 # NEW (shared scanner)
+from modules.score_store import ScoreStore
+from modules.panel_store import shared_panel
+from modules.screener import ScreenError, ScreenTable, compile_screen
+from modules.radar import RadarTable
 
 from streamlit import column_config as cc # type: ignore
 from config import RADAR_XLSX
@@ -13,19 +18,18 @@ LOG_PATH = os.path.join(os.path.dirname(__file__), "..", "scanner.log")
 loglar = []
 
 @st.cache_data(show_spinner=False)
-def load_radar() -> pd.DataFrame:
+def load_radar() -> RadarTable:
     """Read Fintables radar sheet once & cache."""
-    df = pd.read_excel(RADAR_XLSX)
-    df["Şirket"] = df["Şirket"].str.strip()
-    return df
+    return RadarTable.from_excel(RADAR_XLSX)
 
-@st.cache_data(show_spinner=False)   
+@st.cache_resource(show_spinner=False)
 def get_financials(company: str):
     """
     Returns (balance_df, income_df, cashflow_df) for a given company.
-    Cached so repeated calls don't hit the disk again.
+    Cached so repeated calls don't hit the disk again; one shared,
+    read-only object for all sessions (panel views, no per-hit copy).
     """
-    return load_financial_data(company)
+    return load_financial_data(company).load()
 
 
 def link_to_analysis(ticker: str) -> str:
@@ -39,23 +43,18 @@ st.title("📊 Bilanço Skorları Toplu Analiz")
 
 try:
     df_radar = load_radar()
-    df_radar["Şirket"] = df_radar["Şirket"].str.strip()
-    companies = df_radar["Şirket"].dropna().unique()
+    companies = df_radar.tickers
     loglar.append(f"🔄 Toplam {len(companies)} şirket bulundu.")
 except Exception as e:
     st.error(f"Dosya okunamadı: {e}")
     st.stop()
 
 # Örnek bir şirketten dönem kolonlarını al
-
-def period_sort_key(period_str):
-    yil, ay = map(int, period_str.split("/"))
-    return yil * 100 + ay  # Örn: 2024/12 → 202412, 2024/03 → 202403
-
 ornek_sirket = None
 for c in companies:
     try:
-        example_balance_sheet, _, _ = load_financial_data(c)
+        # Yalnızca Bilanço başlık satırı okunur
+        example_periods = load_financial_data(c).periods()
         ornek_sirket = c
         break
     except FileNotFoundError:
@@ -65,29 +64,20 @@ if ornek_sirket is None:
     st.error("Hiçbir şirket için bilanço Excel'i bulunamadı.")
     st.stop()
 
-# artık example_balance_sheet zaten var
-period_list = sorted(
-    [col for col in example_balance_sheet.columns if "/" in col],
-    key=period_sort_key,
-    reverse=True
-)
+# artık example_periods zaten var → yeniden eskiye sıralı dönem indeksi
+period_index = PeriodIndex(example_periods)
+period_list  = period_index.ordered
 
 # Seçilebilir dönem (sadece current_period seçiliyor)
 current_period = st.selectbox("Current Period", options=period_list)
 
 # 1 yıl önceki dönemi bul (örneğin 2024/12 -> 2023/12)
-def one_year_back(period):
-    try:
-        yil, ay = map(int, period.split("/"))
-        return f"{yil-1}/{ay}"
-    except:
-        return None
-
-previous_period = one_year_back(current_period)
+previous_period = period_index.year_back(current_period)
 
 # Eğer 1 yıl öncesi listede yoksa uyarı göster
-if previous_period not in period_list:
-    st.error(f"{current_period} için bir yıl önceki dönem ({previous_period}) verisi bulunamadı. Başka bir dönem seçiniz.")
+if previous_period is None:
+    st.error(f"{current_period} için bir yıl önceki dönem ({Period.parse(current_period).year_back()}) "
+             "verisi bulunamadı. Başka bir dönem seçiniz.")
     st.stop()
 else:
     st.markdown(f"**Previous Period:** `{previous_period}`")
@@ -99,6 +89,15 @@ with st.sidebar.expander("Filtreler", expanded=False):
     m_min, m_max = st.slider("M-Skor Aralığı", -5.0, 5.0, (-5.0, 5.0), 0.1, key="m")
     l_min, l_max = st.slider("Lynch Aralığı", 0, 3, (0, 3), key="l")
     g_min, g_max = st.slider("Graham Aralığı", 0, 5, (0, 5), key="g")
+    screen_expr = st.text_area(
+        "Tarama ifadesi",
+        key="screen_expr",
+        placeholder="f_skor >= 7 and m_skor < -2.22 and FD/FAVÖK < 8",
+        help="Skor ve radar kolonları: `and`/`ve`, `or`/`veya`, `not`/`değil`, parantez; "
+             "boşluklu adlar ters tırnakla (`Piyasa Değeri` > 1e9); "
+             "tablo kalemi seçili dönemde: kalem('Satış Gelirleri') > 1e9. "
+             "MOS yüzde olarak.",
+    )
 
     colA, colB = st.columns(2)
     with colA:
@@ -115,6 +114,27 @@ if reset:
 # DB‑first logic (same UX as Trap Radar)
 # -------------------------------------------------------------------------
 with st.sidebar:
+    workers = st.number_input(
+        "Paralel işlem sayısı",
+        min_value=1,
+        max_value=os.cpu_count() or 1,
+        value=min(4, os.cpu_count() or 1),
+        step=1,
+        help="Şirketler bu kadar süreç arasında paylaştırılır.",
+    )
+    incremental = st.checkbox(
+        "Sadece değişen şirketleri hesapla",
+        value=True,
+        help="Excel dosyası ve radar satırı değişmeyen şirketlerin skorları kayıtlı depodan alınır.",
+    )
+    mos_tol = st.number_input(
+        "MOS hassasiyeti (medyan, %)",
+        min_value=0.1,
+        max_value=5.0,
+        value=0.5,
+        step=0.1,
+        help="Monte Carlo senaryoları, içsel değer medyanının standart hatası bu oranın altına inene kadar artırılır.",
+    )
     if st.button("Skorları Hesapla"):
         st.session_state.scan = True
 
@@ -123,7 +143,20 @@ with st.sidebar:
 # -------------------------------------------------------------------------
 if st.session_state.get("scan"):
 
-    df_scan, logs, _ = run_scan(df_radar)
+    progress_bar = st.progress(0.0, text="Taranıyor…")
+
+    def on_progress(done: int, total: int, ticker: str):
+        progress_bar.progress(done / total, text=f"{done}/{total} – {ticker}")
+
+    df_scan, logs, _ = run_scan(
+        df_radar,
+        workers=int(workers),
+        progress=on_progress,
+        store=ScoreStore() if incremental else None,
+        n_sims=200_000,                 # üst sınır
+        rel_tol=mos_tol / 100,
+    )
+    progress_bar.empty()
 
     # ❷ HER İKİ DURUMDA DA DF’Yİ HAFIZADA TUT
     st.session_state.score_df = df_scan
@@ -133,7 +166,15 @@ if st.session_state.get("scan"):
 elif "score_df" in st.session_state:
     df_scan = st.session_state.score_df
 
-# ❹ HİÇBİR ŞEY YOKSA KULLANICIYA BİLGİ VER, STOP ETME
+# ❹ OTURUMDA YOKSA SKOR DEPOSUNDAKİ SON SKORLAR (yeniden tarama yok)
+elif len(stored := ScoreStore().latest(companies)):
+    df_scan = stored
+    st.session_state.score_df = df_scan
+    st.session_state.pop("MOS_scaled", None)
+    st.caption("Skor deposundaki son hesaplanan skorlar gösteriliyor; "
+               "güncellemek için “Skorları Hesapla”.")
+
+# ❺ HİÇBİR ŞEY YOKSA KULLANICIYA BİLGİ VER, STOP ETME
 else:
     st.info("Önce “Skorları Hesapla” butonuna tıklayın.")
     st.stop()
@@ -160,13 +201,26 @@ if "MOS_scaled" not in st.session_state:
     st.session_state.MOS_scaled = True
 
 # --- Uygula / sıfırla filtre --------------------------------------------
+def screen_table() -> ScreenTable:
+    """Skor + radar + panel kolonları; aynı skor tablosu ve dönem için yeniden kurulmaz."""
+    cached = st.session_state.get("screen_table")
+    if cached is None or cached[0] is not score_df or cached[1] != current_period:
+        table = ScreenTable.from_sources(score_df, df_radar, shared_panel(), current_period)
+        st.session_state.screen_table = cached = (score_df, current_period, table)
+    return cached[2]
+
 if apply:
-    filtered_df = score_df[
-        (score_df["f_skor"] >= f_min) & (score_df["f_skor"] <= f_max) &
-        (score_df["m_skor"] >= m_min) & (score_df["m_skor"] <= m_max) &
-        (score_df["lynch"] >= l_min) & (score_df["lynch"] <= l_max) &
-        (score_df["graham"] >= g_min) & (score_df["graham"] <= g_max)
-    ]
+    expr = (f"{f_min} <= f_skor <= {f_max} and {m_min} <= m_skor <= {m_max} and "
+            f"{l_min} <= lynch <= {l_max} and {g_min} <= graham <= {g_max}")
+    try:
+        if screen_expr.strip():
+            compile_screen(screen_expr)         # hata konumu kullanıcının yazdığına göre
+            expr += f" and ({screen_expr})"
+        rows = compile_screen(expr).rows(screen_table())
+    except ScreenError as e:
+        st.error(f"Tarama ifadesi hatalı: {e}")
+        st.stop()
+    filtered_df = score_df.iloc[rows]
     st.markdown(f"**🔎 Filtrelenmiş Şirket Sayısı:** {len(filtered_df)}")
     
     st.dataframe(
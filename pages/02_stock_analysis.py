@@ -3,43 +3,66 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt  # type: ignore
 from modules.data_loader import load_financial_data
+from modules.fcf import fcf_series
+from modules.periods import common_periods
+from modules.peer_ranks import PeerRankStore
 from config import RADAR_XLSX
+from modules.radar import RadarTable
 from modules.scores import (
     calculate_scores,
     show_company_scorecard,
-    period_order,
     fcf_detailed_analysis,
     fcf_detailed_analysis_plot,
     fcf_yield_time_series,
-    monte_carlo_dcf_simple
 )
+from modules.valuation import monte_carlo_dcf_adaptive, monte_carlo_dcf_sketch
+
+MC_MODELS = {
+    "Basit (WACC / büyüme belirsizliği)": "simple",
+    "Sıçramalı difüzyon (jump-diffusion)": "jump",
+}
+
+# Varyans azaltma (yalnızca basit model)
+MC_SAMPLER_LABELS = {
+    "Sobol (düşük tutarsızlık)": "sobol",
+    "Halton (düşük tutarsızlık)": "halton",
+    "Antitetik çiftler": "antithetic",
+    "Rastgele": "random",
+}
+
+PEER_METRIC_LABELS = {
+    "f_skor": "Piotroski F-Skor",
+    "m_skor": "Beneish M-Skor",
+    "MOS":    "MOS (%)",
+    "F/K":    "F/K",
+    "PD/DD":  "PD/DD",
+}
 
 
 def latest_common_period(balance, income, cashflow):
-    bal_periods = {c for c in balance.columns if "/" in c}
-    inc_periods = {c for c in income.columns  if "/" in c}
-    cf_periods  = {c for c in cashflow.columns if "/" in c}
-    return sorted(bal_periods & inc_periods & cf_periods,
-                  key=period_order, reverse=True)
+    return common_periods(balance, income, cashflow)
 
 params = st.query_params
 default_symbol = params.get("symbol", "").upper()
 
 @st.cache_data(show_spinner=False)
-def get_scores_cached(symbol, radar_row, balance, income, cashflow, curr, prev):
-    return calculate_scores(symbol, radar_row, balance, income, cashflow, curr, prev)
+def get_scores_cached(symbol, radar_row, _balance, _income, _cashflow, curr, prev):
+    # Tablolar `get_financials(symbol)` ile önbellekte; anahtar sembol + dönemler
+    return calculate_scores(symbol, radar_row, _balance, _income, _cashflow, curr, prev)
 
-@st.cache_data(show_spinner=False)
+@st.cache_resource(show_spinner=False)
 def get_financials(symbol: str):
-    """Load balance, income, and cash‑flow sheets for a single ticker."""
-    return load_financial_data(symbol)
+    """Load balance, income, and cash‑flow sheets for a single ticker.
+
+    `cache_resource`: all sessions share one read-only object (its sheets
+    are views into the memory-mapped panel) instead of a copy per hit.
+    """
+    return load_financial_data(symbol).load()
 
 @st.cache_data(show_spinner=False)
-def get_radar() -> pd.DataFrame:
+def get_radar() -> RadarTable:
     """Read the pre‑built fintables_radar Excel once and cache it."""
-    df = pd.read_excel(RADAR_XLSX)
-    df["Şirket"] = df["Şirket"].str.strip()
-    return df
+    return RadarTable.from_excel(RADAR_XLSX)
 
 def _fmt(val, pattern="{:+.2f}", default="-"):
     """None, NaN veya sayı dışı değerleri güvenle biçimlendir."""
@@ -112,8 +135,7 @@ def main():
     st.info(f"🔎 Kullanılan son bilanço dönemi: **{curr}**")
 
     # Radar satırı
-    radar_df = get_radar()
-    radar_row = radar_df[radar_df["Şirket"] == symbol]
+    radar_row = get_radar().row(symbol)
     if radar_row.empty:
         st.warning("Radar verisi bulunamadı; bazı skorlar eksik hesaplanabilir.")
 
@@ -147,7 +169,8 @@ def main():
 
 
         # Sekmeler
-        tab_score, tab_fcf, tab_valuation = st.tabs(["📊 Skor Detayları", "🔍 FCF Analizi", "⚖️ Değerleme", ])
+        tab_score, tab_fcf, tab_valuation, tab_peers = st.tabs(
+            ["📊 Skor Detayları", "🔍 FCF Analizi", "⚖️ Değerleme", "👥 Akranlar"])
         
         copy_details = None  
         
@@ -187,48 +210,59 @@ def main():
                 st.info("FCF verileri eksik.")
                 st.stop()
 
-            # --- trailing-12-month FCF (TTM) ------------------------------------
-            if len(df_fcf) >= 4:
-                last_fcf = df_fcf["FCF"].iloc[-4:].sum()   # TTM: son 4 çeyrek toplamı
-            else:
-                last_fcf = df_fcf["FCF"].iloc[-1]          # fallback: tek dönem
+            # --- trailing-12-month FCF (TTM): son 4 çeyrek toplamı ---------------
+            last_fcf = fcf_series(symbol, radar_row).ttm_fcf
 
             if last_fcf <= 0:
                 st.warning("Son FCF negatif veya sıfır, değerleme anlamsız.")
                 st.stop()
 
             # Kontroller
+            model = st.selectbox("Simülasyon Modeli", list(MC_MODELS))
+            sampler = st.selectbox(
+                "Örnekleme",
+                list(MC_SAMPLER_LABELS),
+                disabled=MC_MODELS[model] != "simple",
+                help="Düşük tutarsızlıklı diziler aynı medyan hassasiyetine çok daha az senaryoyla ulaşır.",
+            )
             col1, col2 = st.columns(2)
             with col1:
                 wacc_mu = st.slider("Ortalama WACC (%)", 5.0, 25.0, 15.0, 0.5) / 100
                 g_mu    = st.slider("Terminal Büyüme (%)", 0.0, 10.0, 4.0, 0.1) / 100
             with col2:
+                adaptive = st.checkbox("Senaryo sayısını hassasiyete göre belirle", value=True)
+                if adaptive:
+                    rel_tol = st.slider("Hedef hassasiyet (medyan, %)", 0.1, 2.0, 0.5, 0.1) / 100
                 n_sims = st.number_input(
-                    "Simülasyon Sayısı",
+                    "Simülasyon Sayısı" + (" (üst sınır)" if adaptive else ""),
                     min_value=1000,
-                    max_value=50000,
+                    max_value=5_000_000,
                     value=10000,
                     step=1000,
                     format="%d",          # opsiyonel: tam sayı formatı
                 )
                 years  = st.slider("Projeksiyon Yılı", 3, 10, 5)
 
-            sim_vals = monte_carlo_dcf_simple(
-                last_fcf,
-                forecast_years=years,
-                n_sims=int(n_sims),
-                wacc_mu=wacc_mu, g_mu=g_mu,
-            )
-            # sim_vals = monte_carlo_dcf_jump_diffusion(
-            #     last_fcf,
-            #     forecast_years=years,
-            #     n_sims=int(n_sims),
-            #     wacc_mu=wacc_mu, g_mu=g_mu,
-            # )
+            # Senaryolar parça parça sketch'e akar; tüm değerler bellekte tutulmaz
+            mc_params = dict(model=MC_MODELS[model], forecast_years=years,
+                             wacc_mu=wacc_mu, g_mu=g_mu)
+            if MC_MODELS[model] == "simple":
+                mc_params["sampler"] = MC_SAMPLER_LABELS[sampler]
+            if adaptive:
+                result = monte_carlo_dcf_adaptive(last_fcf, rel_tol=rel_tol,
+                                                  max_sims=int(n_sims), **mc_params)
+                sketch = result.sketch
+            else:
+                sketch = monte_carlo_dcf_sketch(last_fcf, n_sims=int(n_sims), **mc_params)
 
             # Sonuçları göster
-            intrinsic = np.median(sim_vals)
+            stats = sketch.summary()
+            intrinsic = stats["median"]
             st.metric("Medyan İçsel Değer (TL)", f"{intrinsic:,.0f}")
+            st.caption(f"P5 – P95 aralığı: {stats['p5']:,.0f} – {stats['p95']:,.0f} TL")
+            if adaptive:
+                durum = "✅" if result.converged else "⚠️ üst sınıra ulaşıldı"
+                st.caption(f"{result.n_sims:,} senaryo · medyan ± %{result.rel_error * 100:.2f} (SE) {durum}")
 
             # --- convert EV → intrinsic value per share -------------------------------
             cur_price = radar_row.get("Son Fiyat", pd.Series(dtype=float)).iat[0] \
@@ -260,11 +294,44 @@ def main():
 
 
             fig, ax = plt.subplots(figsize=(7,4))
-            ax.hist(sim_vals, bins=50)
+            counts, edges = sketch.histogram(bins=50)
+            ax.stairs(counts, edges, fill=True)
             ax.set_xlabel("İçsel Değer (TL)")
             ax.set_ylabel("Sıklık")
-            ax.set_title(f"{n_sims:,} Senaryoda Değer Dağılımı")
+            ax.set_title(f"{sketch.count:,} Senaryoda Değer Dağılımı")
             st.pyplot(fig)
 
+        with tab_peers:
+            show_peer_context(symbol)
+
+
+def show_peer_context(symbol: str):
+    """Piyasa / sektör içindeki yüzdelik sıra; son radar taramasında kaydedilen sıralamadan."""
+    st.subheader("Akran Karşılaştırması")
+    ctx = PeerRankStore().peer_context(symbol)
+    if ctx.empty:
+        st.info("Bu hisse için kayıtlı sıralama yok. Radar sayfasında skorları hesaplayın.")
+        return
+
+    sector = ctx.attrs.get("sector")
+    st.caption(("Sektör: **" + sector + "** · " if sector else "Sektör bilgisi yok · ")
+               + "% = grup içindeki yüzdelik sıra (100 = en iyi), z = iyi yönde standart sapma. "
+               "M-Skor, F/K ve PD/DD için düşük değer daha iyidir.")
+    view = ctx.copy()
+    view.loc[view.index == "MOS", "Değer"] *= 100
+    view.index = view.index.map(lambda m: PEER_METRIC_LABELS.get(m, m))
+    st.dataframe(
+        view,
+        column_config={
+            "Değer":    st.column_config.NumberColumn(format="%.2f"),
+            "Piyasa %": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.0f"),
+            "Sektör %": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.0f"),
+            "Piyasa z": st.column_config.NumberColumn(format="%+.2f"),
+            "Sektör z": st.column_config.NumberColumn(format="%+.2f"),
+            "Piyasa n": st.column_config.NumberColumn("Piyasa (şirket)", format="%d"),
+            "Sektör n": st.column_config.NumberColumn("Sektör (şirket)", format="%d"),
+        },
+    )
+
 if __name__ == "__main__":
     main()
@@ -1,16 +1,24 @@
 #  pages/04_balance_download.py
 import streamlit as st #type: ignore
-from modules.downloader import update_companies_if_needed
+from modules.downloader import DownloadConfig, update_companies_if_needed
+from modules.panel_store import build_panel
+from modules.reporting_calendar import ReportingCalendar, format_period
 
 st.title("📥 Fintables Bilanço İndirici")
 
+calendar = ReportingCalendar()
+open_periods = ", ".join(format_period(q) for q in calendar.open_periods())
+
 st.markdown(
-    """
+    f"""
     Bu sayfa, **data/son_bilancolar.json** dosyasındaki şirket kodlarını tarar,  
-    _companies_ klasöründe güncel bilanço dosyası (**2025/3** dönemi) bulunmayan
-    veya eski sürümü bulunan şirketlerin Excel dosyalarını Fintables’tan otomatik indirir
+    _companies_ klasöründe güncel bilanço dosyası (KAP son tarihi geçmiş
+    **{format_period(calendar.due_period())}** dönemi) bulunmayan veya eski sürümü
+    bulunan şirketlerin Excel dosyalarını Fintables’tan otomatik indirir
     ve ilgili klasöre kaydeder.
     """
+    + (f"\n\nSon tarihi henüz gelmemiş **{open_periods}** dönemi, şirketlerin bir kısmı "
+       "yayımladıkça indirilir." if open_periods else "")
 )
 
 
@@ -22,13 +30,42 @@ def streamlit_logger(msg: str):
     st.session_state.logs.append(msg)
     log_placeholder.markdown("  \n".join(st.session_state.logs))
 
+col1, col2, col3 = st.columns(3)
+workers   = col1.number_input("Paralel tarayıcı", min_value=1, max_value=12, value=3, step=1,
+                              help="Her tarayıcı kendi profil kopyası ve indirme klasörüyle çalışır.")
+max_retry = col2.number_input("Tekrar sayısı", min_value=0, max_value=5, value=2, step=1)
+headless  = col3.checkbox("Arka planda (headless)", value=True)
+
 if st.button("🔽 Bilançoları İndir"):
     st.session_state.logs = []          # eski logları temizle
-    with st.spinner("İndiriliyor…"):
-        with st.expander("⬇️ İşlem Günlüğü", expanded=True):
-            log_placeholder = st.empty()
-            update_companies_if_needed(log=streamlit_logger)  # ↓ retry’li fonksiyon
-    st.success("İndirme tamamlandı.")
+    progress_bar = st.progress(0.0, text="İndiriliyor…")
+
+    def on_progress(done: int, total: int, ticker: str):
+        progress_bar.progress(done / total, text=f"{done}/{total} – {ticker}")
+
+    config = DownloadConfig(workers=int(workers), max_retry=int(max_retry), headless=headless)
+    with st.expander("⬇️ İşlem Günlüğü", expanded=True):
+        log_placeholder = st.empty()
+        results = update_companies_if_needed(log=streamlit_logger, config=config,
+                                             progress=on_progress, calendar=calendar)
+    progress_bar.empty()
+
+    if any(r.ok for r in results.values()):
+        # Yalnızca yeni inen şirketler okunur; açık oturumlar yeni paneli sonraki okumada görür
+        with st.spinner("Tablo paneli güncelleniyor…"):
+            try:
+                build_panel()
+            except Exception as e:
+                # İndirilen dosyalar yerinde; sayfalar panel yerine Excel'den okur
+                st.warning(f"İndirme tamamlandı ancak tablo paneli güncellenemedi: {e}  \n"
+                           "Panel bir sonraki indirmede veya `python -m modules panel build` ile yenilenebilir.")
+
+    failed = [t for t, r in results.items() if not r.ok]
+    if failed:
+        st.warning(f"{len(results) - len(failed)}/{len(results)} şirket indirildi. "
+                   f"İndirilemeyenler: {', '.join(failed)}")
+    else:
+        st.success(f"İndirme tamamlandı ({len(results)} şirket).")
 
 
 st.markdown("""
@@ -91,7 +128,9 @@ Bazı veri kaynakları doğrudan HTTP isteklerine yanıt vermez. Bu nedenle öze
 <div class='section-title'>🛠️ Geliştirici Notları</div>
 <ul>
   <li>Chrome profili ve indirme dizini <code>Selenium</code> ile yapılandırılmıştır.</li>
-  <li>Dosya <strong>yoksa</strong> veya <strong>3 günden eskiyse</strong> yeniden indirilir.</li>
+  <li>Birden çok tarayıcı paralel çalışır; her biri profilin bir kopyasını ve kendi indirme klasörünü kullanır.</li>
+  <li>İndirmenin bitişi klasör izlenerek anlaşılır; başarısız şirketler artan beklemeyle yeniden denenir.</li>
+  <li>Dosya <strong>yoksa</strong> veya KAP takvimine göre yayımlanmış daha yeni bir dönem bekleniyorsa yeniden indirilir; son 3 günde indirilip yeni dönemi hâlâ içermeyen şirketler atlanır.</li>
   <li>İlk kullanımda Fintables’a giriş yapılmalıdır.</li>
   <li>Streamlit üzerinden güncellemeler tetiklenebilir.</li>
 </ul>